@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib import messages
-from .models import UserProfile, Excursion, ExcursionAvailability, Booking, Transaction, Feedback, Category, Tag, Group, GroupPickupPoint, PaymentMethod, Reservation, Bus, JCCGatewayConfig, EmailSettings, EmailLog, ReferralCode, PickupPoint
+from .models import UserProfile, Excursion, ExcursionAvailability, Booking, Transaction, Feedback, Category, Tag, Group, GroupPickupPoint, PaymentMethod, Reservation, Bus, JCCGatewayConfig, EmailSettings, EmailLog, ReferralCode, PickupPoint, SeatHold, ExcursionListing, SyncRun
 
 # Register your models here.
 admin.site.register(UserProfile)
@@ -21,6 +21,28 @@ admin.site.register(ReferralCode)
 admin.site.register(PickupPoint)
 
 
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ('booking', 'availability_day', 'seats', 'status', 'expires_at', 'created_at')
+    list_filter = ('status',)
+    raw_id_fields = ('booking', 'availability_day')
+
+
+@admin.register(ExcursionListing)
+class ExcursionListingAdmin(admin.ModelAdmin):
+    list_display = ('title', 'duration_range', 'min_price', 'next_available_date', 'last_available_date', 'updated_at')
+    search_fields = ('title',)
+    readonly_fields = ('excursion', 'updated_at')
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'created_count', 'updated_count', 'unchanged_count', 'removed_count', 'triggered_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = [field.name for field in SyncRun._meta.fields]
+    date_hierarchy = 'created_at'
+
+
 @admin.register(EmailLog)
 class EmailLogAdmin(admin.ModelAdmin):
     list_display = ('recipient', 'subject', 'email_kind', 'status', 'sent_at', 'created_at')
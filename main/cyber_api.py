@@ -1,57 +1,231 @@
+"""
+Cyberlogic web API.
+
+CyberlogicClient keeps one pooled requests.Session per process, caches the OAuth bearer
+token until shortly before it expires, applies connect/read timeouts, retries 5xx
+responses and connection errors with backoff, and stops calling the API for a while
+after repeated failures (circuit breaker). The module-level functions are thin
+wrappers over the shared client.
+
+Settings (all optional; point CYBERLOGIC_API_URL at a local fake server to test):
+    CYBERLOGIC_API_URL, CYBERLOGIC_USERNAME, CYBERLOGIC_PASSWORD, CYBERLOGIC_VERIFY_SSL,
+    CYBERLOGIC_CONNECT_TIMEOUT, CYBERLOGIC_READ_TIMEOUT, CYBERLOGIC_RETRIES,
+    CYBERLOGIC_POOL_SIZE, CYBERLOGIC_BREAKER_THRESHOLD, CYBERLOGIC_BREAKER_RESET_SECONDS
+"""
+import logging
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
 
 API_URL = "https://knossostravel-webapi.cyberlogic.cloud/api"
 
-def get_token():
-    response = requests.post(API_URL + "/token", data={
-        'grant_type': 'password',  
-        'scope': 'read',
-        'username': 'innov',
-        'password': 'innov'
-    },
-    verify=False)
+# Refresh the token this many seconds before the API says it expires
+TOKEN_EXPIRY_MARGIN = 60
+# Used when the token response has no expires_in
+DEFAULT_TOKEN_LIFETIME = 3600
+
+
+class CyberlogicError(requests.exceptions.RequestException):
+    """The API kept failing (5xx or connection errors) after retries."""
+
+
+class CyberlogicUnavailable(CyberlogicError):
+    """The circuit breaker is open: the API failed repeatedly and is not being called."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `reset_seconds`;
+    then lets one trial call through (half-open) and closes again if it succeeds.
+    """
+
+    def __init__(self, threshold=5, reset_seconds=30):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                raise CyberlogicUnavailable('Cyberlogic API is unavailable, try again shortly.')
+            # Half-open: push the window forward so concurrent callers keep failing fast
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logger.error(f'Cyberlogic API failed {self.failures} times in a row; pausing calls for {self.reset_seconds}s')
+                self.opened_at = time.monotonic()
+
+
+class CyberlogicClient:
+    """Pooled, token-caching client for the Cyberlogic web API."""
+
+    RETRY_STATUSES = (500, 502, 503, 504)
+    BACKOFF_FACTOR = 0.5
+
+    def __init__(self, base_url=API_URL, username='innov', password='innov', verify=False,
+                 connect_timeout=5, read_timeout=30, retries=3, pool_size=10,
+                 breaker_threshold=5, breaker_reset_seconds=30):
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.password = password
+        self.verify = verify
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset_seconds)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=self.BACKOFF_FACTOR,
+            status_forcelist=self.RETRY_STATUSES,
+            # The API's POSTs (token, availability dates) are reads, safe to repeat
+            allowed_methods=frozenset(['GET', 'POST']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._token = None
+        self._token_expires_at = 0
+        self._token_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        from django.conf import settings
+        return cls(
+            base_url=getattr(settings, 'CYBERLOGIC_API_URL', API_URL),
+            username=getattr(settings, 'CYBERLOGIC_USERNAME', 'innov'),
+            password=getattr(settings, 'CYBERLOGIC_PASSWORD', 'innov'),
+            verify=getattr(settings, 'CYBERLOGIC_VERIFY_SSL', False),
+            connect_timeout=getattr(settings, 'CYBERLOGIC_CONNECT_TIMEOUT', 5),
+            read_timeout=getattr(settings, 'CYBERLOGIC_READ_TIMEOUT', 30),
+            retries=getattr(settings, 'CYBERLOGIC_RETRIES', 3),
+            pool_size=getattr(settings, 'CYBERLOGIC_POOL_SIZE', 10),
+            breaker_threshold=getattr(settings, 'CYBERLOGIC_BREAKER_THRESHOLD', 5),
+            breaker_reset_seconds=getattr(settings, 'CYBERLOGIC_BREAKER_RESET_SECONDS', 30),
+        )
+
+    def _send(self, method, path, **kwargs):
+        """One call through the breaker; 5xx (after retries) and connection errors count as failures."""
+        self.breaker.before_call()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, timeout=self.timeout, verify=self.verify, **kwargs
+            )
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            raise CyberlogicError(f'Cyberlogic {method} {path} failed: {e}') from e
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise CyberlogicError(f'Cyberlogic {method} {path} returned {response.status_code}', response=response)
+        self.breaker.record_success()
+        return response
+
+    def max_request_seconds(self):
+        """
+        Upper bound on one request() call: token fetch, the call, a 401 refresh and the repeated
+        call, each with every retry timing out and the longest backoff between retries.
+        """
+        per_send = (self.retries + 1) * sum(self.timeout)
+        per_send += sum(min(self.BACKOFF_FACTOR * 2 ** attempt, Retry.DEFAULT_BACKOFF_MAX) for attempt in range(self.retries))
+        return 4 * per_send
+
+    def get_token(self, force=False):
+        """Cached bearer token; one thread refreshes it while the others wait."""
+        if not force and self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        with self._token_lock:
+            if not force and self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            response = self._send('POST', '/token', data={
+                'grant_type': 'password',
+                'scope': 'read',
+                'username': self.username,
+                'password': self.password,
+            })
+            payload = response.json()
+            lifetime = int(payload.get('expires_in') or DEFAULT_TOKEN_LIFETIME)
+            self._token = payload['access_token']
+            self._token_expires_at = time.monotonic() + max(lifetime - TOKEN_EXPIRY_MARGIN, 0)
+            return self._token
+
+    def request(self, method, path, auth=True, **kwargs):
+        """Call the API and return the decoded JSON body. A 401 refreshes the token once."""
+        if not auth:
+            return self._send(method, path, **kwargs).json()
+        token = self.get_token()
+        response = self._send(method, path, headers={'Authorization': 'Bearer ' + token}, **kwargs)
+        if response.status_code == 401:
+            token = self.get_token(force=True)
+            response = self._send(method, path, headers={'Authorization': 'Bearer ' + token}, **kwargs)
+        return response.json()
+
+    def get(self, path, auth=True, **kwargs):
+        return self.request('GET', path, auth=auth, **kwargs)
+
+    def post(self, path, auth=True, **kwargs):
+        return self.request('POST', path, auth=auth, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide CyberlogicClient, built from settings on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = CyberlogicClient.from_settings()
+    return _client
 
-    return response.json()["access_token"]
+
+def get_token():
+    return get_client().get_token()
 
 def get_groups():
-    response = requests.get(API_URL + "/excursionPickupGroups" , verify=False)
-    return response.json()
+    return get_client().get("/excursionPickupGroups", auth=False)
 
 def get_hotels():
-    token = get_token()
-    response = requests.get(API_URL + "/hotels", headers={'Authorization': 'Bearer ' + token}, verify=False)
-    return response.json()
+    return get_client().get("/hotels")
 
 def get_pickup_points():
-    response = requests.get(API_URL + "/excursionPickupPoints" , verify=False)
-    return response.json()
+    return get_client().get("/excursionPickupPoints", auth=False)
 
 def get_bookings():
-    token = get_token()
     booking_id = 49941 # need to update to get all bookings
-    response = requests.get(API_URL + "/bookings/" + str(booking_id) + "/itinerary", headers={'Authorization': 'Bearer ' + token}, verify=False)
-
-    return response.json()
+    return get_client().get("/bookings/" + str(booking_id) + "/itinerary")
 
 def get_excursions():
-    token = get_token()
-    response = requests.get(API_URL + "/excursionsList", headers={'Authorization': 'Bearer ' + token}, verify=False)
-    # print('response:', response.json(), type(response.json()))
-    return response.json()
+    return get_client().get("/excursionsList")
 
 def get_excursion_description(excursion_id):
-    token = get_token()
-
-    response = requests.get(API_URL + "/excursion/" + str(excursion_id) + "/description/en", headers={'Authorization': 'Bearer ' + token}, verify=False)
-    return response.json()
+    return get_client().get("/excursion/" + str(excursion_id) + "/description/en")
 
 def get_providers():
-    token = get_token()
-    response = requests.get(API_URL + "/vendors", headers={'Authorization': 'Bearer ' + token}, verify=False)
-    return response.json()
+    return get_client().get("/vendors")
 
 def get_excursion_availabilities(excursion_id):
-    # token = get_token()
     data = {
         "DateFrom": "2025-01-01",
         "DateTo": "2025-12-30",
@@ -59,17 +233,7 @@ def get_excursion_availabilities(excursion_id):
         "ExcursionId": excursion_id, #3914
         "SellerId": 1980
     }
-    response = requests.post(API_URL + "/excursion/datesPerLanguage", json=data, verify=False)
-    # print('response: ' + str(response.json()))
-    return response.json()
+    return get_client().post("/excursion/datesPerLanguage", json=data, auth=False)
 
 def get_reservation(booking_id):
-    token = get_token()
-    # booking_id = 49941
-    response = requests.get(API_URL + "/bookings/" + str(booking_id) + "/itinerary", headers={'Authorization': 'Bearer ' + token}, verify=False)
-
-    return response.json()
-
-
-
-
+    return get_client().get("/bookings/" + str(booking_id) + "/itinerary")
@@ -0,0 +1,147 @@
+"""
+Read-replica routing for the staff analytics, exports and admin list views.
+
+Reads go to the replica only inside `using_replica()` (a context manager and decorator)
+or a view wrapped in `replica_view`; everything else, and every write, uses the
+primary. When the replica alias is not in DATABASES the router is a no-op, so the
+same code runs with or without a replica.
+
+Stickiness: once a request writes, the rest of that request reads from the primary and
+ReplicaStickinessMiddleware sets a short-lived cookie so the same browser keeps reading
+from the primary for READ_REPLICA_STICKY_SECONDS, until the replica has caught up.
+
+Settings (local test with two SQLite files; copy db.sqlite3 to replica.sqlite3 first):
+    DATABASES = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3'},
+        'replica': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica.sqlite3'},
+    }
+    DATABASE_ROUTERS = ['main.db_routers.ReplicaRouter']
+    MIDDLEWARE += ['main.db_routers.ReplicaStickinessMiddleware']
+    READ_REPLICA_ALIAS = 'replica'         # default
+    READ_REPLICA_STICKY_SECONDS = 10       # default
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'primary_sticky'
+
+# Apps whose writes don't make replica reads stale for the user (session saves on every request)
+UNTRACKED_WRITE_APPS = ('sessions',)
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('primary_pinned', default=None)
+
+
+class _PrimaryPin:
+    """Per-request (or per-block) flag: set once anything was written, or the cookie says so."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replica_alias():
+    """The configured read alias, or None when it isn't in DATABASES."""
+    alias = getattr(settings, 'READ_REPLICA_ALIAS', 'replica')
+    return alias if alias in settings.DATABASES and alias != DEFAULT_DB_ALIAS else None
+
+
+def read_alias():
+    """Alias a replica read would use right now (the primary when pinned or in a transaction)."""
+    alias = replica_alias()
+    if alias is None:
+        return DEFAULT_DB_ALIAS
+    pin = _pinned.get()
+    if pin is not None and pin.pinned:
+        return DEFAULT_DB_ALIAS
+    # Reads inside an open transaction must see its uncommitted writes
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+class using_replica(ContextDecorator):
+    """
+    Send the reads in the block (or decorated function) to the read replica.
+
+        with using_replica():
+            data = RevenueAnalyticsService.compute_revenue_data(start, end)
+
+    Querysets are lazy: evaluate them inside the block. For streamed responses, whose
+    iterators run after the view returns, pin the queryset with `.using(read_alias())`.
+    """
+
+    def _recreate_cm(self):
+        # The decorator form shares one instance across calls (and threads); the ContextVar
+        # tokens are kept on the instance, so every call needs its own
+        return type(self)()
+
+    def __enter__(self):
+        self._pin_token = _pinned.set(_PrimaryPin()) if _pinned.get() is None else None
+        self._token = _replica_reads.set(True)
+        return self
+
+    def __exit__(self, *exc):
+        _replica_reads.reset(self._token)
+        if self._pin_token is not None:
+            _pinned.reset(self._pin_token)
+        return False
+
+
+def replica_view(view_func):
+    """View decorator: GET/HEAD requests read from the replica, other methods from the primary."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            with using_replica():
+                return view_func(request, *args, **kwargs)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Database router: replica reads inside using_replica(), everything else on the primary."""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return read_alias()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin = _pinned.get()
+        if pin is not None and model._meta.app_label not in UNTRACKED_WRITE_APPS:
+            pin.pinned = pin.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin a browser to the primary for READ_REPLICA_STICKY_SECONDS after one of its requests
+    writes, so a redirect after a POST doesn't render from a lagging replica.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin = _PrimaryPin(pinned=STICKY_COOKIE in request.COOKIES)
+        token = _pinned.set(pin)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        if pin.wrote and replica_alias() is not None:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=getattr(settings, 'READ_REPLICA_STICKY_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,89 @@
+"""
+Compare the full-text excursion search against the old icontains scan over
+a few thousand synthetic excursions.
+Run from project root: python manage.py benchmark_excursion_search --count 5000 --queries 200
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from main.models import Excursion, ExcursionListing
+from main.utils import ExcursionListingService, ExcursionSearchService
+
+WORDS = [
+    'sea', 'caves', 'boat', 'cruise', 'village', 'wine', 'tasting', 'mountain', 'troodos', 'monastery',
+    'jeep', 'safari', 'sunset', 'lagoon', 'blue', 'snorkelling', 'ancient', 'ruins', 'kourion', 'paphos',
+    'mosaics', 'halloumi', 'lunch', 'waterfall', 'hiking', 'turtle', 'beach', 'nicosia', 'old', 'town',
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark excursion full-text search against icontains over synthetic excursions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=3000, help="Number of synthetic excursions.")
+        parser.add_argument("--queries", type=int, default=100, help="Number of search queries per strategy.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        count = options["count"]
+
+        self.stdout.write(f"Creating {count} synthetic excursions...")
+        excursion_ids = self._create_fixture(rng, count)
+        try:
+            listings = ExcursionListing.objects.all()
+            # Whole words, word pairs and partially typed words, like the HTMX search box sends
+            queries = [
+                ' '.join(rng.sample(WORDS, rng.choice([1, 2])))[: rng.choice([4, 6, 40])]
+                for _ in range(options["queries"])
+            ]
+            self.stdout.write(f"Search backend: {ExcursionSearchService._backend() or 'icontains fallback'}")
+
+            def icontains(query):
+                return list(
+                    listings.filter(Q(title__icontains=query) | Q(description__icontains=query))
+                    .values_list('excursion_id', flat=True)
+                )
+
+            def full_text(query):
+                return list(ExcursionSearchService.search(listings, query).values_list('excursion_id', flat=True))
+
+            for label, strategy in (("icontains", icontains), ("full-text", full_text)):
+                hits = 0
+                started = time.perf_counter()
+                for query in queries:
+                    hits += len(strategy(query))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label:>10}: {len(queries)} queries in {elapsed:.3f}s "
+                    f"({elapsed / len(queries) * 1000:.2f} ms/query, {hits} hits)"
+                )
+        finally:
+            Excursion.objects.filter(pk__in=excursion_ids).delete()
+            for excursion_id in excursion_ids:
+                ExcursionSearchService.remove(excursion_id)
+
+    def _create_fixture(self, rng, count):
+        # Descriptions are mostly filler from a large vocabulary with a few themed words,
+        # so queries are selective the way real ones are.
+        filler = [
+            ''.join(rng.choice('abcdefghijklmnoprstuvy') for _ in range(rng.randint(4, 9)))
+            for _ in range(5000)
+        ]
+        excursions = []
+        for i in range(count):
+            paragraphs = ''.join(
+                f"<p>{' '.join(rng.choices(filler, k=40))}&nbsp;<strong>{rng.choice(WORDS)}</strong></p>"
+                for _ in range(rng.randint(3, 8))
+            )
+            excursions.append(Excursion(
+                title=f"[Benchmark] {' '.join(rng.sample(WORDS, 3)).title()} {i}",
+                description=paragraphs,
+            ))
+        created = Excursion.objects.bulk_create(excursions, batch_size=500)
+        excursion_ids = [excursion.pk for excursion in created]
+        ExcursionListingService.refresh(excursion_ids)
+        return excursion_ids
@@ -0,0 +1,99 @@
+"""
+Seed a large batch of completed bookings and time the revenue dashboard paths:
+the single-pass live aggregation and the DailyRevenueFact rollup.
+Run from project root: python manage.py benchmark_revenue_dashboard --bookings 200000 --days 90
+"""
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from main.models import Booking, Excursion
+from main.utils import RevenueAnalyticsService, RevenueFactService
+
+
+class Command(BaseCommand):
+    help = "Benchmark RevenueAnalyticsService on seeded bookings; reports round trips and timings per path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=200000, help="Number of bookings to seed.")
+        parser.add_argument("--days", type=int, default=90, help="Spread the bookings over this many past days.")
+        parser.add_argument("--excursions", type=int, default=40, help="Number of benchmark excursions.")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per path.")
+
+    def handle(self, *args, **options):
+        total = options["bookings"]
+        day_count = options["days"]
+        if total < 1 or day_count < 1:
+            raise CommandError("--bookings and --days must be positive.")
+
+        today = timezone.localdate()
+        days = [today - timedelta(days=offset) for offset in range(1, day_count + 1)]
+        start_date, end_date = days[-1], days[0]
+        excursions = [
+            Excursion.objects.create(title=f"[Benchmark] Revenue {index}")
+            for index in range(options["excursions"])
+        ]
+        try:
+            started = time.perf_counter()
+            self._seed(excursions, days, total)
+            self.stdout.write(f"Seeded {total} bookings over {day_count} days in {time.perf_counter() - started:.1f}s")
+
+            started = time.perf_counter()
+            RevenueFactService.refresh_days(days)
+            self.stdout.write(f"Built the revenue rollup in {time.perf_counter() - started:.1f}s")
+
+            live = lambda: RevenueAnalyticsService.get_live_revenue_data(Booking.objects.filter(
+                payment_status="completed",
+                **RevenueAnalyticsService.created_between(start_date, end_date),
+            ))
+            rollup = lambda: RevenueAnalyticsService.compute_revenue_data(start_date, end_date)
+            for label, run in (("live single-pass", live), ("rollup", rollup)):
+                self._measure(label, run, options["repeat"])
+        finally:
+            Booking.objects.filter(excursion__in=excursions).delete()
+            for excursion in excursions:
+                excursion.delete()
+            # Rebuild the touched days from the remaining (real) bookings
+            RevenueFactService.refresh_days(days)
+
+    def _seed(self, excursions, days, total):
+        rng = random.Random(42)
+        per_day, remainder = divmod(total, len(days))
+        for index, day in enumerate(days):
+            count = per_day + (1 if index < remainder else 0)
+            if not count:
+                continue
+            created = Booking.objects.bulk_create([
+                Booking(
+                    excursion=rng.choice(excursions),
+                    payment_status="completed",
+                    total_price=Decimal(rng.randint(20, 250)),
+                    partial_paid=Decimal("10") if rng.random() < 0.1 else None,
+                    partial_paid_method=rng.choice(["cash", "card"]),
+                    referral_discount_amount=Decimal("5") if rng.random() < 0.2 else 0,
+                )
+                for _ in range(count)
+            ], batch_size=2000)
+            # created_at is auto_now_add, so move each day's batch afterwards
+            ids = [booking.pk for booking in created]
+            created_at = timezone.make_aware(datetime.combine(day, dt_time(12, 0)))
+            for offset in range(0, len(ids), 900):
+                Booking.objects.filter(pk__in=ids[offset:offset + 900]).update(created_at=created_at)
+
+    def _measure(self, label, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                data = run()
+                timings.append(time.perf_counter() - started)
+        self.stdout.write(
+            f"{label:>18}: {len(queries)} queries, best {min(timings) * 1000:.1f}ms "
+            f"({data['total_bookings']} bookings, revenue {data['total_revenue']})"
+        )
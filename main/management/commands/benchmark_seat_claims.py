@@ -0,0 +1,96 @@
+"""
+Hammer a single AvailabilityDays row from many threads and check that the
+conditional seat claim never oversells it.
+Run from project root: python manage.py benchmark_seat_claims --threads 32 --attempts 50
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, close_old_connections, OperationalError
+from django.utils import timezone
+
+from main.models import Excursion, ExcursionAvailability, AvailabilityDays
+from main.utils import BookingService
+
+
+class Command(BaseCommand):
+    help = "Concurrency benchmark: many threads claim seats on one AvailabilityDays row; verifies no oversell."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Number of concurrent workers.")
+        parser.add_argument("--attempts", type=int, default=25, help="Claim attempts per worker.")
+        parser.add_argument("--seats", type=int, default=2, help="Seats requested per claim.")
+        parser.add_argument("--capacity", type=int, default=100, help="Capacity of the benchmark day.")
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        attempts = options["attempts"]
+        seats = options["seats"]
+        capacity = options["capacity"]
+
+        excursion, availability, day = self._create_fixture(capacity)
+        results = {"claimed": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+        start_barrier = threading.Barrier(threads)
+
+        def worker():
+            close_old_connections()
+            start_barrier.wait()
+            for _ in range(attempts):
+                try:
+                    ok = BookingService.claim_seats(availability.pk, day.date_day, seats)
+                except OperationalError:
+                    # SQLite serialises writers and may report "database is locked" under load
+                    ok = None
+                with lock:
+                    if ok is None:
+                        results["errors"] += 1
+                    elif ok:
+                        results["claimed"] += 1
+                    else:
+                        results["rejected"] += 1
+            connection.close()
+
+        try:
+            started = time.perf_counter()
+            pool = [threading.Thread(target=worker) for _ in range(threads)]
+            for t in pool:
+                t.start()
+            for t in pool:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            day.refresh_from_db()
+            total = threads * attempts
+            self.stdout.write(
+                f"{total} claims in {elapsed:.3f}s ({total / elapsed:.0f}/s): "
+                f"{results['claimed']} claimed, {results['rejected']} rejected, {results['errors']} errors"
+            )
+            self.stdout.write(f"booked_guests={day.booked_guests} capacity={day.capacity}")
+
+            if day.booked_guests > day.capacity:
+                raise CommandError("Oversell detected: booked_guests exceeds capacity.")
+            if day.booked_guests != results["claimed"] * seats:
+                raise CommandError("Lost update: booked_guests does not match successful claims.")
+            self.stdout.write(self.style.SUCCESS("No oversell."))
+        finally:
+            excursion.delete()
+
+    def _create_fixture(self, capacity):
+        today = timezone.now().date() + timedelta(days=30)
+        excursion = Excursion.objects.create(title="[Benchmark] Seat claims")
+        availability = ExcursionAvailability.objects.create(
+            excursion=excursion,
+            start_date=today,
+            end_date=today,
+            max_guests=capacity,
+            status="inactive",
+        )
+        day = AvailabilityDays.objects.create(
+            excursion_availability=availability,
+            date_day=today,
+            capacity=capacity,
+        )
+        return excursion, availability, day
@@ -13,9 +13,9 @@ from django.db import transaction
 from main.models import (
     Excursion,
     ExcursionAvailability,
-    AvailabilityDays,
     Booking,
 )
+from main.utils import AvailabilityDaysService
 
 
 # Dummy data pools
@@ -117,17 +117,8 @@ class Command(BaseCommand):
             created["availabilities"] += 1
 
             # AvailabilityDays for every day in range (so bookings have capacity)
-            current = start_date
-            while current <= end_date:
-                AvailabilityDays.objects.create(
-                    excursion_availability=availability,
-                    date_day=current,
-                    capacity=max_guests,
-                    booked_guests=0,
-                    status="active",
-                )
-                current += timedelta(days=1)
-                created["availability_days"] += 1
+            synced = AvailabilityDaysService.sync_days(availability, weekday_numbers=range(7))
+            created["availability_days"] += synced["created"]
 
             # One booking per availability: random date in range, random guests
             booking_date = start_date + timedelta(days=random.randint(0, min(5, (end_date - start_date).days)))
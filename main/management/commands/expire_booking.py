@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from main.models import Booking
 from django.utils import timezone
-from main.utils import EmailService
+from main.utils import EmailService, BookingService
 from datetime import timedelta
 import logging
 
@@ -32,6 +32,7 @@ class Command(BaseCommand):
             if booking.date <= expiration_cutoff_date:
                 booking.payment_status = 'expired'
                 booking.save(update_fields=['payment_status'])
+                BookingService.release_hold_for_booking(booking)
                 expired_bookings.append(booking)
                 expired_count += 1
                 self.send_customer_cancellation_email(booking)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from main.utils import ExcursionListingService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rebuild the ExcursionListing read model used by the homepage and excursion list'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--excursion',
+            type=int,
+            action='append',
+            dest='excursion_ids',
+            help='Only rebuild the listing of this excursion id (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        written = ExcursionListingService.refresh(options.get('excursion_ids'))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} excursion listing(s)'))
+        logger.info(f'Rebuilt {written} excursion listing(s)')
@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from main.utils import OccupancyService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-excursion, per-day occupancy cells behind the occupancy heatmap'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--excursion',
+            type=int,
+            action='append',
+            dest='excursion_ids',
+            help='Only rebuild this excursion id (may be repeated)',
+        )
+        parser.add_argument('--from', dest='date_from', help='First service date to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last service date to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = date.fromisoformat(options['date_from']) if options['date_from'] else None
+            date_to = date.fromisoformat(options['date_to']) if options['date_to'] else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+        written = OccupancyService.refresh(options.get('excursion_ids'), date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} occupancy cell(s)'))
+        logger.info(f'Rebuilt {written} occupancy cell(s)')
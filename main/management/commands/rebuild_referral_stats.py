@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from main.utils import ReferralStatsService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-referral-code booking stats shown on agents_list and agent profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--code',
+            type=int,
+            action='append',
+            dest='referral_code_ids',
+            help='Only rebuild the stats of this referral code id (may be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        written = ReferralStatsService.refresh(options.get('referral_code_ids'))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {written} referral code(s)'))
+        logger.info(f'Rebuilt stats for {written} referral code(s)')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from main.utils import DashboardSnapshotService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Recompute the cached admin dashboard stats snapshot'
+
+    def handle(self, *args, **options):
+        snapshot = DashboardSnapshotService.refresh()
+        self.stdout.write(self.style.SUCCESS(f"Refreshed admin dashboard snapshot at {snapshot['computed_at']:%Y-%m-%d %H:%M:%S}"))
+        logger.info("Refreshed admin dashboard snapshot")
@@ -0,0 +1,43 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from main.models import Booking
+from main.utils import RevenueFactService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Re-aggregate the DailyRevenueFact rollup for dirty booking days (or a given range)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First booking day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Last booking day to rebuild (YYYY-MM-DD), defaults to yesterday')
+        parser.add_argument('--all', action='store_true', help='Rebuild every day that has completed bookings')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            days = Booking.objects.filter(payment_status='completed').annotate(
+                day=TruncDate('created_at')
+            ).values_list('day', flat=True).distinct()
+            days = sorted(set(days))
+        elif options['date_from']:
+            try:
+                date_from = date.fromisoformat(options['date_from'])
+                date_to = date.fromisoformat(options['date_to']) if options['date_to'] else timezone.localdate() - timedelta(days=1)
+            except ValueError as e:
+                raise CommandError(f'Invalid date: {e}')
+            days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+        else:
+            day_count, rows = RevenueFactService.refresh_pending()
+            self.stdout.write(self.style.SUCCESS(f'Refreshed {day_count} revenue day(s), {rows} fact row(s)'))
+            logger.info(f'Refreshed {day_count} revenue day(s), {rows} fact row(s)')
+            return
+
+        rows = 0
+        for day in days:
+            rows += RevenueFactService.refresh_days([day])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(days)} revenue day(s), {rows} fact row(s)'))
+        logger.info(f'Rebuilt {len(days)} revenue day(s), {rows} fact row(s)')
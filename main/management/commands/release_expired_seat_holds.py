@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from main.utils import BookingService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Release seat holds of pending bookings whose TTL has passed'
+
+    def handle(self, *args, **options):
+        released = BookingService.release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired seat hold(s)'))
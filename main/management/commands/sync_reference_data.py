@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from main.utils import ReferenceSyncService, SyncRunService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Sync pickup groups, pickup points, hotels, providers and excursions from the Cyberlogic API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds',
+            nargs='*',
+            choices=ReferenceSyncService.KINDS,
+            help='What to sync (default: all, in dependency order)',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete local rows missing from the feed (providers are deactivated instead)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Refetch every excursion description, not only those changed since the last sync',
+        )
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Replace excursion titles, descriptions and providers with the Cyberlogic values (discards admin edits)',
+        )
+
+    def handle(self, *args, **options):
+        kinds = options['kinds'] or ReferenceSyncService.KINDS
+        failed = []
+        for kind in ReferenceSyncService.KINDS:
+            if kind not in kinds:
+                continue
+            # Recorded as a SyncRun like the dashboard syncs, so scheduled runs show up too
+            run = SyncRunService.run_now(
+                kind, prune=options['prune'], force=options['force'], overwrite=options['overwrite'],
+            )
+            if run.status == 'failed':
+                failed.append(kind)
+                self.stderr.write(self.style.ERROR(run.message))
+                continue
+            self.stdout.write(self.style.SUCCESS(f'{run.message} ({run.duration.total_seconds():.1f}s)'))
+            logger.info(f'Sync run #{run.pk}: {run.message}')
+        if failed:
+            raise CommandError(f"Sync failed for: {', '.join(failed)}")
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 04:33
+
+from django.db import migrations, models
+
+
+def raise_capacity_to_booked(apps, schema_editor):
+    # Days that are already oversold would violate the new constraint; keep the
+    # booking counts and lift capacity to match instead.
+    AvailabilityDays = apps.get_model('main', 'AvailabilityDays')
+    AvailabilityDays.objects.filter(
+        booked_guests__gt=models.F('capacity')
+    ).update(capacity=models.F('booked_guests'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0060_bookingpickuptimenotification_emaillog_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(raise_capacity_to_booked, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='availabilitydays',
+            constraint=models.CheckConstraint(condition=models.Q(('booked_guests__lte', models.F('capacity'))), name='availabilitydays_booked_lte_capacity'),
+        ),
+    ]
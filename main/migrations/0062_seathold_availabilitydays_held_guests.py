@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-17 04:34
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0061_availabilitydays_booked_lte_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seats', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('active', 'Active'), ('converted', 'Converted'), ('released', 'Released')], default='active', max_length=10)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['expires_at'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='availabilitydays',
+            name='availabilitydays_booked_lte_capacity',
+        ),
+        migrations.AddField(
+            model_name='availabilitydays',
+            name='held_guests',
+            field=models.PositiveIntegerField(default=0, help_text='Seats reserved by live SeatHolds of pending bookings.'),
+        ),
+        migrations.AddConstraint(
+            model_name='availabilitydays',
+            constraint=models.CheckConstraint(condition=models.Q(('booked_guests__lte', django.db.models.expressions.CombinedExpression(models.F('capacity'), '-', models.F('held_guests')))), name='availabilitydays_booked_held_lte_capacity'),
+        ),
+        migrations.AddField(
+            model_name='seathold',
+            name='availability_day',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='main.availabilitydays'),
+        ),
+        migrations.AddField(
+            model_name='seathold',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seat_holds', to='main.booking'),
+        ),
+        migrations.AddIndex(
+            model_name='seathold',
+            index=models.Index(fields=['status', 'expires_at'], name='main_seatho_status_08deb6_idx'),
+        ),
+    ]
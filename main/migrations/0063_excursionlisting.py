@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-17 04:40
+
+import django.db.models.deletion
+import main.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0062_seathold_availabilitydays_held_guests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExcursionListing',
+            fields=[
+                ('excursion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='listing', serialize=False, to='main.excursion')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, default='')),
+                ('intro_image', models.ImageField(blank=True, null=True, upload_to=main.models.excursion_intro_image_path)),
+                ('overall_rating', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('active_regions', models.JSONField(blank=True, default=list, help_text='Region names of active availabilities')),
+                ('region_ids', models.JSONField(blank=True, default=list)),
+                ('category_ids', models.JSONField(blank=True, default=list)),
+                ('tag_ids', models.JSONField(blank=True, default=list)),
+                ('tag_names', models.JSONField(blank=True, default=list)),
+                ('duration_range', models.CharField(blank=True, default='', max_length=50)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('next_available_date', models.DateField(blank=True, null=True)),
+                ('last_available_date', models.DateField(blank=True, db_index=True, help_text='Latest end date of an active availability; listed while >= today', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['excursion_id'],
+            },
+        ),
+    ]
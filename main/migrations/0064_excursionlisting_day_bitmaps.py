@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0063_excursionlisting'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excursionlisting',
+            name='bitmap_origin',
+            field=models.DateField(blank=True, help_text='Date of bit 0 in the day bitmaps', null=True),
+        ),
+        migrations.AddField(
+            model_name='excursionlisting',
+            name='day_bitmap',
+            field=models.BinaryField(blank=True, default=b'', help_text='One bit per day from bitmap_origin: any active day'),
+        ),
+        migrations.AddField(
+            model_name='excursionlisting',
+            name='region_day_bitmaps',
+            field=models.JSONField(blank=True, default=dict, help_text='Region id -> hex day bitmap'),
+        ),
+    ]
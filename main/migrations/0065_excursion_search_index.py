@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-17 04:41
+
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS main_excursionsearch "
+            "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "ALTER TABLE main_excursionlisting ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(search_text, '')), 'B')"
+            ") STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX main_excursionlisting_search_gin "
+            "ON main_excursionlisting USING GIN (search_vector)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS main_excursionsearch")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS main_excursionlisting_search_gin")
+        schema_editor.execute("ALTER TABLE main_excursionlisting DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0064_excursionlisting_day_bitmaps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excursionlisting',
+            name='search_text',
+            field=models.TextField(blank=True, default='', help_text='Plain-text description, tags and categories fed to the search index'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-17 04:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_booking_days_dirty(apps, schema_editor):
+    """Every existing booking day starts stale, so it is served live until the refresh job fills its facts."""
+    from django.db.models.functions import TruncDate
+    Booking = apps.get_model('main', 'Booking')
+    RevenueFactDirtyDay = apps.get_model('main', 'RevenueFactDirtyDay')
+    days = (
+        Booking.objects.filter(payment_status='completed')
+        .annotate(day=TruncDate('created_at'))
+        .values_list('day', flat=True)
+        .distinct()
+    )
+    RevenueFactDirtyDay.objects.bulk_create(
+        [RevenueFactDirtyDay(day=day) for day in days if day],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0065_excursion_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueFactDirtyDay',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('marked_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRevenueFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('channel', models.CharField(choices=[('Agent', 'Agent'), ('Reps', 'Reps'), ('Direct', 'Direct')], max_length=10)),
+                ('payment_type', models.CharField(choices=[('Card', 'Card'), ('Cash', 'Cash')], max_length=10)),
+                ('partial_method', models.CharField(blank=True, default='', help_text='partial_paid_method of bookings with a partial payment, else empty', max_length=255)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('discount_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('discounted_bookings', models.PositiveIntegerField(default=0)),
+                ('partial_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('partial_bookings', models.PositiveIntegerField(default=0)),
+                ('agent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='agent_revenue_facts', to='main.userprofile')),
+                ('excursion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='revenue_facts', to='main.excursion')),
+                ('provider', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='provider_revenue_facts', to='main.userprofile')),
+                ('representative', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='representative_revenue_facts', to='main.userprofile')),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.RunPython(mark_booking_days_dirty, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-17 05:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_referral_code_stats(apps, schema_editor):
+    from django.db.models import Count, Q, Sum
+    ReferralCode = apps.get_model('main', 'ReferralCode')
+    ReferralCodeStats = apps.get_model('main', 'ReferralCodeStats')
+    completed = Q(bookings__payment_status='completed')
+    rows = ReferralCode.objects.annotate(
+        bookings_total=Count('bookings'),
+        price_total=Sum('bookings__total_price'),
+        completed_total=Count('bookings', filter=completed),
+        completed_price_total=Sum('bookings__total_price', filter=completed),
+    ).values_list('pk', 'bookings_total', 'price_total', 'completed_total', 'completed_price_total')
+    ReferralCodeStats.objects.bulk_create(
+        [
+            ReferralCodeStats(
+                referral_code_id=pk,
+                bookings_count=bookings_total,
+                total_price_sum=price_total or 0,
+                completed_bookings_count=completed_total,
+                completed_revenue=completed_price_total or 0,
+            )
+            for pk, bookings_total, price_total, completed_total, completed_price_total in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0066_dailyrevenuefact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferralCodeStats',
+            fields=[
+                ('referral_code', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='main.referralcode')),
+                ('bookings_count', models.PositiveIntegerField(default=0, help_text='All bookings made with the code')),
+                ('total_price_sum', models.DecimalField(decimal_places=2, default=0, help_text='Sum of total_price over all bookings made with the code', max_digits=12)),
+                ('completed_bookings_count', models.PositiveIntegerField(default=0)),
+                ('completed_revenue', models.DecimalField(decimal_places=2, default=0, help_text='Sum of total_price over completed bookings', max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_referral_code_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-17 05:16
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_excursion_occupancy(apps, schema_editor):
+    from django.db.models import Sum
+    AvailabilityDays = apps.get_model('main', 'AvailabilityDays')
+    ExcursionOccupancy = apps.get_model('main', 'ExcursionOccupancy')
+    rows = AvailabilityDays.objects.filter(excursion_availability__isnull=False).values('excursion_availability__excursion_id', 'date_day').annotate(
+        capacity_total=Sum('capacity'),
+        booked_total=Sum('booked_guests'),
+        held_total=Sum('held_guests'),
+    ).order_by()
+    ExcursionOccupancy.objects.bulk_create(
+        [
+            ExcursionOccupancy(
+                excursion_id=row['excursion_availability__excursion_id'],
+                date=row['date_day'],
+                capacity=row['capacity_total'] or 0,
+                booked=row['booked_total'] or 0,
+                held=row['held_total'] or 0,
+                load_factor=(
+                    Decimal(row['booked_total'] or 0) / row['capacity_total']
+                    if row['capacity_total'] else Decimal('0')
+                ).quantize(Decimal('0.0001')),
+            )
+            for row in rows
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0067_referralcodestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExcursionOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('capacity', models.PositiveIntegerField(default=0)),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('held', models.PositiveIntegerField(default=0, help_text='Seats held by pending bookings')),
+                ('load_factor', models.DecimalField(decimal_places=4, default=0, help_text='booked / capacity', max_digits=6)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('excursion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='main.excursion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'excursion'], name='main_excurs_date_cadc11_idx')],
+                'constraints': [models.UniqueConstraint(fields=('excursion', 'date'), name='excursionoccupancy_excursion_date_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_excursion_occupancy, migrations.RunPython.noop),
+    ]
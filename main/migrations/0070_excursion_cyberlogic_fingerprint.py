@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 05:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0069_syncrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excursion',
+            name='cyberlogic_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
@@ -94,17 +94,14 @@ class UserProfile(models.Model):
         return 0
 
     def get_total_bookings_referral(self):
+        """Get (booking count, total_price sum) over bookings made with this agent's referral codes"""
         from django.db.models import Sum
-        """Get total number of excursion bookings for this user"""
-        total_bookings = 0
-        total_spent = 0
         if self.user:
-            referral_codes = ReferralCode.objects.filter(agent=self)
-            for referral_code in referral_codes:
-                bookings = Booking.objects.filter(referral_code=referral_code)
-                total_bookings += bookings.count()
-                total_spent += bookings.aggregate(total=Sum('total_price'))['total'] or 0
-            return total_bookings, total_spent
+            totals = ReferralCodeStats.objects.filter(referral_code__agent=self).aggregate(
+                bookings=Sum('bookings_count'),
+                spent=Sum('total_price_sum'),
+            )
+            return totals['bookings'] or 0, totals['spent'] or 0
         return 0, 0
     
     def get_total_spent(self):
@@ -223,7 +220,23 @@ class ReferralCode(models.Model):
                 code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
         
         return code
-    
+
+
+class ReferralCodeStats(models.Model):
+    """
+    Booking totals per referral code, kept current by ReferralStatsService (Booking signals
+    plus a nightly rebuild). Summed per agent for agents_list and the agent profile.
+    """
+    referral_code = models.OneToOneField(ReferralCode, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    bookings_count = models.PositiveIntegerField(default=0, help_text="All bookings made with the code")
+    total_price_sum = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Sum of total_price over all bookings made with the code")
+    completed_bookings_count = models.PositiveIntegerField(default=0)
+    completed_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Sum of total_price over completed bookings")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.referral_code_id}"
+
 class DayOfWeek(models.Model):
     MON = 'MON'
     TUE = 'TUE'
@@ -294,6 +307,8 @@ class Excursion(models.Model):
     full_day = models.BooleanField(default=False)
     on_request = models.BooleanField(default=False)
     provider = models.ForeignKey(UserProfile, on_delete=models.SET_NULL,blank=True, null=True, related_name='excursions_provider', limit_choices_to={'role': 'provider'})
+    # Hash of the Cyberlogic excursionsList entry at the last sync; descriptions are refetched when it changes
+    cyberlogic_fingerprint = models.CharField(max_length=64, blank=True, default='', editable=False)
     # guide = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, blank=True, null=True, related_name='excursions_guide', limit_choices_to={'role': 'guide'})
 
     def __str__(self):
@@ -336,6 +351,38 @@ class ExcursionImage(models.Model):
     def __str__(self):
         return f"Image for {self.excursion.title}"
 
+class ExcursionListing(models.Model):
+    """
+    Denormalised read model behind the homepage and excursion list.
+    One row per excursion, rebuilt by ExcursionListingService from signals and the
+    rebuild_excursion_listings command; never edited by hand.
+    """
+    excursion = models.OneToOneField(Excursion, on_delete=models.CASCADE, primary_key=True, related_name='listing')
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, default='')
+    search_text = models.TextField(blank=True, default='', help_text="Plain-text description, tags and categories fed to the search index")
+    intro_image = models.ImageField(upload_to=excursion_intro_image_path, blank=True, null=True)
+    overall_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    active_regions = models.JSONField(default=list, blank=True, help_text="Region names of active availabilities")
+    region_ids = models.JSONField(default=list, blank=True)
+    category_ids = models.JSONField(default=list, blank=True)
+    tag_ids = models.JSONField(default=list, blank=True)
+    tag_names = models.JSONField(default=list, blank=True)
+    duration_range = models.CharField(max_length=50, blank=True, default='')
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    next_available_date = models.DateField(null=True, blank=True)
+    last_available_date = models.DateField(null=True, blank=True, db_index=True, help_text="Latest end date of an active availability; listed while >= today")
+    bitmap_origin = models.DateField(null=True, blank=True, help_text="Date of bit 0 in the day bitmaps")
+    day_bitmap = models.BinaryField(default=b'', blank=True, help_text="One bit per day from bitmap_origin: any active day")
+    region_day_bitmaps = models.JSONField(default=dict, blank=True, help_text="Region id -> hex day bitmap")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['excursion_id']
+
+    def __str__(self):
+        return f"Listing for {self.title}"
+
 class Feedback(models.Model):
     excursion = models.ForeignKey(Excursion, on_delete=models.CASCADE, related_name='feedback_entries')
     rating = models.PositiveSmallIntegerField()
@@ -474,11 +521,83 @@ class AvailabilityDays(models.Model):
     date_day = models.DateField()
     capacity = models.PositiveIntegerField(default=0)
     booked_guests = models.PositiveIntegerField(default=0)
+    held_guests = models.PositiveIntegerField(
+        default=0,
+        help_text='Seats reserved by live SeatHolds of pending bookings.',
+    )
     status = models.CharField(max_length=255, choices=STATUS_CHOICES, default='active')
 
     def __str__(self):
         return f"{self.excursion_availability.excursion.title} - {self.date_day}"
 
+    @property
+    def remaining_seats(self):
+        return max(0, self.capacity - self.booked_guests - self.held_guests)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(booked_guests__lte=models.F('capacity') - models.F('held_guests')),
+                name='availabilitydays_booked_held_lte_capacity',
+            ),
+        ]
+
+class SeatHold(models.Model):
+    """
+    Time-limited reservation of seats on an AvailabilityDays row for a pending booking.
+    The seats are counted in AvailabilityDays.held_guests until the hold is converted
+    (payment completed) or released (cancelled / expired).
+    """
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('converted', 'Converted'),
+        ('released', 'Released'),
+    ]
+    booking = models.ForeignKey('Booking', on_delete=models.SET_NULL, null=True, blank=True, related_name='seat_holds')
+    availability_day = models.ForeignKey(AvailabilityDays, on_delete=models.CASCADE, related_name='seat_holds')
+    seats = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Hold of {self.seats} seat(s) for booking #{self.booking_id} ({self.status})"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    class Meta:
+        ordering = ['expires_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+class ExcursionOccupancy(models.Model):
+    """
+    Seats per excursion and service date, summed over the AvailabilityDays of all its
+    availabilities. Kept current by OccupancyService (booking seat paths, availability edits
+    and a nightly rebuild); read by the occupancy heatmap.
+    """
+    excursion = models.ForeignKey(Excursion, on_delete=models.CASCADE, related_name='occupancy')
+    date = models.DateField()
+    capacity = models.PositiveIntegerField(default=0)
+    booked = models.PositiveIntegerField(default=0)
+    held = models.PositiveIntegerField(default=0, help_text="Seats held by pending bookings")
+    load_factor = models.DecimalField(max_digits=6, decimal_places=4, default=0, help_text="booked / capacity")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.excursion_id} on {self.date}: {self.booked}/{self.capacity}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['excursion', 'date'], name='excursionoccupancy_excursion_date_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'excursion']),
+        ]
+
 class PickupGroupAvailability(models.Model):
     excursion_availability = models.ForeignKey(ExcursionAvailability, on_delete=models.CASCADE, related_name='pickup_group_availabilities')
     pickup_group = models.ForeignKey(PickupGroup, on_delete=models.SET_NULL, null=True, related_name='pickup_group_availabilities')
@@ -781,6 +900,50 @@ class Booking(models.Model):
             models.Index(fields=['created_at']),
         ]
 
+class DailyRevenueFact(models.Model):
+    """
+    Completed-booking revenue pre-aggregated per booking day (created_at date) and dimension combination.
+    Rebuilt per day by RevenueFactService; read by RevenueAnalyticsService.
+    """
+    CHANNEL_CHOICES = [
+        ('Agent', 'Agent'),
+        ('Reps', 'Reps'),
+        ('Direct', 'Direct'),
+    ]
+    PAYMENT_TYPE_CHOICES = [
+        ('Card', 'Card'),
+        ('Cash', 'Cash'),
+    ]
+
+    day = models.DateField(db_index=True)
+    excursion = models.ForeignKey(Excursion, on_delete=models.SET_NULL, null=True, blank=True, related_name='revenue_facts')
+    provider = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='provider_revenue_facts')
+    agent = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='agent_revenue_facts')
+    representative = models.ForeignKey(UserProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='representative_revenue_facts')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    payment_type = models.CharField(max_length=10, choices=PAYMENT_TYPE_CHOICES)
+    partial_method = models.CharField(max_length=255, blank=True, default='', help_text="partial_paid_method of bookings with a partial payment, else empty")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    bookings = models.PositiveIntegerField(default=0)
+    discount_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    discounted_bookings = models.PositiveIntegerField(default=0)
+    partial_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    partial_bookings = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+
+    def __str__(self):
+        return f"Revenue {self.day} ({self.channel}/{self.payment_type}): {self.revenue}"
+
+class RevenueFactDirtyDay(models.Model):
+    """A booking day whose DailyRevenueFact rows are stale; served live until refreshed."""
+    day = models.DateField(primary_key=True)
+    marked_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.day)
+
 class Transaction(models.Model):
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='transactions')
     payment_method = models.ForeignKey(PaymentMethod, on_delete=models.SET_NULL, null=True, related_name='transactions')
@@ -937,3 +1100,66 @@ class EmailLog(models.Model):
         verbose_name = 'Email log'
         verbose_name_plural = 'Email logs'
 
+
+
+class SyncRun(models.Model):
+    """One Cyberlogic sync, run in the background by django-q (see SyncRunService)."""
+    KIND_CHOICES = [
+        ('pickup_groups', 'Pickup groups'),
+        ('pickup_points', 'Pickup points'),
+        ('hotels', 'Hotels'),
+        ('providers', 'Providers'),
+        ('excursions', 'Excursions'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    triggered_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='sync_runs',
+        help_text='Empty for scheduled runs',
+    )
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    removed_count = models.PositiveIntegerField(default=0, help_text='Local rows no longer in the Cyberlogic feed')
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} sync #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status not in self.ACTIVE_STATUSES
+
+    @property
+    def duration(self):
+        if not self.started_at:
+            return None
+        return (self.finished_at or timezone.now()) - self.started_at
+
+    @property
+    def progress_percent(self):
+        if self.is_finished:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, round(self.processed * 100 / self.total))
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'status']),
+        ]
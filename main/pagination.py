@@ -0,0 +1,187 @@
+"""
+Keyset (cursor) pagination for the admin list views.
+
+Django's Paginator runs a full COUNT(*) and an OFFSET that grows with the page number.
+KeysetPaginator instead seeks past the last row of the current page using the
+ordering columns, so every page costs the same regardless of depth, and only
+offers a capped (approximate) total when a template asks for it.
+
+Usage:
+    page_obj = KeysetPaginator(bookings, 15, ordering=('-id',)).get_page_from_request(request)
+"""
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e))
+    if not isinstance(values, list):
+        raise InvalidCursor('Cursor must encode a list')
+    return values
+
+
+class KeysetPage:
+    """One page of results; iterable like Django's Page and exposing next/previous query strings."""
+
+    def __init__(self, paginator, object_list, has_next, has_previous, query_params):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self._query_params = query_params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    def _querystring(self, cursor_param, row):
+        params = self._query_params.copy() if self._query_params is not None else None
+        if params is None:
+            from django.http import QueryDict
+            params = QueryDict(mutable=True)
+        for name in (self.paginator.after_param, self.paginator.before_param, 'page'):
+            params.pop(name, None)
+        params[cursor_param] = encode_cursor(self.paginator.row_key(row))
+        return params.urlencode()
+
+    @property
+    def next_querystring(self):
+        if not self.has_next_page or not self.object_list:
+            return ''
+        return self._querystring(self.paginator.after_param, self.object_list[-1])
+
+    @property
+    def previous_querystring(self):
+        if not self.has_previous_page or not self.object_list:
+            return ''
+        return self._querystring(self.paginator.before_param, self.object_list[0])
+
+    @property
+    def first_querystring(self):
+        params = self._query_params.copy() if self._query_params is not None else None
+        if params is None:
+            return ''
+        for name in (self.paginator.after_param, self.paginator.before_param, 'page'):
+            params.pop(name, None)
+        return params.urlencode()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on its ordering columns.
+
+    `ordering` must end in a unique column (normally 'id' / '-id') so the key is total.
+    Columns may be annotations; they must not be NULL (wrap nullable ones in Coalesce).
+    """
+
+    after_param = 'after'
+    before_param = 'before'
+    approximate_count_limit = 1000
+
+    def __init__(self, queryset, per_page, ordering=('-id',)):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [field.lstrip('-') for field in self.ordering]
+        self.descending = [field.startswith('-') for field in self.ordering]
+
+    def row_key(self, row):
+        return [self._value(row, field) for field in self.fields]
+
+    @staticmethod
+    def _value(row, field):
+        value = row
+        for part in field.split('__'):
+            value = getattr(value, part)
+        if hasattr(value, 'pk'):
+            value = value.pk
+        return value
+
+    def _seek_filter(self, values, forward):
+        """(a, b, c) > (x, y, z) expanded into OR-ed prefixes, honouring each column's direction."""
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            prefix = Q(**{f: values[i] for i, f in enumerate(self.fields[:index])})
+            # Moving forward along a descending column means going to smaller values
+            lookup = 'lt' if self.descending[index] == forward else 'gt'
+            condition |= prefix & Q(**{f'{field}__{lookup}': values[index]})
+        return condition
+
+    def _order_by(self, forward):
+        expressions = []
+        for field, descending in zip(self.fields, self.descending):
+            if descending == forward:
+                expressions.append(F(field).desc())
+            else:
+                expressions.append(F(field).asc())
+        return expressions
+
+    def get_page(self, after=None, before=None, query_params=None):
+        """Return the page following cursor `after`, the one preceding `before`, or the first page."""
+        forward = before is None
+        cursor = after if forward else before
+        queryset = self.queryset
+        if cursor:
+            try:
+                values = decode_cursor(cursor)
+            except InvalidCursor:
+                values = None
+            if values is not None and len(values) == len(self.fields):
+                queryset = queryset.filter(self._seek_filter(values, forward))
+            else:
+                cursor = None
+
+        rows = list(queryset.order_by(*self._order_by(forward))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if forward:
+            has_next, has_previous = has_more, bool(cursor)
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        return KeysetPage(self, rows, has_next, has_previous, query_params)
+
+    def get_page_from_request(self, request):
+        return self.get_page(
+            after=request.GET.get(self.after_param) or None,
+            before=request.GET.get(self.before_param) or None,
+            query_params=request.GET,
+        )
+
+    @cached_property
+    def approximate_count(self):
+        """Row count capped at approximate_count_limit + 1 (COUNT over a LIMITed subquery)."""
+        return self.queryset.order_by()[:self.approximate_count_limit + 1].count()
+
+    @property
+    def count_is_capped(self):
+        return self.approximate_count > self.approximate_count_limit
@@ -16,6 +16,19 @@ SCHEDULES = [
         "cron": "5 2 * * *",
         "command_kwargs": {},
     },
+    {
+        "name": "release_expired_seat_holds",
+        "command": "release_expired_seat_holds",
+        "cron": "* * * * *",
+        "command_kwargs": {},
+    },
+    {
+        # Keeps admin_dashboard rendering from a warm snapshot
+        "name": "refresh_dashboard_snapshot",
+        "command": "refresh_dashboard_snapshot",
+        "cron": "* * * * *",
+        "command_kwargs": {},
+    },
     {
         "name": "expire_referral_codes",
         "command": "expire_referral_codes",
@@ -34,6 +47,41 @@ SCHEDULES = [
         "cron": "20 2 * * *",
         "command_kwargs": {},
     },
+    {
+        # Runs after the expiry jobs, whose bulk updates bypass the listing signals
+        "name": "rebuild_excursion_listings",
+        "command": "rebuild_excursion_listings",
+        "cron": "30 2 * * *",
+        "command_kwargs": {},
+    },
+    {
+        # Bulk booking updates (expiry jobs, admin bulk actions) bypass the stats signals
+        "name": "rebuild_referral_stats",
+        "command": "rebuild_referral_stats",
+        "cron": "35 2 * * *",
+        "command_kwargs": {},
+    },
+    {
+        # Nightly Cyberlogic sync of pickup groups/points, hotels, providers and excursions
+        "name": "sync_reference_data",
+        "command": "sync_reference_data",
+        "cron": "15 3 * * *",
+        "command_kwargs": {},
+    },
+    {
+        # Heals occupancy cells after bulk AvailabilityDays updates that bypass OccupancyService
+        "name": "rebuild_excursion_occupancy",
+        "command": "rebuild_excursion_occupancy",
+        "cron": "50 2 * * *",
+        "command_kwargs": {},
+    },
+    {
+        # Re-aggregates booking days marked dirty by the Booking signals
+        "name": "refresh_revenue_facts",
+        "command": "refresh_revenue_facts",
+        "cron": "*/10 * * * *",
+        "command_kwargs": {},
+    },
     {
         "name": "notify_groups_tomorrow",
         "command": "notify_groups_tomorrow",
@@ -1,13 +1,19 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete, m2m_changed, post_migrate
 from django.db import transaction
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Feedback, Excursion, ExcursionImage, ExcursionAvailability, Reservation, UserProfile, Group, ReferralCode
+from .models import (
+    Feedback, Excursion, ExcursionImage, ExcursionAvailability, AvailabilityDays, Reservation, UserProfile,
+    Group, ReferralCode, Region, PickupPoint, Category, Tag, Booking,
+)
 import os
 import shutil
 import logging
-from main.utils import EmailService, EmailBuilder
+from main.utils import (
+    EmailService, EmailBuilder, ExcursionService, ExcursionListingService, ExcursionSearchService, RevenueFactService,
+    AnalyticsCacheService, ReferralStatsService, OccupancyService, VoucherService,
+)
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -330,6 +336,13 @@ def detect_departure_time_change(sender, instance, **kwargs):
         pass
 
 
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def forget_cached_voucher_lookup(sender, instance, **kwargs):
+    """Drop the cached voucher lookup so status and pickup changes apply immediately."""
+    VoucherService.forget(instance.voucher_id)
+
+
 @receiver(post_save, sender=UserProfile)
 def update_reservation_on_user_profile_save(sender, instance, created, **kwargs):
     """
@@ -483,3 +496,225 @@ def check_all_expired_referral_codes():
     return count
 
 
+# ----- Availability snapshot invalidation -----
+
+@receiver(post_save, sender=ExcursionAvailability)
+@receiver(post_delete, sender=ExcursionAvailability)
+def invalidate_snapshot_on_availability_change(sender, instance, **kwargs):
+    """Drop the cached availability snapshot of the excursion this availability belongs to."""
+    if instance.excursion_id:
+        ExcursionService.invalidate_availability_snapshot(instance.excursion_id)
+
+
+@receiver(post_save, sender=AvailabilityDays)
+@receiver(post_delete, sender=AvailabilityDays)
+def invalidate_snapshot_on_availability_day_change(sender, instance, **kwargs):
+    """Days added, removed or re-activated change the selectable dates of the excursion."""
+    if not instance.excursion_availability_id:
+        return
+    excursion_id = ExcursionAvailability.objects.filter(
+        pk=instance.excursion_availability_id
+    ).values_list('excursion_id', flat=True).first()
+    if excursion_id:
+        ExcursionService.invalidate_availability_snapshot(excursion_id)
+
+
+@receiver(m2m_changed, sender=ExcursionAvailability.regions.through)
+@receiver(m2m_changed, sender=ExcursionAvailability.pickup_points.through)
+def invalidate_snapshot_on_availability_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Regions or pickup points attached to an availability changed."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        if instance.excursion_id:
+            ExcursionService.invalidate_availability_snapshot(instance.excursion_id)
+        return
+    # Changed from the region/pickup point side; pk_set holds availability ids
+    # (it is None on clear, in which case every excursion may be affected)
+    if pk_set is None:
+        ExcursionService.invalidate_availability_snapshot()
+        return
+    excursion_ids = set(
+        ExcursionAvailability.objects.filter(pk__in=pk_set).values_list('excursion_id', flat=True)
+    )
+    for excursion_id in excursion_ids:
+        if excursion_id:
+            ExcursionService.invalidate_availability_snapshot(excursion_id)
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=PickupPoint)
+@receiver(post_delete, sender=PickupPoint)
+def invalidate_snapshots_on_location_change(sender, instance, **kwargs):
+    """Region and pickup point names/ordering are embedded in every snapshot."""
+    ExcursionService.invalidate_availability_snapshot()
+
+
+# ----- Excursion listing read model -----
+
+@receiver(post_save, sender=Excursion)
+def refresh_listing_on_excursion_save(sender, instance, **kwargs):
+    ExcursionListingService.schedule_refresh(instance.pk)
+
+
+@receiver(post_delete, sender=Excursion)
+def remove_excursion_from_search_index(sender, instance, **kwargs):
+    ExcursionSearchService.remove(instance.pk)
+
+
+@receiver(m2m_changed, sender=Excursion.category.through)
+@receiver(m2m_changed, sender=Excursion.tags.through)
+def refresh_listing_on_excursion_taxonomy_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Categories or tags of an excursion changed (from either side of the relation)."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ExcursionListingService.schedule_refresh(instance.pk)
+    elif pk_set:
+        for excursion_id in pk_set:
+            ExcursionListingService.schedule_refresh(excursion_id)
+
+
+@receiver(post_save, sender=ExcursionAvailability)
+@receiver(post_delete, sender=ExcursionAvailability)
+def refresh_listing_on_availability_change(sender, instance, **kwargs):
+    ExcursionListingService.schedule_refresh(instance.excursion_id)
+
+
+@receiver(m2m_changed, sender=ExcursionAvailability.regions.through)
+def refresh_listing_on_availability_regions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        ExcursionListingService.schedule_refresh(instance.excursion_id)
+    elif pk_set:
+        excursion_ids = set(
+            ExcursionAvailability.objects.filter(pk__in=pk_set).values_list('excursion_id', flat=True)
+        )
+        for excursion_id in excursion_ids:
+            ExcursionListingService.schedule_refresh(excursion_id)
+
+
+@receiver(post_save, sender=AvailabilityDays)
+@receiver(post_delete, sender=AvailabilityDays)
+def refresh_listing_on_availability_day_change(sender, instance, **kwargs):
+    """Keeps next_available_date current when single days are edited."""
+    if not instance.excursion_availability_id:
+        return
+    excursion_id = ExcursionAvailability.objects.filter(
+        pk=instance.excursion_availability_id
+    ).values_list('excursion_id', flat=True).first()
+    ExcursionListingService.schedule_refresh(excursion_id)
+    OccupancyService.schedule_refresh_for_day(instance.excursion_availability_id, instance.date_day)
+
+
+@receiver(post_delete, sender=ExcursionAvailability)
+def refresh_occupancy_on_availability_delete(sender, instance, **kwargs):
+    """Cascaded day deletes can't resolve the excursion any more, so refresh it as a whole."""
+    OccupancyService.schedule_refresh(instance.excursion_id, instance.start_date, instance.end_date)
+
+
+@receiver(post_save, sender=Region)
+@receiver(pre_delete, sender=Region)
+def refresh_listings_on_region_change(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+    excursion_ids = set(instance.availabilities.values_list('excursion_id', flat=True))
+    for excursion_id in excursion_ids:
+        ExcursionListingService.schedule_refresh(excursion_id)
+
+
+@receiver(post_migrate)
+def reset_search_backend(sender, **kwargs):
+    """Migrations may create or drop the FTS table; detect the search backend again."""
+    ExcursionSearchService.reset_backend()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def refresh_listings_on_taxonomy_rename(sender, instance, created, **kwargs):
+    if created:
+        return
+    for excursion_id in instance.excursions.values_list('pk', flat=True):
+        ExcursionListingService.schedule_refresh(excursion_id)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Category)
+def refresh_listings_on_taxonomy_delete(sender, instance, **kwargs):
+    """M2M rows vanish silently on delete, so queue a refresh for the affected excursions."""
+    for excursion_id in list(instance.excursions.values_list('pk', flat=True)):
+        ExcursionListingService.schedule_refresh(excursion_id)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def mark_revenue_day_dirty(sender, instance, **kwargs):
+    """Any booking change may move revenue in or out of its day; serve that day live until refreshed."""
+    if instance.created_at:
+        from django.utils import timezone
+        RevenueFactService.mark_dirty(timezone.localdate(instance.created_at))
+
+
+# Booking fields the analytics result caches and referral code stats depend on
+# (excursion_id and user_id drive the per-excursion, provider and rep breakdowns)
+ANALYTICS_BOOKING_FIELDS = (
+    'payment_status', 'total_price', 'price', 'partial_paid', 'partial_paid_method',
+    'referral_discount_amount', 'jcc_order_id', 'date', 'excursion_availability_id', 'referral_code_id',
+    'excursion_id', 'user_id',
+)
+
+
+@receiver(pre_save, sender=Booking)
+def track_booking_analytics_fields(sender, instance, **kwargs):
+    """Track the analytics-relevant values before save to detect changes."""
+    instance._old_analytics_values = None
+    if instance.pk:
+        instance._old_analytics_values = Booking.objects.filter(pk=instance.pk).values(*ANALYTICS_BOOKING_FIELDS).first()
+
+
+@receiver(post_save, sender=Booking)
+def invalidate_analytics_on_booking_save(sender, instance, created, **kwargs):
+    old_values = getattr(instance, '_old_analytics_values', None)
+    if old_values is None:
+        # New booking: only completed ones count towards the dashboards
+        if instance.payment_status != 'completed':
+            return
+    elif all(old_values[field] == getattr(instance, field) for field in ANALYTICS_BOOKING_FIELDS):
+        return
+    invalidate_analytics_for_booking(instance, old_values)
+
+
+@receiver(post_delete, sender=Booking)
+def invalidate_analytics_on_booking_delete(sender, instance, **kwargs):
+    if instance.payment_status == 'completed':
+        invalidate_analytics_for_booking(instance)
+
+
+def invalidate_analytics_for_booking(booking, old_values=None):
+    from django.utils import timezone
+    if booking.created_at:
+        AnalyticsCacheService.invalidate_day(AnalyticsCacheService.CREATED, timezone.localdate(booking.created_at))
+    AnalyticsCacheService.invalidate_day(AnalyticsCacheService.SERVICE_DATE, booking.date)
+    if old_values and old_values['date'] != booking.date:
+        AnalyticsCacheService.invalidate_day(AnalyticsCacheService.SERVICE_DATE, old_values['date'])
+
+
+@receiver(post_save, sender=Booking)
+def refresh_referral_stats_on_booking_save(sender, instance, created, **kwargs):
+    old_values = getattr(instance, '_old_analytics_values', None)
+    old_code_id = old_values['referral_code_id'] if old_values else None
+    if not instance.referral_code_id and not old_code_id:
+        return
+    if old_values and all(
+        old_values[field] == getattr(instance, field)
+        for field in ('referral_code_id', 'total_price', 'payment_status')
+    ):
+        return
+    ReferralStatsService.schedule_refresh(instance.referral_code_id, old_code_id)
+
+
+@receiver(post_delete, sender=Booking)
+def refresh_referral_stats_on_booking_delete(sender, instance, **kwargs):
+    ReferralStatsService.schedule_refresh(instance.referral_code_id)
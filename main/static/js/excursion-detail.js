@@ -156,9 +156,11 @@ function initExcursionDetailPage() {
         const today = new Date();
         today.setHours(0, 0, 0, 0);
 
+        // Skip past and sold-out days (remaining is omitted by older payloads)
         const futureAvailableDates = availableDates.filter((item) => {
             const itemDate = new Date(item.date);
-            return itemDate >= today;
+            const hasSeats = item.remaining === undefined || item.remaining > 0;
+            return itemDate >= today && hasSeats;
         });
 
         if (picker) {
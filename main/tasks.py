@@ -3,7 +3,7 @@ Tasks for django-q. Run the cluster with: python manage.py qcluster
 """
 import logging
 from django.core.management import call_command
-from .utils import EmailService
+from .utils import EmailService, DashboardSnapshotService, SyncRunService
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,19 @@ def run_management_command(command_name, **kwargs):
     call_command(command_name, **kwargs)
     logger.info("Finished management command %s", command_name)
 
+def refresh_dashboard_snapshot_task():
+    """Background task: recompute the admin dashboard snapshot (queued by DashboardSnapshotService)."""
+    DashboardSnapshotService.refresh()
+
+def run_sync_task(run_id, prune=False, force=False):
+    """Background task: execute a queued SyncRun (queued by SyncRunService.start)."""
+    from .models import SyncRun
+    run = SyncRun.objects.filter(pk=run_id, status='queued').first()
+    if run is None:
+        logger.warning("Sync run %s is missing or already started; skipping", run_id)
+        return
+    SyncRunService.execute(run, prune=prune, force=force)
+
 def send_dynamic_email_task(
     subject,
     recipient_list,
@@ -0,0 +1,311 @@
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .cyber_api import CyberlogicClient, CyberlogicError, CyberlogicUnavailable
+from .models import AvailabilityDays, Booking, Excursion, ExcursionAvailability, PickupGroup, SeatHold
+from .utils import AvailabilityDaysService, BookingService, ExcursionAnalyticsService
+
+
+def create_day(capacity=4, day=date(2026, 6, 1)):
+    """One excursion availability with a single AvailabilityDays row."""
+    excursion = Excursion.objects.create(title='Seats')
+    availability = ExcursionAvailability.objects.create(
+        excursion=excursion, start_date=day, end_date=day, max_guests=capacity,
+    )
+    return AvailabilityDays.objects.create(excursion_availability=availability, date_day=day, capacity=capacity)
+
+
+class ExcursionAnalyticsQueryCountTests(TestCase):
+    """compute_analytics_data must not issue queries per availability or per day."""
+
+    # Day capacities, availabilities (+ pickup groups prefetch) and grouped bookings
+    EXPECTED_QUERIES = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.start = date(2026, 1, 1)
+        cls.end = cls.start + timedelta(days=89)
+        group = PickupGroup.objects.create(name='North', code='N')
+        for index in range(3):
+            excursion = Excursion.objects.create(title=f'Excursion {index}')
+            availability = ExcursionAvailability.objects.create(
+                excursion=excursion, start_date=cls.start, end_date=cls.end, max_guests=20,
+            )
+            availability.pickup_groups.add(group)
+            AvailabilityDays.objects.bulk_create([
+                AvailabilityDays(excursion_availability=availability, date_day=cls.start + timedelta(days=offset), capacity=20)
+                for offset in range(90)
+            ])
+            Booking.objects.bulk_create([
+                Booking(excursion_availability=availability, excursion=excursion, total_adults=2,
+                        date=cls.start + timedelta(days=offset), payment_status='completed')
+                for offset in range(0, 90, 3)
+            ])
+
+    def test_query_count_does_not_grow_with_the_range(self):
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            week = ExcursionAnalyticsService.compute_analytics_data(self.start, self.start + timedelta(days=6))
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            quarter = ExcursionAnalyticsService.compute_analytics_data(self.start, self.end)
+
+        self.assertEqual(len(week['date_range']), 7)
+        self.assertEqual(len(quarter['date_range']), 90)
+        self.assertEqual(len(quarter['availabilities']), 3)
+        first_day = quarter['availabilities'][0]['date_data'][self.start]
+        self.assertEqual(first_day, {'bookings': 1, 'capacity': 20})
+
+
+class SeatClaimTests(TestCase):
+    """claim_seats and the AvailabilityDays capacity constraint never let a day oversell."""
+
+    def setUp(self):
+        self.day = create_day(capacity=5)
+
+    def claim(self, count):
+        return BookingService.claim_seats(self.day.excursion_availability_id, self.day.date_day, count)
+
+    def test_claims_stop_at_capacity(self):
+        self.assertTrue(self.claim(3))
+        self.assertTrue(self.claim(2))
+        self.assertFalse(self.claim(1))
+        self.day.refresh_from_db()
+        self.assertEqual(self.day.booked_guests, 5)
+
+    def test_claim_larger_than_remaining_seats_fails_whole(self):
+        self.assertTrue(self.claim(4))
+        self.assertFalse(self.claim(2))
+        self.day.refresh_from_db()
+        self.assertEqual(self.day.booked_guests, 4)
+        self.assertEqual(self.day.remaining_seats, 1)
+
+    def test_held_seats_count_against_capacity(self):
+        AvailabilityDays.objects.filter(pk=self.day.pk).update(held_guests=3)
+        self.assertFalse(self.claim(3))
+        self.assertTrue(self.claim(2))
+        self.day.refresh_from_db()
+        self.assertLessEqual(self.day.booked_guests + self.day.held_guests, self.day.capacity)
+
+    def test_constraint_rejects_direct_over_capacity_update(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AvailabilityDays.objects.filter(pk=self.day.pk).update(booked_guests=F('capacity') + 1)
+        self.day.refresh_from_db()
+        self.assertEqual(self.day.booked_guests, 0)
+
+
+class SeatHoldLifecycleTests(TestCase):
+    """Seat holds of pending bookings: hold, convert on payment, release and expiry sweep."""
+
+    def setUp(self):
+        self.day = create_day(capacity=5)
+
+    def book(self, guests):
+        return Booking.objects.create(
+            excursion_availability=self.day.excursion_availability, excursion=self.day.excursion_availability.excursion,
+            date=self.day.date_day, total_adults=guests,
+        )
+
+    def remaining(self):
+        return BookingService.get_remaining_seats(self.day.excursion_availability, self.day.date_day)
+
+    def test_hold_reduces_remaining_seats(self):
+        hold = BookingService.hold_seats(self.book(3))
+        self.assertEqual(hold.seats, 3)
+        self.assertEqual(hold.status, 'active')
+        self.assertEqual(self.remaining(), 2)
+
+    def test_over_capacity_hold_fails(self):
+        BookingService.hold_seats(self.book(4))
+        self.assertIsNone(BookingService.hold_seats(self.book(2)))
+        self.day.refresh_from_db()
+        self.assertEqual(self.day.held_guests, 4)
+        self.assertEqual(SeatHold.objects.count(), 1)
+
+    def test_convert_moves_held_to_booked_once(self):
+        booking = self.book(3)
+        BookingService.hold_seats(booking)
+        self.assertTrue(BookingService._convert_hold(booking))
+        self.assertFalse(BookingService._convert_hold(booking))
+        self.day.refresh_from_db()
+        self.assertEqual((self.day.booked_guests, self.day.held_guests), (3, 0))
+        self.assertEqual(booking.seat_holds.get().status, 'converted')
+
+    def test_payment_completion_converts_the_hold(self):
+        booking = self.book(2)
+        BookingService.hold_seats(booking)
+        self.assertTrue(BookingService.increment_booked_guests_for_booking(booking))
+        self.day.refresh_from_db()
+        self.assertEqual((self.day.booked_guests, self.day.held_guests), (2, 0))
+        self.assertEqual(self.remaining(), 3)
+
+    def test_release_after_failed_payment_frees_the_seats(self):
+        booking = self.book(3)
+        BookingService.hold_seats(booking)
+        BookingService.release_hold_for_booking(booking)
+        BookingService.release_hold_for_booking(booking)
+        self.day.refresh_from_db()
+        self.assertEqual(self.day.held_guests, 0)
+        self.assertEqual(booking.seat_holds.get().status, 'released')
+        self.assertEqual(self.remaining(), 5)
+
+    def test_sweep_releases_only_expired_holds(self):
+        expired, live = self.book(2), self.book(1)
+        BookingService.hold_seats(expired)
+        BookingService.hold_seats(live)
+        SeatHold.objects.filter(booking=expired).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(BookingService.release_expired_holds(), 1)
+        self.assertEqual(BookingService.release_expired_holds(), 0)
+        self.day.refresh_from_db()
+        self.assertEqual(self.day.held_guests, 1)
+        self.assertEqual(expired.seat_holds.get().status, 'released')
+        self.assertEqual(live.seat_holds.get().status, 'active')
+
+    def test_ensure_hold_retakes_seats_after_release(self):
+        booking = self.book(2)
+        BookingService.hold_seats(booking)
+        self.assertTrue(BookingService.ensure_hold(booking))
+        self.assertEqual(SeatHold.objects.filter(booking=booking).count(), 1)
+        BookingService.release_hold_for_booking(booking)
+        self.assertTrue(BookingService.ensure_hold(booking))
+        self.assertEqual(SeatHold.objects.filter(booking=booking, status='active').count(), 1)
+        self.assertEqual(self.remaining(), 3)
+
+
+class AvailabilityDaysSyncTests(TestCase):
+    """Editing an availability's range keeps the seat counts of days that have bookings."""
+
+    EVERY_DAY = range(7)
+
+    def setUp(self):
+        self.start = date(2026, 6, 1)
+        excursion = Excursion.objects.create(title='Sync')
+        self.availability = ExcursionAvailability.objects.create(
+            excursion=excursion, start_date=self.start, end_date=self.start + timedelta(days=9), max_guests=10,
+        )
+        AvailabilityDaysService.sync_days(self.availability, self.EVERY_DAY)
+
+    def days(self):
+        return AvailabilityDays.objects.filter(excursion_availability=self.availability)
+
+    def shrink_to(self, last_day):
+        self.availability.end_date = last_day
+        self.availability.save()
+        return AvailabilityDaysService.sync_days(self.availability, self.EVERY_DAY)
+
+    def test_shrinking_over_booked_days_is_refused(self):
+        booked_day = self.start + timedelta(days=8)
+        self.assertTrue(BookingService.claim_seats(self.availability.pk, booked_day, 3))
+
+        with self.assertRaises(ValidationError):
+            self.shrink_to(self.start + timedelta(days=4))
+
+        self.assertEqual(self.days().count(), 10)
+        self.assertEqual(self.days().get(date_day=booked_day).booked_guests, 3)
+
+    def test_shrinking_over_held_days_is_refused(self):
+        self.days().filter(date_day=self.start + timedelta(days=9)).update(held_guests=2)
+        with self.assertRaises(ValidationError):
+            self.shrink_to(self.start + timedelta(days=4))
+        self.assertEqual(self.days().count(), 10)
+
+    def test_shrinking_keeps_counts_on_remaining_days(self):
+        self.assertTrue(BookingService.claim_seats(self.availability.pk, self.start, 4))
+        counts = self.shrink_to(self.start + timedelta(days=4))
+
+        self.assertEqual(counts['deleted'], 5)
+        self.assertEqual(self.days().count(), 5)
+        self.assertEqual(self.days().get(date_day=self.start).booked_guests, 4)
+
+
+class FakeCyberlogic(BaseHTTPRequestHandler):
+    """Local stand-in for the Cyberlogic API; behaviour is driven by class attributes set per test."""
+
+    protocol_version = 'HTTP/1.1'
+    token_requests = 0
+    valid_token = None
+    failing = False
+    hits = 0
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        cls = type(self)
+        cls.token_requests += 1
+        cls.valid_token = f'token-{cls.token_requests}'
+        self.reply(200, {'access_token': cls.valid_token, 'expires_in': 3600})
+
+    def do_GET(self):
+        cls = type(self)
+        cls.hits += 1
+        if self.path == '/flaky' and cls.failing:
+            return self.reply(503, {'ErrorMessage': 'down'})
+        if self.headers.get('Authorization') != f'Bearer {cls.valid_token}':
+            return self.reply(401, {'Message': 'Authorization has been denied'})
+        self.reply(200, {'Data': [], 'path': self.path})
+
+
+class CyberlogicClientTests(SimpleTestCase):
+    """CyberlogicClient against a fake API on localhost: token cache, 401 refresh, circuit breaker."""
+
+    def setUp(self):
+        FakeCyberlogic.token_requests = FakeCyberlogic.hits = 0
+        FakeCyberlogic.valid_token = None
+        FakeCyberlogic.failing = False
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeCyberlogic)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = CyberlogicClient(
+            base_url=f'http://127.0.0.1:{self.server.server_port}',
+            retries=0, breaker_threshold=3, breaker_reset_seconds=0.2,
+        )
+
+    def test_token_is_fetched_once_across_calls(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get('/excursionsList')['path'], '/excursionsList')
+        self.assertEqual(FakeCyberlogic.token_requests, 1)
+
+    def test_401_refreshes_the_token_once(self):
+        self.client.get('/hotels')
+        FakeCyberlogic.valid_token = 'rotated-server-side'
+        self.assertEqual(self.client.get('/hotels')['path'], '/hotels')
+        self.assertEqual(FakeCyberlogic.token_requests, 2)
+
+    def test_breaker_opens_after_repeated_5xx_and_half_opens_after_reset(self):
+        self.client.get('/flaky')
+        FakeCyberlogic.failing = True
+        for _ in range(3):
+            with self.assertRaises(CyberlogicError):
+                self.client.get('/flaky')
+        hits = FakeCyberlogic.hits
+
+        # Open: rejected without calling the API
+        with self.assertRaises(CyberlogicUnavailable):
+            self.client.get('/flaky')
+        self.assertEqual(FakeCyberlogic.hits, hits)
+
+        # Half-open after reset_seconds: one trial call goes through and closes the breaker
+        time.sleep(0.25)
+        FakeCyberlogic.failing = False
+        self.assertEqual(self.client.get('/flaky')['path'], '/flaky')
+        self.assertEqual(FakeCyberlogic.hits, hits + 1)
+        self.assertIsNone(self.client.breaker.opened_at)
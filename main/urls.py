@@ -25,6 +25,7 @@ urlpatterns = [
     # Booking URLs
     # path('availability/<int:availability_pk>/book/', views.booking_create, name='booking_create'),
     path('bookings/', views.bookings_list, name='bookings_list'),
+    path('bookings/export/', views.bookings_export, name='bookings_export'),
     path('bookings/<int:pk>/', views.booking_detail, name='booking_detail'),
     path('bookings/<int:pk>/confirm-pickup-time/', views.confirm_pickup_time, name='confirm_pickup_time'),
     path('bookings/<int:pk>/delete/', views.booking_delete, name='delete_booking'),
@@ -60,7 +61,10 @@ urlpatterns = [
     path('profile/admin/<int:pk>/', views.admin_dashboard, name='admin_dashboard'),
     path('profile/admin/excursions/', views.admin_excursions, name='admin_excursions'),
     path('profile/admin/excursion-analytics/', views.excursion_analytics, name='excursion_analytics'),
+    path('profile/admin/occupancy/', views.occupancy_heatmap, name='occupancy_heatmap'),
     path('profile/admin/revenue-dashboard/', views.revenue_dashboard, name='revenue_dashboard'),
+    path('profile/admin/revenue-dashboard/series/', views.revenue_series, name='revenue_series'),
+    path('profile/admin/revenue-dashboard/export/', views.revenue_export, name='revenue_export'),
     path('providers_list/', views.providers_list, name='providers_list'),
     path('manage_providers/', views.manage_providers, name='manage_providers'),
     path('reps_list/', views.reps_list, name='reps_list'),
@@ -95,6 +99,7 @@ urlpatterns = [
     path('sync_hotels/', views.sync_hotels, name='sync_hotels'),
     path('sync_excursions/', views.sync_excursions, name='sync_excursions'),
     path('sync_providers/', views.sync_providers, name='sync_providers'),
+    path('sync_runs/<int:pk>/', views.sync_run_status, name='sync_run_status'),
     # path('sync_excursion_availabilities/', views.sync_excursion_availabilities, name='sync_excursion_availabilities'),
 
     # Availability URLs
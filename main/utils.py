@@ -1,6 +1,5 @@
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import Exists, OuterRef
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from .models import (
@@ -9,6 +8,7 @@ from .models import (
     GroupPickupPoint,
 )
 from .cyber_api import get_reservation
+from .db_routers import using_replica, replica_alias
 from datetime import datetime, date, timedelta
 import requests
 import logging
@@ -24,68 +24,50 @@ def _format_hours_value(hours):
     return f"{hours:.1f}".rstrip('0').rstrip('.')
 
 
-def attach_excursion_list_data(excursions):
-    today = timezone.now().date()
-    for excursion in excursions:
-        active_availabilities = [
-            availability for availability in excursion.availabilities.all()
-            if (
-                availability.status == 'active'
-                and availability.is_active
-                and availability.end_date >= today
-            )
-        ]
+def cache_generation(key):
+    """Current value of a cache generation counter (0 when unset or evicted)."""
+    from django.core.cache import cache
+    return cache.get(key) or 0
 
-        region_names = []
-        region_set = set()
-        for availability in active_availabilities:
-            for region in availability.regions.all():
-                if region.name not in region_set:
-                    region_set.add(region.name)
-                    region_names.append(region.name)
 
-        durations = []
-        for availability in active_availabilities:
-            if availability.start_time and availability.end_time:
-                start_dt = datetime.combine(date.today(), availability.start_time)
-                end_dt = datetime.combine(date.today(), availability.end_time)
-                if end_dt < start_dt:
-                    end_dt += timedelta(days=1)
-                durations.append((end_dt - start_dt).total_seconds() / 3600)
-
-        duration_range = None
-        if durations:
-            min_hours = min(durations)
-            max_hours = max(durations)
-            min_label = _format_hours_value(min_hours)
-            max_label = _format_hours_value(max_hours)
-            if min_label == max_label:
-                duration_range = f"{min_label} hours"
-            else:
-                duration_range = f"{min_label}-{max_label} hours"
+def bump_cache_generation(key):
+    """Increment a cache generation counter, orphaning every key built from the old value."""
+    from django.core.cache import cache
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
 
-        excursion.active_regions = region_names
-        excursion.duration_range = duration_range
 
-    return excursions
+def _active_availabilities(excursion, today):
+    """Active, non-expired availabilities of an excursion (expects `availabilities` prefetched)."""
+    return [
+        availability for availability in excursion.availabilities.all()
+        if (
+            availability.status == 'active'
+            and availability.is_active
+            and availability.end_date >= today
+        )
+    ]
 
 
-def excursions_with_active_availability():
-    """
-    Same rule as Excursion.has_active_availability(): at least one ExcursionAvailability
-    with status 'active', is_active True, and end_date >= today.
+def _duration_range_label(active_availabilities):
+    durations = []
+    for availability in active_availabilities:
+        if availability.start_time and availability.end_time:
+            start_dt = datetime.combine(date.today(), availability.start_time)
+            end_dt = datetime.combine(date.today(), availability.end_time)
+            if end_dt < start_dt:
+                end_dt += timedelta(days=1)
+            durations.append((end_dt - start_dt).total_seconds() / 3600)
 
-    Implemented with EXISTS (not Excursion.status + JOINs) so listings stay correct
-    if excursion.status is stale, and without duplicate rows from deep joins.
-    """
-    today = timezone.now().date()
-    active_window = ExcursionAvailability.objects.filter(
-        excursion_id=OuterRef('pk'),
-        status='active',
-        is_active=True,
-        end_date__gte=today,
-    )
-    return Excursion.objects.filter(Exists(active_window))
+    if not durations:
+        return None
+    min_label = _format_hours_value(min(durations))
+    max_label = _format_hours_value(max(durations))
+    if min_label == max_label:
+        return f"{min_label} hours"
+    return f"{min_label}-{max_label} hours"
 
 
 class AvailabilityValidationService:
@@ -265,6 +247,270 @@ class AvailabilityValidationService:
             raise ValidationError('At least one weekday must be selected.')
 
 
+class AvailabilityDaysService:
+    """Service class for keeping AvailabilityDays in line with their ExcursionAvailability."""
+
+    WEEKDAY_NUMBERS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
+
+    @staticmethod
+    def target_dates(start_date, end_date, weekday_numbers):
+        """Return the set of dates in [start_date, end_date] falling on the given weekdays (Mon=0)."""
+        weekday_numbers = set(weekday_numbers)
+        dates = set()
+        current_date = start_date
+        while current_date <= end_date:
+            if current_date.weekday() in weekday_numbers:
+                dates.add(current_date)
+            current_date += timedelta(days=1)
+        return dates
+
+    @staticmethod
+    def sync_days(availability, weekday_numbers=None):
+        """
+        Bring the availability's AvailabilityDays in line with its date range and weekdays.
+
+        Diffs the target calendar against the existing rows: days that disappeared are
+        deleted, new days are bulk-created and kept days get their capacity updated in
+        place, so booked_guests / held_guests on existing days survive an edit.
+
+        Args:
+            availability: ExcursionAvailability instance (saved)
+            weekday_numbers: Iterable of weekday numbers (Mon=0); defaults to availability.weekdays
+
+        Returns:
+            dict: Counts of 'created', 'deleted' and 'updated' days
+
+        Raises:
+            ValidationError: If the edit would remove days that still have booked or held
+                seats (deleting them would drop paid bookings' day and cascade the holds).
+        """
+        from django.db.models import F, Value
+        from django.db.models.functions import Greatest
+
+        if weekday_numbers is None:
+            weekday_numbers = [
+                AvailabilityDaysService.WEEKDAY_NUMBERS[code]
+                for code in availability.weekdays.values_list('code', flat=True)
+                if code in AvailabilityDaysService.WEEKDAY_NUMBERS
+            ]
+        target = AvailabilityDaysService.target_dates(
+            availability.start_date, availability.end_date, weekday_numbers
+        )
+
+        with transaction.atomic():
+            days = AvailabilityDays.objects.filter(excursion_availability=availability)
+            existing, in_use = {}, []
+            for day_date, day_id, booked, held in days.values_list('date_day', 'id', 'booked_guests', 'held_guests'):
+                existing[day_date] = day_id
+                if (booked or held) and day_date not in target:
+                    in_use.append(day_date)
+            if in_use:
+                dates = ', '.join(day_date.strftime('%B %d, %Y') for day_date in sorted(in_use))
+                logger.warning(f'Refused to remove booked/held days of availability #{availability.pk}: {dates}')
+                raise ValidationError(
+                    f'These dates have bookings or seats on hold and cannot be removed: {dates}. '
+                    'Cancel or move those bookings first.'
+                )
+
+            removed_ids = [day_id for day_date, day_id in existing.items() if day_date not in target]
+            if removed_ids:
+                AvailabilityDays.objects.filter(id__in=removed_ids).delete()
+
+            # Capacity never drops below seats already sold or held on that day.
+            updated = 0
+            kept_ids = [day_id for day_date, day_id in existing.items() if day_date in target]
+            if kept_ids:
+                updated = AvailabilityDays.objects.filter(id__in=kept_ids).exclude(
+                    capacity=availability.max_guests
+                ).update(
+                    capacity=Greatest(
+                        Value(availability.max_guests),
+                        F('booked_guests') + F('held_guests'),
+                    )
+                )
+
+            new_days = [
+                AvailabilityDays(
+                    excursion_availability=availability,
+                    date_day=day_date,
+                    capacity=availability.max_guests,
+                )
+                for day_date in sorted(target - set(existing))
+            ]
+            AvailabilityDays.objects.bulk_create(new_days, batch_size=500)
+
+        # bulk_create / update bypass model signals
+        ExcursionService.invalidate_availability_snapshot(availability.excursion_id)
+        ExcursionListingService.schedule_refresh(availability.excursion_id)
+        OccupancyService.schedule_refresh(availability.excursion_id)
+
+        return {'created': len(new_days), 'deleted': len(removed_ids), 'updated': updated}
+
+
+class OccupancyService:
+    """Maintains ExcursionOccupancy (seats per excursion and date) and builds the heatmap from it."""
+
+    # Heatmap colour bands: lower bound of booked / capacity for each level
+    LEVELS = (0, 0.25, 0.5, 0.75, 0.9, 1)
+
+    @staticmethod
+    def load_factor(booked, capacity):
+        from decimal import Decimal
+        if not capacity:
+            return Decimal('0')
+        return (Decimal(booked) / capacity).quantize(Decimal('0.0001'))
+
+    @staticmethod
+    def refresh(excursion_ids=None, start_date=None, end_date=None, dates=None):
+        """
+        Recompute the occupancy cells of the given excursions (all when None), limited to a
+        date range or a list of dates, in one grouped query over AvailabilityDays. Cells
+        whose days are gone are deleted.
+
+        Returns:
+            int: Number of cells written.
+        """
+        from django.db.models import Sum
+        from .models import ExcursionOccupancy
+
+        # Inactive (expired) days stay in, so past dates keep their occupancy
+        days = AvailabilityDays.objects.filter(excursion_availability__isnull=False)
+        cells = ExcursionOccupancy.objects.all()
+        if excursion_ids is not None:
+            excursion_ids = [pk for pk in excursion_ids if pk]
+            days = days.filter(excursion_availability__excursion_id__in=excursion_ids)
+            cells = cells.filter(excursion_id__in=excursion_ids)
+        if start_date:
+            days = days.filter(date_day__gte=start_date)
+            cells = cells.filter(date__gte=start_date)
+        if end_date:
+            days = days.filter(date_day__lte=end_date)
+            cells = cells.filter(date__lte=end_date)
+        if dates is not None:
+            days = days.filter(date_day__in=list(dates))
+            cells = cells.filter(date__in=list(dates))
+
+        rows = [
+            ExcursionOccupancy(
+                excursion_id=row['excursion_availability__excursion_id'],
+                date=row['date_day'],
+                capacity=row['capacity_total'] or 0,
+                booked=row['booked_total'] or 0,
+                held=row['held_total'] or 0,
+                load_factor=OccupancyService.load_factor(row['booked_total'] or 0, row['capacity_total']),
+            )
+            for row in days.values('excursion_availability__excursion_id', 'date_day').annotate(
+                capacity_total=Sum('capacity'),
+                booked_total=Sum('booked_guests'),
+                held_total=Sum('held_guests'),
+            ).order_by()
+        ]
+        with transaction.atomic():
+            ExcursionOccupancy.objects.bulk_create(
+                rows,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['excursion', 'date'],
+                update_fields=['capacity', 'booked', 'held', 'load_factor', 'updated_at'],
+            )
+            live = {(row.excursion_id, row.date) for row in rows}
+            stale_ids = [
+                pk for pk, excursion_id, day in cells.values_list('pk', 'excursion_id', 'date')
+                if (excursion_id, day) not in live
+            ]
+            if stale_ids:
+                ExcursionOccupancy.objects.filter(pk__in=stale_ids).delete()
+        return len(rows)
+
+    @staticmethod
+    def schedule_refresh(excursion_id, start_date=None, end_date=None):
+        """Refresh an excursion's cells (optionally a date range) after the current transaction commits."""
+        if not excursion_id:
+            return
+
+        def _refresh():
+            try:
+                OccupancyService.refresh([excursion_id], start_date, end_date)
+            except Exception as e:
+                logger.error(f"Failed to refresh occupancy for excursion #{excursion_id}: {e}")
+
+        transaction.on_commit(_refresh)
+
+    @staticmethod
+    def schedule_refresh_for_day(availability_id, day):
+        """Refresh the cell holding one availability's day after commit (used by the seat paths)."""
+        if not availability_id or not day:
+            return
+
+        def _refresh():
+            try:
+                excursion_id = ExcursionAvailability.objects.filter(pk=availability_id).values_list(
+                    'excursion_id', flat=True
+                ).first()
+                if excursion_id:
+                    OccupancyService.refresh([excursion_id], dates=[day])
+            except Exception as e:
+                logger.error(f"Failed to refresh occupancy for availability #{availability_id} on {day}: {e}")
+
+        transaction.on_commit(_refresh)
+
+    @staticmethod
+    def schedule_refresh_for_days(availability_day_ids):
+        """Refresh the cells holding the given AvailabilityDays after commit (seat hold sweeps)."""
+        availability_day_ids = list(availability_day_ids)
+        if not availability_day_ids:
+            return
+
+        def _refresh():
+            try:
+                dates_by_excursion = {}
+                for excursion_id, day in AvailabilityDays.objects.filter(pk__in=availability_day_ids).values_list(
+                    'excursion_availability__excursion_id', 'date_day'
+                ):
+                    dates_by_excursion.setdefault(excursion_id, set()).add(day)
+                for excursion_id, dates in dates_by_excursion.items():
+                    OccupancyService.refresh([excursion_id], dates=dates)
+            except Exception as e:
+                logger.error(f"Failed to refresh occupancy for availability days {availability_day_ids}: {e}")
+
+        transaction.on_commit(_refresh)
+
+    @staticmethod
+    def get_heatmap(start_date, end_date, excursion_id=None):
+        """
+        Occupancy matrix for the range from one range scan of ExcursionOccupancy.
+
+        Returns:
+            dict: 'dates' (every day of the range) and 'rows', one per excursion with cells:
+                  [{'excursion_id', 'title', 'cells': [cell dict or None per date]}]
+        """
+        from .models import ExcursionOccupancy
+
+        dates = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        column = {day: index for index, day in enumerate(dates)}
+        cells = ExcursionOccupancy.objects.filter(date__gte=start_date, date__lte=end_date)
+        if excursion_id:
+            cells = cells.filter(excursion_id=excursion_id)
+
+        rows = {}
+        for excursion_id, title, day, capacity, booked, held, load_factor in cells.values_list(
+            'excursion_id', 'excursion__title', 'date', 'capacity', 'booked', 'held', 'load_factor'
+        ).order_by('excursion__title', 'excursion_id', 'date'):
+            row = rows.get(excursion_id)
+            if row is None:
+                row = rows[excursion_id] = {'excursion_id': excursion_id, 'title': title, 'cells': [None] * len(dates)}
+            row['cells'][column[day]] = {
+                'date': day,
+                'capacity': capacity,
+                'booked': booked,
+                'held': held,
+                'load_factor': load_factor,
+                'percent': round(load_factor * 100),
+                'level': sum(1 for bound in OccupancyService.LEVELS[1:] if load_factor >= bound),
+            }
+        return {'dates': dates, 'rows': list(rows.values())}
+
+
 class FeedbackService:
     """Service class for handling feedback operations."""
     
@@ -324,10 +570,210 @@ class BookingService:
                 date_day=selected_date, 
                 excursion_availability=availability
             )
-            return day_availability.capacity - day_availability.booked_guests
+            return day_availability.remaining_seats
         except AvailabilityDays.DoesNotExist:
             return 0
     
+    @staticmethod
+    def remaining_seats_expression():
+        """Database expression for seats left on an AvailabilityDays row (never negative)."""
+        from django.db.models import F, IntegerField, Value, ExpressionWrapper
+        from django.db.models.functions import Greatest
+        return ExpressionWrapper(
+            Greatest(Value(0), F('capacity') - F('booked_guests') - F('held_guests')),
+            output_field=IntegerField(),
+        )
+
+    @staticmethod
+    def get_remaining_seats_bulk(availability_ids, start_date, end_date, active_only=True):
+        """
+        Remaining seats for many availabilities over a date range, in a single query.
+
+        Args:
+            availability_ids: Iterable of ExcursionAvailability IDs
+            start_date: First date of the range (inclusive)
+            end_date: Last date of the range (inclusive)
+            active_only: Skip AvailabilityDays whose status is not 'active'
+
+        Returns:
+            dict: {(availability_id, date): remaining_seats}
+        """
+        days = AvailabilityDays.objects.filter(
+            excursion_availability_id__in=list(availability_ids),
+            date_day__gte=start_date,
+            date_day__lte=end_date,
+        )
+        if active_only:
+            days = days.filter(status='active')
+        rows = days.annotate(
+            remaining=BookingService.remaining_seats_expression()
+        ).values_list('excursion_availability_id', 'date_day', 'remaining')
+        return {(availability_id, day): remaining for availability_id, day, remaining in rows}
+
+    @staticmethod
+    def claim_seats(availability_id, selected_date, count):
+        """
+        Atomically claim seats on an AvailabilityDays row.
+
+        A single conditional UPDATE (booked_guests + held_guests + count <= capacity)
+        decides success, so concurrent buyers cannot both pass a stale remaining-seats check.
+
+        Returns:
+            bool: True if the seats were claimed, False if the day is full or missing.
+        """
+        from django.db.models import F
+        if count <= 0:
+            return True
+        claimed = AvailabilityDays.objects.filter(
+            date_day=selected_date,
+            excursion_availability_id=availability_id,
+            booked_guests__lte=F('capacity') - F('held_guests') - count,
+        ).update(booked_guests=F('booked_guests') + count)
+        return claimed > 0
+
+    @staticmethod
+    def _seat_hold_ttl():
+        """Lifetime of a seat hold taken for a pending booking."""
+        from django.conf import settings
+        return timedelta(minutes=getattr(settings, 'SEAT_HOLD_TTL_MINUTES', 15))
+
+    @staticmethod
+    def hold_seats(booking):
+        """
+        Reserve this booking's seats for SEAT_HOLD_TTL_MINUTES.
+
+        Increments AvailabilityDays.held_guests with the same conditional UPDATE
+        used by claim_seats and records a SeatHold row for conversion/release.
+
+        Returns:
+            SeatHold instance, or None if the day has no room.
+        """
+        from django.db.models import F
+        from .models import SeatHold
+        count = BookingService._booking_guest_count(booking)
+        if not booking.excursion_availability_id or not booking.date or count <= 0:
+            return None
+        day = AvailabilityDays.objects.filter(
+            date_day=booking.date,
+            excursion_availability_id=booking.excursion_availability_id,
+        ).only('id').first()
+        if not day:
+            return None
+        # The counter and its SeatHold commit together, so held seats always have a hold to release them
+        with transaction.atomic():
+            held = AvailabilityDays.objects.filter(
+                pk=day.pk,
+                booked_guests__lte=F('capacity') - F('held_guests') - count,
+            ).update(held_guests=F('held_guests') + count)
+            if not held:
+                return None
+            hold = SeatHold.objects.create(
+                booking=booking,
+                availability_day=day,
+                seats=count,
+                expires_at=timezone.now() + BookingService._seat_hold_ttl(),
+            )
+            OccupancyService.schedule_refresh_for_days([day.pk])
+        return hold
+
+    @staticmethod
+    def ensure_hold(booking):
+        """
+        Make sure a pending booking holds its seats, e.g. before sending it to JCC checkout.
+        Extends a live hold, otherwise tries to take a new one.
+
+        Returns:
+            bool: True if the booking now holds its seats.
+        """
+        from .models import SeatHold
+        now = timezone.now()
+        extended = SeatHold.objects.filter(
+            booking=booking, status='active', expires_at__gt=now
+        ).update(expires_at=now + BookingService._seat_hold_ttl())
+        if extended:
+            return True
+        return BookingService.hold_seats(booking) is not None
+
+    @staticmethod
+    def _convert_hold(booking):
+        """
+        Turn this booking's active hold into booked seats (held_guests -> booked_guests).
+        An expired hold that has not been swept yet still owns its seats, so it converts too.
+
+        Returns:
+            bool: True if a hold was converted.
+        """
+        from django.db.models import F
+        from .models import SeatHold
+        hold = SeatHold.objects.select_for_update().filter(booking=booking, status='active').first()
+        if not hold:
+            return False
+        if hold.seats != BookingService._booking_guest_count(booking):
+            # Guest count changed since the hold was taken; claim afresh instead.
+            BookingService.release_hold_for_booking(booking)
+            return False
+        SeatHold.objects.filter(pk=hold.pk).update(status='converted')
+        AvailabilityDays.objects.filter(pk=hold.availability_day_id).update(
+            held_guests=F('held_guests') - hold.seats,
+            booked_guests=F('booked_guests') + hold.seats,
+        )
+        return True
+
+    @staticmethod
+    def release_hold_for_booking(booking):
+        """
+        Give back the seats held by a pending booking (cancelled, expired or deleted).
+        Safe to call when the booking has no active hold.
+        """
+        from django.db.models import F
+        from django.db.models.functions import Greatest
+        from .models import SeatHold
+        with transaction.atomic():
+            holds = list(
+                SeatHold.objects.select_for_update().filter(booking=booking, status='active')
+            )
+            for hold in holds:
+                AvailabilityDays.objects.filter(pk=hold.availability_day_id).update(
+                    held_guests=Greatest(0, F('held_guests') - hold.seats)
+                )
+            SeatHold.objects.filter(pk__in=[h.pk for h in holds]).update(status='released')
+            OccupancyService.schedule_refresh_for_days([h.availability_day_id for h in holds])
+        if holds:
+            logger.debug(f'Released {len(holds)} seat hold(s) for booking #{booking.pk}')
+
+    @staticmethod
+    def release_expired_holds(now=None):
+        """
+        Release every active hold whose TTL has passed.
+        Uses the (status, expires_at) index and one UPDATE per affected day.
+
+        Returns:
+            int: Number of holds released.
+        """
+        from django.db.models import F, Sum
+        from django.db.models.functions import Greatest
+        from .models import SeatHold
+        now = now or timezone.now()
+        with transaction.atomic():
+            expired = SeatHold.objects.select_for_update().filter(status='active', expires_at__lte=now)
+            hold_ids = list(expired.values_list('id', flat=True))
+            if not hold_ids:
+                return 0
+            seats_by_day = (
+                SeatHold.objects.filter(id__in=hold_ids)
+                .values('availability_day_id')
+                .annotate(seats=Sum('seats'))
+                .order_by()
+            )
+            for row in seats_by_day:
+                AvailabilityDays.objects.filter(pk=row['availability_day_id']).update(
+                    held_guests=Greatest(0, F('held_guests') - row['seats'])
+                )
+            SeatHold.objects.filter(id__in=hold_ids).update(status='released')
+            OccupancyService.schedule_refresh_for_days(row['availability_day_id'] for row in seats_by_day)
+        logger.info(f'Released {len(hold_ids)} expired seat hold(s)')
+        return len(hold_ids)
+
     @staticmethod
     def handle_voucher(voucher_id):
         """Handle voucher/reservation lookup or creation using VoucherService."""
@@ -455,16 +901,6 @@ class BookingService:
         Create a booking with all related operations.
         Note: Referral codes are applied later at checkout.
         """
-        # Validate remaining seats
-        remaining_seats = BookingService.get_remaining_seats(
-            excursion_availability, selected_date
-        )
-        
-        if booking_data['total_guests'] > remaining_seats:
-            raise ValidationError(
-                f'The selected date has not enough seats available. Remaining seats: {remaining_seats}'
-            )
-        
         # Calculate pricing (without referral discount for now)
         base_price = booking_data['total_price']
         pricing_data = BookingService.calculate_pricing(
@@ -485,24 +921,35 @@ class BookingService:
                     access_token = token
                     break
         
-        # Create booking (booked_guests is incremented only when payment completes)
-        booking = Booking.objects.create(
-            user=user if user.is_authenticated else None,
-            excursion_availability=excursion_availability,
-            excursion=excursion_availability.excursion,
-            voucher_id=voucher_instance,
-            guest_name=guest_data.get('guest_name'),
-            guest_email=guest_data.get('guest_email'),
-            guest_phone=guest_data.get('guest_phone', ''),
-            total_adults=booking_data['adults'],
-            total_kids=booking_data['children'],
-            total_infants=booking_data['infants'],
-            date=selected_date,
-            price=base_price,
-            pickup_point=pickup_point,
-            access_token=access_token,
-            **pricing_data
-        )
+        # Create booking (booked_guests is incremented only when payment completes;
+        # until then the seats are reserved by a time-limited SeatHold). Both in one
+        # transaction, so a date without room leaves no pending booking behind.
+        with transaction.atomic():
+            booking = Booking.objects.create(
+                user=user if user.is_authenticated else None,
+                excursion_availability=excursion_availability,
+                excursion=excursion_availability.excursion,
+                voucher_id=voucher_instance,
+                guest_name=guest_data.get('guest_name'),
+                guest_email=guest_data.get('guest_email'),
+                guest_phone=guest_data.get('guest_phone', ''),
+                total_adults=booking_data['adults'],
+                total_kids=booking_data['children'],
+                total_infants=booking_data['infants'],
+                date=selected_date,
+                price=base_price,
+                pickup_point=pickup_point,
+                access_token=access_token,
+                **pricing_data
+            )
+
+            if not BookingService.hold_seats(booking):
+                remaining_seats = BookingService.get_remaining_seats(
+                    excursion_availability, selected_date
+                )
+                raise ValidationError(
+                    f'The selected date has not enough seats available. Remaining seats: {remaining_seats}'
+                )
         return booking
 
     @staticmethod
@@ -515,21 +962,66 @@ class BookingService:
         """
         Add this booking's guest count to AvailabilityDays and ExcursionAvailability.
         Call only when payment becomes completed.
+
+        The booking's seat hold is converted when it still has one; otherwise seats
+        are claimed with a conditional UPDATE (see claim_seats). The
+        ExcursionAvailability total only moves when the day claim succeeds.
+
+        Returns:
+            bool: True if the seats were claimed (or the booking has none to count), False if
+            the day had no room; callers must then call notify_unclaimed_seats.
         """
         from django.db.models import F
         if not booking.excursion_availability_id or not booking.date:
-            return
+            return True
         count = BookingService._booking_guest_count(booking)
         if count <= 0:
-            return
-        AvailabilityDays.objects.filter(
-            date_day=booking.date,
-            excursion_availability_id=booking.excursion_availability_id,
-        ).update(booked_guests=F('booked_guests') + count)
+            return True
+        with transaction.atomic():
+            claimed = (
+                BookingService._convert_hold(booking)
+                or BookingService.claim_seats(booking.excursion_availability_id, booking.date, count)
+            )
+        if not claimed:
+            logger.error(
+                f'Could not claim {count} seat(s) for booking #{booking.pk} on {booking.date}: '
+                f'availability #{booking.excursion_availability_id} is full'
+            )
+            return False
         ExcursionAvailability.objects.filter(pk=booking.excursion_availability_id).update(
             booked_guests=F('booked_guests') + count
         )
+        OccupancyService.schedule_refresh_for_day(booking.excursion_availability_id, booking.date)
         logger.debug(f'Incremented booked_guests by {count} for booking #{booking.pk}')
+        return True
+
+    @staticmethod
+    def notify_unclaimed_seats(booking):
+        """
+        Tell the admins that a paid booking got no seats: its hold lapsed and the day filled up
+        before payment completed. The day is oversold until staff move or refund the booking.
+        """
+        logger.error(f'Booking #{booking.pk} was paid but its seats could not be counted; manual resolution needed')
+        display_excursion = booking.get_display_excursion()
+        builder = EmailBuilder()
+        builder.h2('Paid booking without seats')
+        builder.warning(
+            'Payment completed after the seat hold expired and the day is now full. '
+            'The seats were not counted; please move the booking to another date or refund it.'
+        )
+        builder.card('Booking Details', {
+            'Booking #': f'{booking.pk}',
+            'Excursion': display_excursion.title if display_excursion else 'N/A',
+            'Date': booking.date.strftime('%B %d, %Y') if booking.date else 'N/A',
+            'Guests': f'{BookingService._booking_guest_count(booking)}',
+        }, border_color='#f59e0b')
+        builder.p('Best regards,<br>Automated System')
+        EmailService.send_to_admins(
+            subject=f'[iGoCyprus] Action needed - paid booking #{booking.pk} has no seats',
+            message=f'Booking #{booking.pk} was paid but the day is full; its seats were not counted.',
+            html_message=builder.build(),
+            fail_silently=True,
+        )
 
     @staticmethod
     def decrement_booked_guests_for_booking(booking):
@@ -551,6 +1043,7 @@ class BookingService:
         ExcursionAvailability.objects.filter(pk=booking.excursion_availability_id).update(
             booked_guests=Greatest(0, F('booked_guests') - count)
         )
+        OccupancyService.schedule_refresh_for_day(booking.excursion_availability_id, booking.date)
         logger.debug(f'Decremented booked_guests by {count} for booking #{booking.pk}')
 
     @staticmethod
@@ -596,11 +1089,19 @@ class BookingService:
 
 class ExcursionService:
     """Service class for handling excursion-related operations."""
+
+    # Bump when the snapshot layout changes so old cache entries are ignored.
+    AVAILABILITY_SNAPSHOT_SCHEMA = 1
+    AVAILABILITY_SNAPSHOT_TIMEOUT = 60 * 60 * 24
     
     @staticmethod
-    def get_availability_data(excursion_availabilities):
+    def get_availability_data(excursion_availabilities, include_remaining=True):
         """
         Process excursion availabilities and return structured data organized by region.
+
+        Regions, pickup points and availability days are read through .all() so a
+        queryset with prefetch_related (see build_availability_snapshot) costs no
+        extra queries per availability.
         
         Returns:
             tuple: (availability_dates_by_region, pickup_points_by_region, region_availability_map)
@@ -613,23 +1114,39 @@ class ExcursionService:
         region_availability_map = {}
         
         today = timezone.now().date()
-        for availability in excursion_availabilities:
+        bookable_availabilities = [
+            availability for availability in excursion_availabilities
             if (
-                availability.status != 'active'
-                or not availability.is_active
-                or availability.end_date < today
-            ):
-                continue
+                availability.status == 'active'
+                and availability.is_active
+                and availability.end_date >= today
+            )
+        ]
+
+        # Remaining seats for every bookable (availability, date) in one query
+        remaining_by_day = {}
+        if include_remaining and bookable_availabilities:
+            remaining_by_day = BookingService.get_remaining_seats_bulk(
+                [availability.id for availability in bookable_availabilities],
+                min(availability.start_date for availability in bookable_availabilities),
+                max(availability.end_date for availability in bookable_availabilities),
+            )
 
+        for availability in bookable_availabilities:
             # Get all regions for this availability
             regions = availability.regions.all()
             
-            # Get all availability days for this availability
-            days = availability.availability_days.filter(status='active')
+            # Get all active availability days for this availability
+            days = sorted(
+                (day for day in availability.availability_days.all() if day.status == 'active'),
+                key=lambda day: day.date_day,
+            )
             
             # Get all pickup points for this availability
-            pickup_points = availability.pickup_points.all().order_by('name')
-            pickup_points_list = list(pickup_points.values('id', 'name'))
+            pickup_points_list = sorted(
+                ({'id': point.id, 'name': point.name} for point in availability.pickup_points.all()),
+                key=lambda point: point['name'],
+            )
             pickup_start_time = availability.pickup_start_time.strftime('%H:%M') if availability.pickup_start_time else None
             pickup_end_time = availability.pickup_end_time.strftime('%H:%M') if availability.pickup_end_time else None
             
@@ -645,21 +1162,23 @@ class ExcursionService:
                 'max_guests': availability.max_guests,
                 'booked_guests': availability.booked_guests,
             }
+
+            # Same date entries for every region of this availability
+            date_entries = []
+            for day in days:
+                entry = {
+                    "date": day.date_day.isoformat(),
+                    "id": day.id,
+                    "availability_id": availability.id,
+                }
+                if include_remaining:
+                    entry["remaining"] = remaining_by_day.get((availability.id, day.date_day), 0)
+                date_entries.append(entry)
             
             # Process each region
             for region in regions:
                 region_id = str(region.id)
                 
-                # Convert queryset to list of dicts with availability_id
-                date_entries = [
-                    {
-                        "date": day.date_day.isoformat(), 
-                        "id": day.id,
-                        "availability_id": availability.id
-                    }
-                    for day in days
-                ]
-                
                 # Add dates for this region
                 if region_id not in availability_dates_by_region:
                     availability_dates_by_region[region_id] = []
@@ -684,81 +1203,1186 @@ class ExcursionService:
         regions = Region.objects.filter(id__in=region_ids).values('id', 'name')
         return {str(r['id']): r['name'] for r in regions}
 
+    @staticmethod
+    def build_availability_snapshot(excursion_id):
+        """
+        Build the booking-widget data for an excursion from the database.
+
+        Returns a plain, JSON-serialisable dict with availability_dates_by_region
+        (without remaining seats), pickup_points_by_region, region_availability_map,
+        region_map and an ordered 'regions' list.
+        """
+        from django.db.models import Prefetch
+        today = timezone.now().date()
+        availabilities = ExcursionAvailability.objects.filter(
+            excursion_id=excursion_id,
+            status='active',
+            is_active=True,
+            end_date__gte=today,
+        ).prefetch_related(
+            'regions',
+            'pickup_points',
+            Prefetch('availability_days', queryset=AvailabilityDays.objects.filter(status='active')),
+        )
+        availability_dates_by_region, pickup_points_by_region, region_availability_map = (
+            ExcursionService.get_availability_data(availabilities, include_remaining=False)
+        )
+
+        region_map = {}
+        for availability in availabilities:
+            for region in availability.regions.all():
+                region_map.setdefault(str(region.id), region.name)
+        region_map = {
+            region_id: name for region_id, name in region_map.items()
+            if region_id in availability_dates_by_region
+        }
+
+        return {
+            'availability_dates_by_region': availability_dates_by_region,
+            'pickup_points_by_region': pickup_points_by_region,
+            'region_availability_map': region_availability_map,
+            'region_map': region_map,
+            'regions': [
+                {'id': int(region_id), 'name': region_map[region_id]}
+                for region_id in sorted(region_map, key=int)
+            ],
+        }
 
-class VoucherService:
-    """Service class for handling voucher/reservation authentication and validation."""
-    
     @staticmethod
-    def authenticate_voucher(voucher_code):
+    def _availability_snapshot_key(excursion_id):
         """
-        Main entry point - authenticate voucher and get or create reservation.
-        
-        Args:
-            voucher_code: The booking ID / voucher code
-            
-        Returns:
-            tuple: (reservation, created) where created is True if fetched from API
-            
-        Raises:
-            ValidationError: If voucher is invalid or expired
+        Versioned cache key: schema version, global and per-excursion generations and
+        today's date (availabilities drop out of the snapshot once they end).
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
-        if not voucher_code:
-            raise ValidationError('Voucher code is required.')
-        
-        # First, try to get from database
+        global_generation = cache_generation('availability_snapshot:generation')
+        excursion_generation = cache_generation(
+            f'availability_snapshot:{excursion_id}:generation'
+        )
+        return (
+            f'availability_snapshot:v{ExcursionService.AVAILABILITY_SNAPSHOT_SCHEMA}:'
+            f'{excursion_id}:{global_generation}.{excursion_generation}:{timezone.now().date().isoformat()}'
+        )
+
+    @staticmethod
+    def invalidate_availability_snapshot(excursion_id=None):
+        """
+        Invalidate cached availability snapshots once the current transaction commits.
+        Pass None to invalidate every excursion (e.g. a region or pickup point was renamed).
+        """
+        if excursion_id is None:
+            key = 'availability_snapshot:generation'
+        else:
+            key = f'availability_snapshot:{excursion_id}:generation'
+        transaction.on_commit(lambda: bump_cache_generation(key))
+
+    @staticmethod
+    def get_availability_snapshot(excursion_id):
+        """
+        Cached booking-widget data for an excursion, with live remaining seats.
+
+        The structural part comes from Django's cache (see build_availability_snapshot);
+        remaining seats change on every booking, so they are overlaid from a single
+        get_remaining_seats_bulk query instead of being cached.
+
+        Returns:
+            dict: availability_dates_by_region, pickup_points_by_region,
+                  region_availability_map, region_map and regions
+        """
+        from django.core.cache import cache
+        key = ExcursionService._availability_snapshot_key(excursion_id)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = ExcursionService.build_availability_snapshot(excursion_id)
+            cache.set(key, snapshot, ExcursionService.AVAILABILITY_SNAPSHOT_TIMEOUT)
+
+        entries = [
+            entry
+            for date_entries in snapshot['availability_dates_by_region'].values()
+            for entry in date_entries
+        ]
+        remaining_by_day = {}
+        if entries:
+            dates = [date.fromisoformat(entry['date']) for entry in entries]
+            remaining_by_day = BookingService.get_remaining_seats_bulk(
+                {entry['availability_id'] for entry in entries}, min(dates), max(dates)
+            )
+
+        return {
+            **snapshot,
+            'availability_dates_by_region': {
+                region_id: [
+                    {
+                        **entry,
+                        'remaining': remaining_by_day.get(
+                            (entry['availability_id'], date.fromisoformat(entry['date'])), 0
+                        ),
+                    }
+                    for entry in date_entries
+                ]
+                for region_id, date_entries in snapshot['availability_dates_by_region'].items()
+            },
+        }
+
+
+class ExcursionListingService:
+    """Maintains the ExcursionListing read model used by the homepage and excursion list."""
+
+    # Bumped on every refresh; caches derived from listings (e.g. facet counts) key on it
+    GENERATION_KEY = 'excursion_listing:generation'
+
+    @staticmethod
+    def listed():
+        """Listings of excursions that currently have an active availability."""
+        from .models import ExcursionListing
+        today = timezone.now().date()
+        return ExcursionListing.objects.filter(last_available_date__gte=today)
+
+    @staticmethod
+    def build_listing(excursion, today=None):
+        """
+        Build an unsaved ExcursionListing for an excursion.
+        Expects availabilities (with regions and active days), category and tags prefetched.
+        """
+        from .models import ExcursionListing
+        today = today or timezone.now().date()
+        active_availabilities = _active_availabilities(excursion, today)
+
+        region_names = []
+        region_ids = []
+        for availability in active_availabilities:
+            for region in availability.regions.all():
+                if region.id not in region_ids:
+                    region_ids.append(region.id)
+                    region_names.append(region.name)
+
+        prices = [a.adult_price for a in active_availabilities if a.adult_price is not None]
+        upcoming_days = [
+            day.date_day
+            for availability in active_availabilities
+            for day in availability.availability_days.all()
+            if day.date_day >= today
+        ]
+        tags = sorted(excursion.tags.all(), key=lambda tag: tag.id)
+
+        # Day bitmaps: bit n is set when day (today + n) has an active AvailabilityDay
+        horizon = ExcursionListingService.bitmap_horizon()
+        day_bitmap = 0
+        region_bitmaps = {}
+        for availability in active_availabilities:
+            availability_bits = 0
+            for day in availability.availability_days.all():
+                offset = (day.date_day - today).days
+                if 0 <= offset < horizon:
+                    availability_bits |= 1 << offset
+            day_bitmap |= availability_bits
+            for region in availability.regions.all():
+                region_bitmaps[region.id] = region_bitmaps.get(region.id, 0) | availability_bits
+
+        return ExcursionListing(
+            excursion=excursion,
+            title=excursion.title,
+            description=excursion.description or '',
+            search_text=ExcursionSearchService.plain_text(
+                excursion.description,
+                *[tag.name for tag in tags],
+                *[category.name for category in excursion.category.all()],
+            ),
+            intro_image=excursion.intro_image.name if excursion.intro_image else None,
+            overall_rating=excursion.overall_rating,
+            active_regions=region_names,
+            region_ids=region_ids,
+            category_ids=sorted(category.id for category in excursion.category.all()),
+            tag_ids=[tag.id for tag in tags],
+            tag_names=[tag.name for tag in tags],
+            duration_range=_duration_range_label(active_availabilities) or '',
+            min_price=min(prices) if prices else None,
+            next_available_date=min(upcoming_days) if upcoming_days else None,
+            last_available_date=max((a.end_date for a in active_availabilities), default=None),
+            bitmap_origin=today,
+            day_bitmap=day_bitmap.to_bytes((horizon + 7) // 8, 'little'),
+            region_day_bitmaps={str(region_id): format(bits, 'x') for region_id, bits in region_bitmaps.items()},
+        )
+
+    @staticmethod
+    def bitmap_horizon():
+        """Number of days, starting at the build date, covered by the listing day bitmaps."""
+        from django.conf import settings
+        return getattr(settings, 'EXCURSION_BITMAP_HORIZON_DAYS', 548)
+
+    @staticmethod
+    def active_days_between(date_from=None, date_to=None):
+        """Active AvailabilityDays of active, non-expired availabilities within the given range."""
+        active_days = AvailabilityDays.objects.filter(
+            status='active',
+            excursion_availability__status='active',
+            excursion_availability__is_active=True,
+            excursion_availability__end_date__gte=timezone.now().date(),
+        )
+        if date_from:
+            active_days = active_days.filter(date_day__gte=date_from)
+        if date_to:
+            active_days = active_days.filter(date_day__lte=date_to)
+        return active_days
+
+    @staticmethod
+    def _range_mask(origin, date_from, date_to, horizon):
+        """
+        Bit mask selecting [date_from, date_to] within a bitmap starting at origin,
+        and whether the range runs past the bitmap horizon (open end included).
+        """
+        start = 0 if date_from is None else max((date_from - origin).days, 0)
+        end = horizon - 1 if date_to is None else min((date_to - origin).days, horizon - 1)
+        beyond_horizon = date_to is None or (date_to - origin).days >= horizon
+        if end < start:
+            return 0, beyond_horizon
+        return ((1 << (end - start + 1)) - 1) << start, beyond_horizon
+
+    @staticmethod
+    def filter_available_between(listings, date_from=None, date_to=None, region_id=None):
+        """
+        Restrict a listing queryset to excursions with an active day in [date_from, date_to],
+        optionally within one region.
+
+        Tests the stored day bitmaps of the candidate rows in Python. Rows whose bitmap
+        cannot answer (not built yet, or the range runs past the horizon) fall back to
+        an AvailabilityDays subquery limited to those rows.
+        """
+        if not date_from and not date_to:
+            return listings
+
+        horizon = ExcursionListingService.bitmap_horizon()
+        matched = []
+        unresolved = []
+        rows = listings.values_list(
+            'excursion_id', 'bitmap_origin', 'day_bitmap', 'region_day_bitmaps', 'last_available_date'
+        )
+        for excursion_id, origin, raw_bitmap, region_bitmaps, last_available in rows:
+            if origin is None:
+                unresolved.append(excursion_id)
+                continue
+            if region_id is None:
+                bitmap = int.from_bytes(bytes(raw_bitmap or b''), 'little')
+            else:
+                bitmap = int((region_bitmaps or {}).get(str(region_id), '0'), 16)
+            mask, beyond_horizon = ExcursionListingService._range_mask(origin, date_from, date_to, horizon)
+            if bitmap & mask:
+                matched.append(excursion_id)
+            elif beyond_horizon and last_available and (last_available - origin).days >= horizon:
+                # Only availabilities reaching past the horizon can hide days the bitmap lacks
+                unresolved.append(excursion_id)
+
+        if unresolved:
+            fallback_days = ExcursionListingService.active_days_between(date_from, date_to).filter(
+                excursion_availability__excursion_id__in=unresolved
+            )
+            if region_id is not None:
+                fallback_days = fallback_days.filter(excursion_availability__regions__id=region_id)
+            matched.extend(
+                fallback_days.values_list('excursion_availability__excursion_id', flat=True).distinct()
+            )
+        return listings.filter(excursion_id__in=matched)
+
+    @staticmethod
+    def refresh(excursion_ids=None, batch_size=200):
+        """
+        Rebuild listings for the given excursion ids (all excursions when None).
+        Returns the number of listings written.
+        """
+        from django.db.models import Prefetch
+        from .models import ExcursionListing
+
+        excursions = Excursion.objects.prefetch_related(
+            'category',
+            'tags',
+            'availabilities__regions',
+            Prefetch(
+                'availabilities__availability_days',
+                queryset=AvailabilityDays.objects.filter(status='active').only(
+                    'id', 'date_day', 'excursion_availability_id'
+                ),
+            ),
+        ).order_by('pk')
+        if excursion_ids is not None:
+            excursions = excursions.filter(pk__in=list(excursion_ids))
+
+        update_fields = [
+            f.name for f in ExcursionListing._meta.concrete_fields if f.name != 'excursion'
+        ]
+        today = timezone.now().date()
+        written = 0
+        batch = []
+        for excursion in excursions.iterator(chunk_size=batch_size):
+            batch.append(ExcursionListingService.build_listing(excursion, today))
+            if len(batch) >= batch_size:
+                written += ExcursionListingService._upsert(batch, update_fields)
+                batch = []
+        if batch:
+            written += ExcursionListingService._upsert(batch, update_fields)
+        bump_cache_generation(ExcursionListingService.GENERATION_KEY)
+        return written
+
+    @staticmethod
+    def _upsert(listings, update_fields):
+        from .models import ExcursionListing
+        ExcursionListing.objects.bulk_create(
+            listings,
+            update_conflicts=True,
+            unique_fields=['excursion'],
+            update_fields=update_fields,
+        )
+        ExcursionSearchService.index(listings)
+        return len(listings)
+
+    @staticmethod
+    def schedule_refresh(excursion_id):
+        """Refresh one excursion's listing after the current transaction commits."""
+        if not excursion_id:
+            return
+
+        def _refresh():
+            try:
+                ExcursionListingService.refresh([excursion_id])
+            except Exception as e:
+                logger.error(f"Failed to refresh listing for excursion {excursion_id}: {e}")
+
+        transaction.on_commit(_refresh)
+
+
+class ExcursionSearchService:
+    """
+    Full-text search over ExcursionListing.
+
+    SQLite: FTS5 table main_excursionsearch (rowid = excursion id), written alongside the listing.
+    PostgreSQL: generated, weighted search_vector column on main_excursionlisting with a GIN index.
+    Both are created by migration 0065; other backends fall back to icontains.
+    """
+
+    FTS_TABLE = 'main_excursionsearch'
+    RANKED_RESULTS = 200
+
+    @staticmethod
+    def plain_text(*parts):
+        """Strip CKEditor HTML and entities and collapse whitespace."""
+        import html
+        import re
+        from django.utils.html import strip_tags
+        text = ' '.join(html.unescape(strip_tags(part)) for part in parts if part)
+        return re.sub(r'\s+', ' ', text).strip()
+
+    @staticmethod
+    def _terms(query):
+        import re
+        return re.findall(r'\w+', query.lower())[:10]
+
+    # Backend per (alias, database name); table introspection is too slow for every search
+    # and the FTS table only changes with migrations (reset_backend runs on post_migrate)
+    _backends = {}
+
+    @staticmethod
+    def _backend():
+        from django.db import connection
+        key = (connection.alias, connection.settings_dict['NAME'])
+        backends = ExcursionSearchService._backends
+        if key not in backends:
+            if connection.vendor == 'sqlite' and ExcursionSearchService._fts_table_exists(connection):
+                backends[key] = 'fts5'
+            elif connection.vendor == 'postgresql':
+                backends[key] = 'tsvector'
+            else:
+                backends[key] = None
+        return backends[key]
+
+    @staticmethod
+    def reset_backend():
+        ExcursionSearchService._backends.clear()
+
+    @staticmethod
+    def _fts_table_exists(connection):
+        return ExcursionSearchService.FTS_TABLE in connection.introspection.table_names(include_views=False)
+
+    @staticmethod
+    def index(listings):
+        """Write listings into the FTS5 table (PostgreSQL keeps its generated column current itself)."""
+        if ExcursionSearchService._backend() != 'fts5' or not listings:
+            return
+        from django.db import connection
+        table = ExcursionSearchService.FTS_TABLE
+        ids = [listing.excursion_id for listing in listings]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE rowid IN ({', '.join(['%s'] * len(ids))})", ids
+            )
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, title, body) VALUES (%s, %s, %s)",
+                [(listing.excursion_id, listing.title, listing.search_text) for listing in listings],
+            )
+
+    @staticmethod
+    def remove(excursion_id):
+        if ExcursionSearchService._backend() != 'fts5':
+            return
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {ExcursionSearchService.FTS_TABLE} WHERE rowid = %s", [excursion_id])
+
+    @staticmethod
+    def search(listings, query):
+        """
+        Filter a listing queryset to matches of `query`, best match first.
+        Every word must match; the last word also matches as a prefix (search-as-you-type).
+        """
+        from django.db.models import Q
+        from django.db.models.expressions import RawSQL
+
+        terms = ExcursionSearchService._terms(query or '')
+        if not terms:
+            return listings
+
+        backend = ExcursionSearchService._backend()
+        if backend == 'fts5':
+            from django.db import connection
+            from django.db.models import F
+            table = ExcursionSearchService.FTS_TABLE
+            match = ' '.join(f'"{term}"' for term in terms[:-1])
+            match = f'{match} "{terms[-1]}"*'.strip()
+            # Title hits weigh 10x body hits; bm25() is lower-is-better. Only the top
+            # results need an exact order, so rank them by their position in an id string
+            # (a long CASE over every match is far slower on SQLite).
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+                    f"ORDER BY bm25({table}, 10.0, 1.0) LIMIT %s",
+                    [match, ExcursionSearchService.RANKED_RESULTS],
+                )
+                ranked_ids = ',' + ','.join(str(row[0]) for row in cursor.fetchall()) + ','
+            return listings.filter(
+                excursion_id__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match])
+            ).annotate(
+                search_rank=RawSQL(
+                    "NULLIF(instr(%s, ',' || main_excursionlisting.excursion_id || ','), 0)", [ranked_ids]
+                )
+            ).order_by(F('search_rank').asc(nulls_last=True), 'excursion_id')
+
+        if backend == 'tsvector':
+            tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+            return listings.filter(
+                excursion_id__in=RawSQL(
+                    "SELECT excursion_id FROM main_excursionlisting "
+                    "WHERE search_vector @@ to_tsquery('simple', %s)",
+                    [tsquery],
+                )
+            ).annotate(
+                search_rank=RawSQL("ts_rank(search_vector, to_tsquery('simple', %s))", [tsquery])
+            ).order_by('-search_rank')
+
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(search_text__icontains=term)
+        return listings.filter(condition)
+
+
+class ExcursionFacetService:
+    """Category, tag and region counts for the excursion list filters."""
+
+    CACHE_TIMEOUT = 300
+
+    @staticmethod
+    def filtered_listings(search_query='', date_from=None, date_to=None):
+        """Listed excursions matching the search and date filters (the facet base set)."""
+        listings = ExcursionListingService.listed()
+        listings = ExcursionListingService.filter_available_between(listings, date_from, date_to)
+        if search_query:
+            listings = ExcursionSearchService.search(listings, search_query)
+        return listings
+
+    @staticmethod
+    def count_facets(listings):
+        """
+        Count excursions per category, tag and region of a listing queryset.
+        Runs as a single UNION ALL of three grouped aggregates.
+
+        Returns:
+            dict: {'category': {id: count}, 'tag': {id: count}, 'region': {id: count}}
+        """
+        from django.db.models import Count, Value, CharField
+
+        excursion_ids = listings.order_by().values('excursion_id')
+        today = timezone.now().date()
+
+        categories = Excursion.category.through.objects.filter(
+            excursion_id__in=excursion_ids
+        ).values('category_id').annotate(
+            facet=Value('category', output_field=CharField()),
+            count=Count('excursion_id'),
+        ).values_list('facet', 'category_id', 'count')
+
+        tags = Excursion.tags.through.objects.filter(
+            excursion_id__in=excursion_ids
+        ).values('tag_id').annotate(
+            facet=Value('tag', output_field=CharField()),
+            count=Count('excursion_id'),
+        ).values_list('facet', 'tag_id', 'count')
+
+        # Regions come from active availabilities, like ExcursionListing.region_ids
+        regions = ExcursionAvailability.regions.through.objects.filter(
+            excursionavailability__excursion_id__in=excursion_ids,
+            excursionavailability__status='active',
+            excursionavailability__is_active=True,
+            excursionavailability__end_date__gte=today,
+        ).values('region_id').annotate(
+            facet=Value('region', output_field=CharField()),
+            count=Count('excursionavailability__excursion_id', distinct=True),
+        ).values_list('facet', 'region_id', 'count')
+
+        counts = {'category': {}, 'tag': {}, 'region': {}}
+        for facet, facet_id, count in categories.union(tags, regions, all=True):
+            counts[facet][facet_id] = count
+        return counts
+
+    @staticmethod
+    def get_facet_counts(search_query='', date_from=None, date_to=None):
+        """
+        Cached facet counts for the current search/date filters.
+        Keyed by the normalised filter signature, the listing generation and today's date.
+        """
+        import hashlib
+        from django.conf import settings
+        from django.core.cache import cache
+
+        signature = '|'.join([
+            ' '.join(ExcursionSearchService._terms(search_query or '')),
+            date_from.isoformat() if date_from else '',
+            date_to.isoformat() if date_to else '',
+        ])
+        key = 'excursion_facets:{generation}:{today}:{digest}'.format(
+            generation=cache_generation(ExcursionListingService.GENERATION_KEY),
+            today=timezone.now().date().isoformat(),
+            digest=hashlib.md5(signature.encode('utf-8')).hexdigest(),
+        )
+        counts = cache.get(key)
+        if counts is None:
+            counts = ExcursionFacetService.count_facets(
+                ExcursionFacetService.filtered_listings(search_query, date_from, date_to)
+            )
+            timeout = getattr(settings, 'EXCURSION_FACETS_CACHE_TIMEOUT', ExcursionFacetService.CACHE_TIMEOUT)
+            cache.set(key, counts, timeout)
+        return counts
+
+
+class ReferenceSyncService:
+    """
+    Bulk sync of Cyberlogic reference data (pickup groups, pickup points, hotels, providers)
+    and excursions.
+
+    Each sync fetches the remote list, loads the local rows in one query, diffs them and
+    writes the differences with batched bulk_create(update_conflicts=True) / bulk_update.
+    Local rows missing from the feed are counted as 'removed' and only deleted with prune=True.
+    """
+
+    BATCH_SIZE = 500
+    # In dependency order: points reference groups, excursions reference providers
+    KINDS = ('pickup_groups', 'pickup_points', 'hotels', 'providers', 'excursions')
+
+    @staticmethod
+    def _same(local_value, remote_value):
+        # The API sends '' where the local column is NULL and vice versa
+        if local_value == '':
+            local_value = None
+        if remote_value == '':
+            remote_value = None
+        return local_value == remote_value
+
+    @staticmethod
+    def sync_rows(model, remote_rows, fields, key='id', create_defaults=None, prune=False, queryset=None, batch_size=None):
+        """
+        Upsert `remote_rows` ({key value: {field: value}}) into `model`.
+
+        Args:
+            model: Model class to write
+            remote_rows: Remote values per key, limited to `fields`
+            fields: Field attnames synced from the API (others are left alone)
+            key: Unique field attname identifying a row (the pk by default)
+            create_defaults: Extra values set only on rows being created
+            prune: Delete local rows whose key is no longer in the feed
+            queryset: Local rows the feed is compared against (all rows by default)
+
+        Returns:
+            dict: Counts of 'created', 'updated', 'unchanged' and 'removed' rows
+        """
+        batch_size = batch_size or ReferenceSyncService.BATCH_SIZE
+        create_defaults = create_defaults or {}
+        if queryset is None:
+            queryset = model.objects.all()
+        local = {row[key]: row for row in queryset.values('pk', key, *fields)}
+
+        to_create, to_update = [], []
+        unchanged = 0
+        for key_value, values in remote_rows.items():
+            current = local.get(key_value)
+            if current is None:
+                to_create.append(model(**{key: key_value}, **create_defaults, **values))
+            elif all(ReferenceSyncService._same(current[field], values[field]) for field in fields):
+                unchanged += 1
+            else:
+                to_update.append(model(pk=current['pk'], **values))
+        removed_ids = [row['pk'] for key_value, row in local.items() if key_value not in remote_rows]
+
+        with transaction.atomic():
+            if to_create:
+                # update_conflicts keeps a row created concurrently since `local` was read from failing the batch
+                model.objects.bulk_create(
+                    to_create,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=[key],
+                    update_fields=list(fields),
+                )
+            if to_update:
+                model.objects.bulk_update(to_update, list(fields), batch_size=batch_size)
+            if prune and removed_ids:
+                for offset in range(0, len(removed_ids), batch_size):
+                    model.objects.filter(pk__in=removed_ids[offset:offset + batch_size]).delete()
+
+        return {
+            'created': len(to_create),
+            'updated': len(to_update),
+            'unchanged': unchanged,
+            'removed': len(removed_ids),
+        }
+
+    @staticmethod
+    def sync_pickup_groups(prune=False, progress=None):
+        from .cyber_api import get_groups
+        from .models import PickupGroup
+        remote = {
+            group['Id']: {'name': group['Name'], 'code': group['Code']}
+            for group in get_groups()
+        }
+        return ReferenceSyncService.sync_rows(PickupGroup, remote, ['name', 'code'], prune=prune)
+
+    @staticmethod
+    def sync_pickup_points(prune=False, progress=None):
+        from .cyber_api import get_pickup_points
+        from .models import PickupGroup
+        group_ids = set(PickupGroup.objects.values_list('id', flat=True))
+        remote = {
+            point['Id']: {
+                'name': point['Name'],
+                # Points of groups not synced yet stay ungrouped instead of breaking the FK
+                'pickup_group_id': point['GroupId'] if point['GroupId'] in group_ids else None,
+            }
+            for point in get_pickup_points()
+        }
+        counts = ReferenceSyncService.sync_rows(PickupPoint, remote, ['name', 'pickup_group_id'], prune=prune)
+        if counts['created'] or counts['updated'] or (prune and counts['removed']):
+            # bulk writes skip the PickupPoint signals; point names are part of every snapshot
+            ExcursionService.invalidate_availability_snapshot()
+        return counts
+
+    @staticmethod
+    def sync_hotels(prune=False, progress=None):
+        from .cyber_api import get_hotels
+        remote = {
+            hotel['Acc_id']: {
+                'name': hotel['Acc_name'],
+                'address': hotel['Acc_address'],
+                'zipcode': hotel['acc_zip_code'],
+            }
+            for hotel in get_hotels()
+        }
+        return ReferenceSyncService.sync_rows(Hotel, remote, ['name', 'address', 'zipcode'], prune=prune)
+
+    @staticmethod
+    def sync_providers(prune=False, progress=None):
+        """
+        Providers are a User (id = Cyberlogic vendor id, or an existing user with the same
+        username) plus a 'provider' UserProfile. Users are only created; provider profiles are
+        upserted. A matched user whose profile has another role is logged and skipped, never
+        overwritten. With prune, provider profiles no longer in the feed are deactivated, not
+        deleted.
+        """
+        from django.db.models import Q
+        from .cyber_api import get_providers
+        from .models import UserProfile
+
+        providers = {provider['Id']: provider for provider in get_providers()}
+        usernames = {
+            provider_id: provider['Email'] or f"provider_{provider_id}"
+            for provider_id, provider in providers.items()
+        }
+        existing = list(User.objects.filter(
+            Q(id__in=list(providers)) | Q(username__in=list(usernames.values()))
+        ).values_list('id', 'username'))
+        existing_ids = {user_id for user_id, _ in existing}
+        ids_by_username = {username: user_id for user_id, username in existing}
+
+        user_ids = {}
+        new_users = []
+        for provider_id, provider in providers.items():
+            if provider_id in existing_ids:
+                user_ids[provider_id] = provider_id
+            elif usernames[provider_id] in ids_by_username:
+                user_ids[provider_id] = ids_by_username[usernames[provider_id]]
+            else:
+                user_ids[provider_id] = provider_id
+                ids_by_username[usernames[provider_id]] = provider_id
+                new_users.append(User(
+                    id=provider_id,
+                    username=usernames[provider_id],
+                    first_name=provider['Name'],
+                    email=provider['Email'] or "",
+                ))
+
+        remote = {
+            user_ids[provider_id]: {
+                'name': provider['Name'],
+                'email': provider['Email'],
+                'phone': provider['Telephone1'],
+                'address': provider['Address'],
+                'zipcode': provider['Zip'],
+            }
+            for provider_id, provider in providers.items()
+        }
+        # Vendor ids / usernames can collide with staff, client or rep users: leave their profiles alone
+        other_roles = list(
+            UserProfile.objects.filter(user_id__in=list(remote)).exclude(role='provider').values_list('user_id', 'role')
+        )
+        for user_id, role in other_roles:
+            logger.warning(f"Skipping provider '{remote[user_id]['name']}': user #{user_id} already has a '{role}' profile")
+            del remote[user_id]
+
+        fields = ['name', 'email', 'phone', 'address', 'zipcode']
+        with transaction.atomic():
+            User.objects.bulk_create(new_users, batch_size=ReferenceSyncService.BATCH_SIZE)
+            linked = UserProfile.objects.filter(role='provider')
+            counts = ReferenceSyncService.sync_rows(
+                UserProfile, remote, fields, key='user_id', create_defaults={'role': 'provider'}, queryset=linked,
+            )
+            if prune and counts['removed']:
+                linked.exclude(user_id__in=list(remote)).update(status='inactive')
+        counts['skipped'] = len(other_roles)
+        return counts
+
+    @staticmethod
+    def excursion_fingerprint(remote_excursion):
+        """Hash of an excursionsList entry; a different hash means the excursion changed remotely."""
+        import hashlib
+        import json
+        raw = json.dumps(remote_excursion, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def fetch_excursion_descriptions(excursion_ids, progress=None):
+        """
+        Description endpoint responses for the ids, fetched on a bounded thread pool
+        (CYBERLOGIC_SYNC_WORKERS, default 8) over the shared Cyberlogic session.
+
+        Returns:
+            tuple: ({excursion_id: response}, {excursion_id: error message})
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from django.conf import settings
+        from .cyber_api import get_excursion_description
+
+        descriptions, errors = {}, {}
+        if not excursion_ids:
+            return descriptions, errors
+        workers = max(1, getattr(settings, 'CYBERLOGIC_SYNC_WORKERS', 8))
+        with ThreadPoolExecutor(max_workers=min(workers, len(excursion_ids))) as pool:
+            futures = {pool.submit(get_excursion_description, excursion_id): excursion_id for excursion_id in excursion_ids}
+            for done, future in enumerate(as_completed(futures), start=1):
+                excursion_id = futures[future]
+                try:
+                    descriptions[excursion_id] = future.result()
+                except Exception as e:
+                    errors[excursion_id] = str(e)
+                if progress and done % 10 == 0:
+                    progress(done, len(excursion_ids))
+        return descriptions, errors
+
+    @staticmethod
+    def sync_excursions(prune=False, progress=None, force=False, overwrite=False):
+        """
+        Sync excursions from the excursionsList feed.
+
+        Descriptions are only fetched for excursions that are new or whose list entry changed
+        since the last sync (see excursion_fingerprint), or for all of them with force=True.
+        Existing excursions only get empty fields (description, provider, intro image) filled
+        in, so edits made in the admin are kept; overwrite=True replaces the title, description
+        and provider with the Cyberlogic values, discarding those edits. Local excursions
+        synced before fingerprints existed are baselined without a refetch. Excursions whose
+        organiser has no provider profile, or whose description can't be fetched or read, are
+        skipped (and retried on the next sync).
+        """
+        from .cyber_api import get_excursions
+        from .models import UserProfile
+
+        remote = {excursion['Id']: excursion for excursion in get_excursions()['Data']}
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'removed': 0, 'skipped': 0}
+
+        # Provider names resolved once; the lowest id wins for duplicate names, as .first() did
+        provider_ids = {}
+        for name, profile_id in UserProfile.objects.filter(role='provider').order_by('id').values_list('name', 'id'):
+            provider_ids.setdefault(name, profile_id)
+
+        local = {excursion.pk: excursion for excursion in Excursion.objects.filter(pk__in=list(remote)).only(
+            'id', 'title', 'description', 'intro_image', 'provider_id', 'cyberlogic_fingerprint',
+        )}
+
+        fingerprints, to_fetch, baseline = {}, [], []
+        for excursion_id, excursion in remote.items():
+            if excursion['Organizer_Name'] not in provider_ids:
+                logger.warning(f"No provider found with name '{excursion['Organizer_Name']}' and role 'provider'")
+                counts['skipped'] += 1
+                continue
+            fingerprint = fingerprints[excursion_id] = ReferenceSyncService.excursion_fingerprint(excursion)
+            current = local.get(excursion_id)
+            if current is None or force:
+                to_fetch.append(excursion_id)
+            elif not current.cyberlogic_fingerprint:
+                current.cyberlogic_fingerprint = fingerprint
+                baseline.append(current)
+            elif current.cyberlogic_fingerprint != fingerprint:
+                to_fetch.append(excursion_id)
+            else:
+                counts['unchanged'] += 1
+        counts['unchanged'] += len(baseline)
+        Excursion.objects.bulk_update(baseline, ['cyberlogic_fingerprint'], batch_size=ReferenceSyncService.BATCH_SIZE)
+
+        descriptions, errors = ReferenceSyncService.fetch_excursion_descriptions(to_fetch, progress=progress)
+        for excursion_id, error in errors.items():
+            logger.error(f'Could not fetch the description of excursion {excursion_id}: {error}')
+            counts['skipped'] += 1
+
+        # Writes go through save() so the listing/search signals fire; only new or changed rows get here
+        for excursion_id in to_fetch:
+            if excursion_id not in descriptions:
+                continue
+            excursion, response = remote[excursion_id], descriptions[excursion_id]
+            try:
+                description = response['Overview'][0]['Description']['MainDescription']
+                intro_image = response['Media']['DefaultImage']['MainUrl']
+            except (KeyError, IndexError, TypeError):
+                logger.error(f'Unexpected description response for excursion {excursion_id}: {str(response)[:200]}')
+                counts['skipped'] += 1
+                continue
+            values = {
+                'title': excursion['Name'],
+                'description': description,
+                'provider_id': provider_ids[excursion['Organizer_Name']],
+                'intro_image': intro_image,
+            }
+            current = local.get(excursion_id)
+            if current is None:
+                Excursion.objects.create(id=excursion_id, cyberlogic_fingerprint=fingerprints[excursion_id], **values)
+                counts['created'] += 1
+                continue
+            # Uploaded images are never replaced, even with overwrite
+            replaceable = ('title', 'description', 'provider_id') if overwrite else ()
+            changed = [
+                field for field, value in values.items()
+                if getattr(current, field) != value and (field in replaceable or not getattr(current, field))
+            ]
+            for field in changed:
+                setattr(current, field, values[field])
+            current.cyberlogic_fingerprint = fingerprints[excursion_id]
+            current.save(update_fields=changed + ['cyberlogic_fingerprint'])
+            counts['updated' if changed else 'unchanged'] += 1
+
+        if progress:
+            progress(len(remote), len(remote))
+        return counts
+
+    @staticmethod
+    def sync(kind, prune=False, progress=None, force=False, overwrite=False):
+        """
+        Run one of KINDS; returns the counts dict of that sync. `progress(processed, total)`
+        is called from time to time by syncs that work item by item. `force` and `overwrite`
+        only apply to excursions (see sync_excursions).
+        """
+        if kind not in ReferenceSyncService.KINDS:
+            raise ValueError(f'Unknown sync kind: {kind}')
+        if kind == 'excursions':
+            return ReferenceSyncService.sync_excursions(prune=prune, progress=progress, force=force, overwrite=overwrite)
+        return getattr(ReferenceSyncService, f'sync_{kind}')(prune=prune, progress=progress)
+
+    @staticmethod
+    def summary(label, counts):
+        """One-line result message for the dashboard sync buttons and the management command."""
+        skipped = f", {counts['skipped']} skipped" if counts.get('skipped') else ''
+        if not counts['created'] and not counts['updated']:
+            return f'{label} are up to date{skipped}.'
+        return (
+            f"Sync successful! {label}: {counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['removed']} no longer in Cyberlogic{skipped}."
+        )
+
+
+class SyncRunService:
+    """Runs Cyberlogic syncs as django-q tasks and records them as SyncRun rows."""
+
+    # A queued/running run older than this is assumed lost (worker killed) and no longer blocks new ones
+    STALE_AFTER = timedelta(hours=1)
+
+    @staticmethod
+    def start(kind, user=None, prune=False, force=False):
+        """
+        Queue a sync of `kind` and return its SyncRun. Returns the active run instead when
+        the same kind is already queued or running, so repeated clicks don't stack syncs.
+        """
+        from .models import SyncRun
+        if kind not in ReferenceSyncService.KINDS:
+            raise ValueError(f'Unknown sync kind: {kind}')
+        active = SyncRun.objects.filter(
+            kind=kind,
+            status__in=SyncRun.ACTIVE_STATUSES,
+            created_at__gte=timezone.now() - SyncRunService.STALE_AFTER,
+        ).first()
+        if active:
+            return active
+        run = SyncRun.objects.create(kind=kind, triggered_by=user if user and user.is_authenticated else None)
+
+        def _enqueue():
+            try:
+                from django_q.tasks import async_task
+                async_task('main.tasks.run_sync_task', run.pk, prune=prune, force=force)
+            except Exception as e:
+                logger.exception("Failed to enqueue %s sync run #%s: %s", kind, run.pk, e)
+                SyncRun.objects.filter(pk=run.pk).update(
+                    status='failed', error=f'Could not queue the sync: {e}', finished_at=timezone.now(),
+                )
+
+        transaction.on_commit(_enqueue)
+        return run
+
+    @staticmethod
+    def execute(run, prune=False, force=False, overwrite=False):
+        """Run a SyncRun in the current process, recording progress, counts, duration and errors."""
+        from .models import SyncRun
+        run.status = 'running'
+        run.started_at = timezone.now()
+        run.save(update_fields=['status', 'started_at'])
+
+        def progress(processed, total):
+            SyncRun.objects.filter(pk=run.pk).update(processed=processed, total=total)
+
+        try:
+            counts = ReferenceSyncService.sync(run.kind, prune=prune, progress=progress, force=force, overwrite=overwrite)
+        except Exception as e:
+            logger.exception("%s sync run #%s failed: %s", run.kind, run.pk, e)
+            run.status = 'failed'
+            run.error = str(e)
+            run.message = f'Error syncing {run.get_kind_display().lower()}: {e}'[:255]
+        else:
+            run.status = 'succeeded'
+            run.created_count = counts['created']
+            run.updated_count = counts['updated']
+            run.unchanged_count = counts['unchanged']
+            run.removed_count = counts['removed']
+            run.processed = run.total = sum(counts.values()) - counts['removed']
+            run.message = ReferenceSyncService.summary(run.get_kind_display(), counts)[:255]
+        run.finished_at = timezone.now()
+        run.save()
+        return run
+
+    @staticmethod
+    def run_now(kind, prune=False, force=False, overwrite=False):
+        """Create and execute a run synchronously (management command / scheduled runs)."""
+        from .models import SyncRun
+        return SyncRunService.execute(SyncRun.objects.create(kind=kind), prune=prune, force=force, overwrite=overwrite)
+
+
+def client_ip(request):
+    """
+    Client address for per-IP limits. Behind nginx (proxy_params) REMOTE_ADDR is the proxy,
+    so the header named by CLIENT_IP_HEADER (default X-Real-IP) is used when present; set it
+    to None when the app is reachable without the proxy, as clients could forge the header.
+    """
+    from django.conf import settings
+    header = getattr(settings, 'CLIENT_IP_HEADER', 'HTTP_X_REAL_IP')
+    ip = request.META.get(header, '') if header else ''
+    return ip.split(',')[-1].strip() or request.META.get('REMOTE_ADDR') or 'unknown'
+
+
+class VoucherLookupUnavailable(ValidationError):
+    """The Cyberlogic API could not be reached; unlike "not found", this is not cached."""
+
+
+class VoucherService:
+    """Service class for handling voucher/reservation authentication and validation."""
+
+    # Lookup cache (see authenticate_voucher); the settings in brackets override these
+    FOUND_CACHE_TIMEOUT = 300       # [VOUCHER_CACHE_TIMEOUT] code -> pk of found reservations
+    MISSING_CACHE_TIMEOUT = 60      # [VOUCHER_NEGATIVE_CACHE_TIMEOUT] codes the API didn't resolve
+    LOOKUP_LOCK_TIMEOUT = 30        # minimum; raised to the API client's worst case (see _fetch_once)
+    LOOKUP_WAIT_SECONDS = 10        # [VOUCHER_LOOKUP_WAIT_SECONDS] how long others wait for it
+    # Per-IP limit on retrive_voucher / check_voucher
+    RATE_LIMIT = 20                 # [VOUCHER_RATE_LIMIT] lookups per window
+    RATE_LIMIT_WINDOW = 60          # [VOUCHER_RATE_LIMIT_WINDOW] seconds
+    # last_used_at is written at most this often per reservation
+    LAST_USED_RESOLUTION = timedelta(minutes=5)
+
+    @staticmethod
+    def _cache_key(kind, voucher_code):
+        import hashlib
+        # Codes are user input; hashing keeps keys short and valid for every cache backend
+        digest = hashlib.md5(str(voucher_code).encode('utf-8')).hexdigest()
+        return f'voucher:{kind}:{digest}'
+
+    @staticmethod
+    def forget(voucher_code):
+        """Drop cached lookups of a code (called when its Reservation is saved or deleted)."""
+        from django.core.cache import cache
+        cache.delete_many([
+            VoucherService._cache_key('found', voucher_code),
+            VoucherService._cache_key('missing', voucher_code),
+        ])
+
+    @staticmethod
+    def rate_limited(request):
+        """Count a voucher lookup for the client IP; True once it is over the limit for this window."""
+        import time
+        from django.conf import settings
+        from django.core.cache import cache
+
+        limit = getattr(settings, 'VOUCHER_RATE_LIMIT', VoucherService.RATE_LIMIT)
+        window = getattr(settings, 'VOUCHER_RATE_LIMIT_WINDOW', VoucherService.RATE_LIMIT_WINDOW)
+        key = f'voucher:rate:{client_ip(request)}:{int(time.time() // window)}'
+        cache.add(key, 0, window)
         try:
-            # Only select_related on client_profile if it exists (migrations may not be run)
+            count = cache.incr(key)
+        except ValueError:
+            # Expired between add and incr
+            cache.set(key, 1, window)
+            count = 1
+        if count > limit:
+            if count == limit + 1:
+                logger.warning(f"Voucher lookups rate limited for {client_ip(request)}")
+            return True
+        return False
+
+    @staticmethod
+    def _get_local(**lookup):
+        """Reservation matching the lookup (pk or voucher_id) from the database, or None."""
+        try:
+            return Reservation.objects.select_related(
+                'pickup_group', 'pickup_point', 'hotel', 'client_profile__user'
+            ).get(**lookup)
+        except Reservation.DoesNotExist:
+            return None
+
+    @staticmethod
+    def _touch(reservation):
+        """Record use of the voucher; a queryset update, so the Reservation signals don't run."""
+        now = timezone.now()
+        if reservation.last_used_at and now - reservation.last_used_at < VoucherService.LAST_USED_RESOLUTION:
+            return False
+        Reservation.objects.filter(pk=reservation.pk).update(last_used_at=now)
+        reservation.last_used_at = now
+        return True
+
+    @staticmethod
+    def authenticate_voucher(voucher_code):
+        """
+        Main entry point - authenticate voucher and get or create reservation.
+
+        The pk of found reservations is cached for VOUCHER_CACHE_TIMEOUT (the row itself is
+        always re-read, so status, profile and user changes apply at once) and codes the API
+        could not resolve for VOUCHER_NEGATIVE_CACHE_TIMEOUT, so a mistyped code or a bot
+        retrying it doesn't call the API every time. Saving or deleting the Reservation drops
+        both.
+        
+        Args:
+            voucher_code: The booking ID / voucher code
+            
+        Returns:
+            tuple: (reservation, created) where created is True if fetched from API
+            
+        Raises:
+            ValidationError: If voucher is invalid or expired
+        """
+        from django.conf import settings
+        from django.core.cache import cache
+
+        if not voucher_code:
+            raise ValidationError('Voucher code is required.')
+
+        found_key = VoucherService._cache_key('found', voucher_code)
+        reservation_pk = cache.get(found_key)
+        reservation = VoucherService._get_local(pk=reservation_pk) if reservation_pk else None
+        # A queryset update may have changed the code since the pk was cached
+        if reservation is not None and reservation.voucher_id != str(voucher_code):
+            reservation = None
+        if reservation is None:
+            reservation = VoucherService._get_local(voucher_id=voucher_code)
+            if reservation is not None:
+                cache.set(found_key, reservation.pk, getattr(settings, 'VOUCHER_CACHE_TIMEOUT', VoucherService.FOUND_CACHE_TIMEOUT))
+
+        if reservation is not None:
+            # Checkout dates are not enforced yet; only the status is
+            if reservation.status != 'active':
+                raise ValidationError('This reservation is not active.')
+            logger.info(f"Voucher {voucher_code} found in database")
+            VoucherService._touch(reservation)
+            return reservation, False
+
+        missing = cache.get(VoucherService._cache_key('missing', voucher_code))
+        if missing is not None:
+            logger.info(f"Voucher {voucher_code} recently not found, not asking the API again")
+            raise ValidationError(missing)
+
+        logger.info(f"Voucher {voucher_code} not in database, fetching from API")
+        return VoucherService._fetch_once(voucher_code)
+
+    @staticmethod
+    def _fetch_once(voucher_code, retried=False):
+        """
+        Single-flight _create_from_api: the first request for a code takes a cache lock and
+        calls the API; concurrent requests for the same code wait for its result instead of
+        making their own call (and racing to create the same Reservation). A waiter whose
+        lookup is still running after VOUCHER_LOOKUP_WAIT_SECONDS is told to try again; the
+        lock outlives the API client's worst-case call, so it only expires if its holder died.
+        """
+        import time
+        from django.conf import settings
+        from django.core.cache import cache
+        from .cyber_api import get_client
+
+        found_key = VoucherService._cache_key('found', voucher_code)
+        missing_key = VoucherService._cache_key('missing', voucher_code)
+        lock_key = VoucherService._cache_key('lookup', voucher_code)
+        lock_timeout = max(VoucherService.LOOKUP_LOCK_TIMEOUT, int(get_client().max_request_seconds()) + 5)
+
+        if cache.add(lock_key, 1, lock_timeout):
             try:
-                reservation = Reservation.objects.select_related(
-                    'pickup_group', 'pickup_point', 'hotel', 'client_profile'
-                ).get(voucher_id=voucher_code)
-            except Exception:
-                # Fallback without client_profile if field doesn't exist
-                reservation = Reservation.objects.select_related(
-                    'pickup_group', 'pickup_point', 'hotel'
-                ).get(voucher_id=voucher_code)
-            
-            # Validate reservation status and expiration
-            from django.utils import timezone
-            from datetime import date, datetime
-            
-            # Check status field (this always exists)
-            if reservation.status != 'active':
-                raise ValidationError('This reservation is not active.')
-            
-            # Check if expired (check_out date has passed)
-            # Handle both date objects and strings
-            checkout_date = reservation.check_out
-            if isinstance(checkout_date, str):
                 try:
-                    checkout_date = datetime.strptime(checkout_date, '%Y-%m-%d').date()
-                except:
-                    checkout_date = datetime.fromisoformat(checkout_date).date()
-            
-            # if checkout_date < timezone.now().date():
-            #     raise ValidationError('This voucher has expired.')
-            
-            logger.info(f"Voucher {voucher_code} found in database")
-            
-            # Update last_used_at if field exists in database
-            try:
-                if hasattr(reservation, 'last_used_at'):
-                    reservation.last_used_at = timezone.now()
-                    reservation.save(update_fields=['last_used_at'])
-            except Exception as e:
-                # Field doesn't exist in database yet (migrations not run)
-                logger.debug(f"Could not update last_used_at (migrations may not be applied): {str(e)}")
-                pass
-            
+                    reservation, created = VoucherService._create_from_api(voucher_code)
+                except VoucherLookupUnavailable:
+                    raise
+                except ValidationError as e:
+                    cache.set(missing_key, e.messages[0],
+                              getattr(settings, 'VOUCHER_NEGATIVE_CACHE_TIMEOUT', VoucherService.MISSING_CACHE_TIMEOUT))
+                    raise
+                cache.set(found_key, reservation.pk, getattr(settings, 'VOUCHER_CACHE_TIMEOUT', VoucherService.FOUND_CACHE_TIMEOUT))
+                return reservation, created
+            finally:
+                cache.delete(lock_key)
+
+        deadline = time.monotonic() + getattr(settings, 'VOUCHER_LOOKUP_WAIT_SECONDS', VoucherService.LOOKUP_WAIT_SECONDS)
+        while cache.get(lock_key) is not None and time.monotonic() < deadline:
+            time.sleep(0.1)
+        if cache.get(lock_key) is not None:
+            raise VoucherLookupUnavailable('Your voucher is still being checked. Please try again in a moment.')
+        reservation = VoucherService._get_local(voucher_id=voucher_code)
+        if reservation is not None:
             return reservation, False
-            
-        except Reservation.DoesNotExist:
-            # Not in database, fetch from API
-            logger.info(f"Voucher {voucher_code} not in database, fetching from API")
-            return VoucherService._create_from_api(voucher_code)
+        missing = cache.get(missing_key)
+        if missing is not None:
+            raise ValidationError(missing)
+        # The other lookup ended without an answer (API unreachable): take the lock and try once more
+        if retried:
+            raise VoucherLookupUnavailable('Vouchers cannot be checked right now. Please try again in a moment.')
+        return VoucherService._fetch_once(voucher_code, retried=True)
     
     @staticmethod
     @transaction.atomic
@@ -813,6 +2437,8 @@ class VoucherService:
             logger.error(f"Error creating reservation from API for {voucher_code}: {str(e)}")
             if isinstance(e, ValidationError):
                 raise
+            if isinstance(e, requests.exceptions.RequestException):
+                raise VoucherLookupUnavailable(f'Error retrieving voucher: {str(e)}')
             raise ValidationError(f'Error retrieving voucher: {str(e)}')
     
     @staticmethod
@@ -1260,14 +2886,338 @@ class TransportGroupService:
         return blocks
 
 
+class ReferralStatsService:
+    """Maintains ReferralCodeStats and annotates agents with their referral totals."""
+
+    @staticmethod
+    def refresh(referral_code_ids=None):
+        """Recompute the stats of the given referral codes (all when None) in one grouped query."""
+        from django.db.models import Count, Q, Sum
+        from .models import ReferralCode, ReferralCodeStats
+
+        codes = ReferralCode.objects.all()
+        if referral_code_ids is not None:
+            codes = codes.filter(pk__in=[pk for pk in referral_code_ids if pk])
+        completed = Q(bookings__payment_status='completed')
+        stats = [
+            ReferralCodeStats(
+                referral_code_id=row['pk'],
+                bookings_count=row['bookings_total'],
+                total_price_sum=row['price_total'] or 0,
+                completed_bookings_count=row['completed_total'],
+                completed_revenue=row['completed_price_total'] or 0,
+            )
+            for row in codes.values('pk').annotate(
+                bookings_total=Count('bookings'),
+                price_total=Sum('bookings__total_price'),
+                completed_total=Count('bookings', filter=completed),
+                completed_price_total=Sum('bookings__total_price', filter=completed),
+            ).order_by()
+        ]
+        ReferralCodeStats.objects.bulk_create(
+            stats,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['referral_code'],
+            update_fields=['bookings_count', 'total_price_sum', 'completed_bookings_count', 'completed_revenue', 'updated_at'],
+        )
+        return len(stats)
+
+    @staticmethod
+    def schedule_refresh(*referral_code_ids):
+        """Refresh the given codes' stats after the current transaction commits."""
+        referral_code_ids = [pk for pk in referral_code_ids if pk]
+        if not referral_code_ids:
+            return
+
+        def _refresh():
+            try:
+                ReferralStatsService.refresh(referral_code_ids)
+            except Exception as e:
+                logger.error(f"Failed to refresh referral stats for codes {referral_code_ids}: {e}")
+
+        transaction.on_commit(_refresh)
+
+    @staticmethod
+    def annotate_agents(agents):
+        """
+        Annotate a UserProfile queryset with referral_bookings, referral_revenue (all bookings,
+        total_price), active_referral_codes and the latest active code (latest_referral_code,
+        latest_referral_code_expires_at), as correlated subqueries of a single query.
+        """
+        from django.db.models import Count, DecimalField, IntegerField, OuterRef, Subquery, Sum, Value
+        from django.db.models.functions import Coalesce
+        from .models import ReferralCode, ReferralCodeStats
+
+        stats = ReferralCodeStats.objects.filter(referral_code__agent=OuterRef('pk')).values('referral_code__agent')
+        active_codes = ReferralCode.objects.filter(
+            agent=OuterRef('pk'),
+            status='active',
+            expires_at__gt=timezone.now(),
+        )
+        latest_code = active_codes.order_by('-created_at')
+        return agents.annotate(
+            referral_bookings=Coalesce(
+                Subquery(stats.annotate(total=Sum('bookings_count')).values('total')[:1]),
+                Value(0), output_field=IntegerField(),
+            ),
+            referral_revenue=Coalesce(
+                Subquery(stats.annotate(total=Sum('total_price_sum')).values('total')[:1]),
+                Value(0), output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            active_referral_codes=Coalesce(
+                Subquery(active_codes.order_by().values('agent').annotate(total=Count('pk')).values('total')[:1]),
+                Value(0), output_field=IntegerField(),
+            ),
+            latest_referral_code=Subquery(latest_code.values('code')[:1]),
+            latest_referral_code_expires_at=Subquery(latest_code.values('expires_at')[:1]),
+        )
+
+
+class RevenueFactService:
+    """Maintains the DailyRevenueFact rollup (completed bookings per day and dimension)."""
+
+    # Markers younger than this survive a refresh and are picked up by the next one
+    MARKER_GRACE = timedelta(seconds=30)
+
+    # Dimension columns of a fact row, in Booking lookup terms and DailyRevenueFact terms
+    DIMENSIONS = (
+        'excursion_id', 'provider_id', 'agent_id', 'representative_id',
+        'channel', 'payment_type', 'partial_method',
+    )
+    MEASURES = (
+        'revenue', 'bookings', 'discount_total', 'discounted_bookings', 'partial_total', 'partial_bookings',
+    )
+
+    @staticmethod
+    def revenue_expression():
+        from django.db.models import F, Value, DecimalField, ExpressionWrapper
+        from django.db.models.functions import Coalesce
+        return ExpressionWrapper(
+            Coalesce(F('total_price'), Value(0)) + Coalesce(F('partial_paid'), Value(0)),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        )
+
+    @staticmethod
+    def live_rows(bookings, by_day=False):
+        """
+        Group a completed-Booking queryset into fact-shaped rows (dimensions, display names, measures).
+        One grouped query; with by_day the booking day is part of the key.
+        """
+        from django.db.models import Sum, Count, Q, F, Value, Case, When, DecimalField
+        from django.db.models.fields import CharField, IntegerField
+        from django.db.models.functions import Coalesce, TruncDate
+
+        is_rep = Q(user__profile__role='representative')
+        has_partial = Q(partial_paid__isnull=False) & ~Q(partial_paid=0)
+        has_discount = Q(referral_discount_amount__isnull=False) & ~Q(referral_discount_amount=0)
+        zero = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+        rows = bookings.annotate(
+            provider_id=F('excursion__provider_id'),
+            agent_id=F('referral_code__agent_id'),
+            representative_id=Case(When(is_rep, then=F('user__profile__id')), default=None, output_field=IntegerField()),
+            channel=Case(
+                When(referral_code__agent__isnull=False, then=Value('Agent')),
+                When(is_rep, then=Value('Reps')),
+                default=Value('Direct'),
+                output_field=CharField(),
+            ),
+            payment_type=Case(
+                When(jcc_order_id__isnull=False, jcc_order_id__gt='', then=Value('Card')),
+                default=Value('Cash'),
+                output_field=CharField()
+            ),
+            partial_method=Case(
+                When(has_partial, then=Coalesce(F('partial_paid_method'), Value(''))),
+                default=Value(''),
+                output_field=CharField(),
+            ),
+            excursion_title=F('excursion__title'),
+            provider_name=F('excursion__provider__name'),
+            agent_name=F('referral_code__agent__name'),
+            representative_name=Case(When(is_rep, then=F('user__profile__name')), default=None, output_field=CharField()),
+        )
+        group_by = list(RevenueFactService.DIMENSIONS) + [
+            'excursion_title', 'provider_name', 'agent_name', 'representative_name',
+        ]
+        if by_day:
+            rows = rows.annotate(day=TruncDate('created_at'))
+            group_by.insert(0, 'day')
+        return list(rows.values(*group_by).annotate(
+            revenue=Coalesce(Sum(RevenueFactService.revenue_expression()), zero),
+            bookings=Count('id'),
+            discount_total=Coalesce(Sum('referral_discount_amount'), zero),
+            discounted_bookings=Count('id', filter=has_discount),
+            partial_total=Coalesce(Sum('partial_paid', filter=has_partial), zero),
+            partial_bookings=Count('id', filter=has_partial),
+        ).order_by())
+
+    @staticmethod
+    def fact_rows(days_queryset):
+        """Fact rows of a DailyRevenueFact queryset summed across days (one grouped query)."""
+        from django.db.models import Sum, F
+        return list(days_queryset.annotate(
+            excursion_title=F('excursion__title'),
+            provider_name=F('provider__name'),
+            agent_name=F('agent__name'),
+            representative_name=F('representative__name'),
+        ).values(
+            *RevenueFactService.DIMENSIONS,
+            'excursion_title', 'provider_name', 'agent_name', 'representative_name',
+        ).annotate(
+            **{measure: Sum(measure) for measure in RevenueFactService.MEASURES}
+        ).order_by())
+
+    @staticmethod
+    def mark_dirty(day):
+        """Flag a booking day for re-aggregation (served live until then)."""
+        from .models import RevenueFactDirtyDay
+        if day:
+            # Re-marking moves marked_at forward, so a refresh already under way keeps the marker
+            RevenueFactDirtyDay.objects.bulk_create(
+                [RevenueFactDirtyDay(day=day)],
+                update_conflicts=True, unique_fields=['day'], update_fields=['marked_at'],
+            )
+
+    @staticmethod
+    def refresh_days(days):
+        """Rebuild the fact rows of the given booking days. Returns the number of rows written."""
+        from .models import DailyRevenueFact, RevenueFactDirtyDay
+        days = sorted(set(days))
+        if not days:
+            return 0
+        # Markers set after this point may belong to changes the aggregation below doesn't see.
+        # The margin covers bookings marked before it but committed after the read.
+        cutoff = timezone.now() - RevenueFactService.MARKER_GRACE
+
+        bookings = Booking.objects.filter(
+            payment_status='completed',
+            created_at__date__in=days,
+        )
+        facts = [
+            DailyRevenueFact(
+                day=row['day'],
+                **{dimension: row[dimension] for dimension in RevenueFactService.DIMENSIONS},
+                **{measure: row[measure] for measure in RevenueFactService.MEASURES},
+            )
+            for row in RevenueFactService.live_rows(bookings, by_day=True)
+        ]
+        # The markers go with the old facts, so readers never see those facts as current
+        with transaction.atomic():
+            DailyRevenueFact.objects.filter(day__in=days).delete()
+            DailyRevenueFact.objects.bulk_create(facts, batch_size=500)
+            RevenueFactDirtyDay.objects.filter(day__in=days, marked_at__lt=cutoff).delete()
+        return len(facts)
+
+    @staticmethod
+    def refresh_pending(limit=60, recent_days=2):
+        """
+        Refresh dirty days plus the last `recent_days` closed days (bulk .update() calls
+        on bookings skip the signals that mark days dirty). Returns (days, rows).
+        """
+        from .models import RevenueFactDirtyDay
+        today = timezone.localdate()
+        days = set(
+            RevenueFactDirtyDay.objects.filter(day__lt=today).order_by('day').values_list('day', flat=True)[:limit]
+        )
+        days.update(today - timedelta(days=offset) for offset in range(1, recent_days + 1))
+        rows = 0
+        for day in sorted(days):
+            rows += RevenueFactService.refresh_days([day])
+        return len(days), rows
+
+
+class AnalyticsCacheService:
+    """
+    Result cache for the revenue and excursion analytics dashboards.
+    
+    Results are keyed by the date range and a per-day generation counter for every day in
+    it, so a booking change only orphans the cached ranges that contain its day. Ranges
+    reaching today (and every range when a read replica is configured) expire after
+    ANALYTICS_CACHE_TIMEOUT seconds (day rollover, bulk updates that skip signals, replica
+    lag); ranges ending before today after ANALYTICS_CLOSED_CACHE_TIMEOUT.
+
+    Only Booking saves/deletes invalidate. Renaming an excursion, provider or rep, moving an
+    excursion to another provider or a rep's profile changes show in closed ranges once
+    ANALYTICS_CLOSED_CACHE_TIMEOUT has passed.
+    """
+
+    CACHE_TIMEOUT = 120
+    CLOSED_CACHE_TIMEOUT = 60 * 60 * 24
+    # Day axis per dashboard: revenue is bucketed by booking created_at, analytics by booking date
+    CREATED = 'created'
+    SERVICE_DATE = 'date'
+
+    @staticmethod
+    def _day_key(axis, day):
+        return f'analytics:day_generation:{axis}:{day.isoformat()}'
+
+    @staticmethod
+    def day_generations(axis, start_date, end_date):
+        """Generation counters of every day in the range, fetched in one cache round trip."""
+        from django.core.cache import cache
+        keys = [
+            AnalyticsCacheService._day_key(axis, start_date + timedelta(days=offset))
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        generations = cache.get_many(keys)
+        return [generations.get(key) or 0 for key in keys]
+
+    @staticmethod
+    def invalidate_day(axis, day):
+        """Bump the generation of one day once the surrounding transaction commits."""
+        if day:
+            key = AnalyticsCacheService._day_key(axis, day)
+            transaction.on_commit(lambda: bump_cache_generation(key))
+
+    @staticmethod
+    def get_or_compute(name, axis, start_date, end_date, compute, extra_generations=()):
+        import hashlib
+        from django.conf import settings
+        from django.core.cache import cache
+
+        generations = AnalyticsCacheService.day_generations(axis, start_date, end_date) + list(extra_generations)
+        key = 'analytics:{name}:{start}:{end}:{digest}'.format(
+            name=name,
+            start=start_date.isoformat(),
+            end=end_date.isoformat(),
+            digest=hashlib.md5(','.join(map(str, generations)).encode('ascii')).hexdigest(),
+        )
+        data = cache.get(key)
+        if data is None:
+            data = compute(start_date, end_date)
+            # A replica may lag the invalidation that orphaned the old entry, so don't keep its results forever
+            if end_date < timezone.localdate() and replica_alias() is None:
+                timeout = getattr(settings, 'ANALYTICS_CLOSED_CACHE_TIMEOUT', AnalyticsCacheService.CLOSED_CACHE_TIMEOUT)
+            else:
+                timeout = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', AnalyticsCacheService.CACHE_TIMEOUT)
+            cache.set(key, data, timeout)
+        return data
+
+
 class RevenueAnalyticsService:
     """Service class for handling revenue analytics operations."""
     
     @staticmethod
     def get_revenue_data(start_date, end_date):
+        """Cached compute_revenue_data (see AnalyticsCacheService)."""
+        return AnalyticsCacheService.get_or_compute(
+            'revenue', AnalyticsCacheService.CREATED, start_date, end_date,
+            RevenueAnalyticsService.compute_revenue_data,
+        )
+    
+    @staticmethod
+    @using_replica()
+    def compute_revenue_data(start_date, end_date):
         """
         Process revenue analytics data for a date range.
         
+        Closed days come from the DailyRevenueFact rollup; today and days flagged dirty
+        since their last refresh are aggregated live from Booking. Ranges with no
+        rollup days to read (e.g. "today") and REVENUE_FACTS_ENABLED=False go straight
+        to get_live_revenue_data.
+        
         Args:
             start_date: Starting date of the range
             end_date: Ending date of the range
@@ -1275,204 +3225,315 @@ class RevenueAnalyticsService:
         Returns:
             dict: Comprehensive revenue analytics data
         """
-        from django.db.models import Sum, Count, Q, F, Value, DecimalField, ExpressionWrapper, Case, When
-        from django.db.models.functions import Coalesce
-        from django.db.models.fields import CharField
-        from decimal import Decimal
+        from django.conf import settings
+        from .models import DailyRevenueFact, RevenueFactDirtyDay
         
-        # Get all completed bookings in the date range (booking created date)
-        bookings = Booking.objects.filter(
-            payment_status='completed',
-            created_at__date__gte=start_date,
-            created_at__date__lte=end_date
-        ).select_related(
-            'excursion_availability',
-            'excursion_availability__excursion',
-            'excursion_availability__excursion__provider',
-            'excursion',
-            'excursion__provider',
-            'user',
-            'user__profile',
-            'referral_code',
-            'referral_code__agent'
-        )
+        live_bookings = Booking.objects.filter(payment_status='completed')
+        if not getattr(settings, 'REVENUE_FACTS_ENABLED', True):
+            return RevenueAnalyticsService.get_live_revenue_data(
+                live_bookings.filter(**RevenueAnalyticsService.created_between(start_date, end_date))
+            )
         
-        revenue_expression = ExpressionWrapper(
-            Coalesce(F('total_price'), Value(0)) + Coalesce(F('partial_paid'), Value(0)),
-            output_field=DecimalField(max_digits=12, decimal_places=2)
+        today = timezone.localdate()
+        live_days = set(
+            RevenueFactDirtyDay.objects.filter(day__gte=start_date, day__lte=end_date).values_list('day', flat=True)
         )
+        if start_date <= today <= end_date:
+            live_days.add(today)
+        closed_days = (min(end_date, today - timedelta(days=1)) - start_date).days + 1
+        if closed_days <= len([day for day in live_days if day < today]):
+            return RevenueAnalyticsService.get_live_revenue_data(
+                live_bookings.filter(**RevenueAnalyticsService.created_between(start_date, end_date))
+            )
         
-        # Total revenue metrics
-        total_revenue = bookings.aggregate(total=Sum(revenue_expression))['total'] or Decimal('0')
-        total_bookings = bookings.count()
-        average_booking_value = (
-            (total_revenue / total_bookings).quantize(Decimal('0.01'))
-            if total_bookings
-            else Decimal('0')
+        rows = RevenueFactService.fact_rows(
+            DailyRevenueFact.objects.filter(day__gte=start_date, day__lte=end_date, day__lt=today).exclude(day__in=live_days)
         )
-        
-        # Discounts applied on bookings in this date range
-        total_discounts = bookings.aggregate(
-            total=Sum('referral_discount_amount')
-        )['total'] or Decimal('0')
-        discounted_bookings_count = bookings.exclude(
-            Q(referral_discount_amount__isnull=True) | Q(referral_discount_amount=0)
-        ).count()
-        
-        # Partial payments
-        partial_payments = bookings.exclude(
-            Q(partial_paid__isnull=True) | Q(partial_paid=0)
-        ).aggregate(
-            total=Sum('partial_paid'),
-            count=Count('id')
+        if live_days:
+            rows += RevenueFactService.live_rows(live_bookings.filter(created_at__date__in=live_days))
+        return RevenueAnalyticsService.summarize(rows)
+
+    SERIES_GRANULARITIES = ('day', 'week', 'month')
+
+    @staticmethod
+    def get_revenue_series(start_date, end_date, granularity='day'):
+        """Cached compute_revenue_series (see AnalyticsCacheService)."""
+        return AnalyticsCacheService.get_or_compute(
+            f'revenue_series_{granularity}', AnalyticsCacheService.CREATED, start_date, end_date,
+            lambda start, end: RevenueAnalyticsService.compute_revenue_series(start, end, granularity),
         )
-        total_partial_payments = partial_payments['total'] or Decimal('0')
-        partial_payments_count = partial_payments['count'] or 0
+
+    @staticmethod
+    @using_replica()
+    def compute_revenue_series(start_date, end_date, granularity='day'):
+        """
+        Zero-filled revenue/booking-count series for the range, one entry per day, week
+        (starting Monday) or month: [{'date': bucket start, 'revenue': Decimal, 'bookings': int}].
         
-        # Payment method breakdown from Booking: Card (has jcc_order_id) vs Cash
-        payment_method_breakdown = []
-        payment_methods_data = bookings.annotate(
-            payment_type=Case(
+        Daily totals come from one grouped query on the rollup plus one TruncDate grouped
+        query on Booking for live days; weeks and months are summed from the daily series.
+        """
+        from django.conf import settings
+        from django.db.models import Sum, Count
+        from django.db.models.functions import TruncDate
+        from decimal import Decimal
+        from .models import DailyRevenueFact, RevenueFactDirtyDay
+        
+        if granularity not in RevenueAnalyticsService.SERIES_GRANULARITIES:
+            raise ValueError(f'Unknown granularity: {granularity}')
+        
+        live_bookings = Booking.objects.filter(payment_status='completed')
+        totals = {}
+        
+        def add(rows):
+            for row in rows:
+                revenue, bookings = totals.get(row['day'], (Decimal('0'), 0))
+                totals[row['day']] = (revenue + (row['revenue'] or Decimal('0')), bookings + (row['bookings'] or 0))
+        
+        def live_totals(bookings):
+            return bookings.annotate(day=TruncDate('created_at')).values('day').annotate(
+                revenue=Sum(RevenueFactService.revenue_expression()),
+                bookings=Count('id'),
+            ).order_by()
+        
+        if getattr(settings, 'REVENUE_FACTS_ENABLED', True):
+            today = timezone.localdate()
+            live_days = set(
+                RevenueFactDirtyDay.objects.filter(day__gte=start_date, day__lte=end_date).values_list('day', flat=True)
+            )
+            if start_date <= today <= end_date:
+                live_days.add(today)
+            add(DailyRevenueFact.objects.filter(
+                day__gte=start_date, day__lte=end_date, day__lt=today
+            ).exclude(day__in=live_days).values('day').annotate(
+                revenue=Sum('revenue'),
+                bookings=Sum('bookings'),
+            ).order_by())
+            if live_days:
+                add(live_totals(live_bookings.filter(created_at__date__in=live_days)))
+        else:
+            add(live_totals(live_bookings.filter(**RevenueAnalyticsService.created_between(start_date, end_date))))
+        
+        series = []
+        buckets = {}
+        current_date = start_date
+        while current_date <= end_date:
+            if granularity == 'week':
+                bucket_date = current_date - timedelta(days=current_date.weekday())
+            elif granularity == 'month':
+                bucket_date = current_date.replace(day=1)
+            else:
+                bucket_date = current_date
+            bucket = buckets.get(bucket_date)
+            if bucket is None:
+                bucket = buckets[bucket_date] = {'date': bucket_date, 'revenue': Decimal('0'), 'bookings': 0}
+                series.append(bucket)
+            revenue, bookings = totals.get(current_date, (Decimal('0'), 0))
+            bucket['revenue'] += revenue
+            bucket['bookings'] += bookings
+            current_date += timedelta(days=1)
+        return series
+
+    @staticmethod
+    def created_between(start_date, end_date):
+        """
+        Booking filter kwargs for created_at on [start_date, end_date] local days, as a
+        datetime range (created_at__date needs a per-row conversion on SQLite).
+        """
+        start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+        end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+        return {'created_at__gte': start, 'created_at__lt': end}
+
+    @staticmethod
+    def get_live_revenue_data(bookings):
+        """
+        Revenue dashboard data straight from a completed-Booking queryset.
+        
+        The scalar KPIs and channel splits come from one conditional aggregate(); each
+        breakdown is one grouped query (top-10 ones LIMITed in the database).
+        """
+        from django.db.models import Sum, Count, Q, Value, DecimalField, Case, When
+        from django.db.models.fields import CharField
+        from django.db.models.functions import Coalesce
+        from decimal import Decimal
+        
+        revenue_expression = RevenueFactService.revenue_expression()
+        zero = Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))
+        has_partial = Q(partial_paid__isnull=False) & ~Q(partial_paid=0)
+        has_discount = Q(referral_discount_amount__isnull=False) & ~Q(referral_discount_amount=0)
+        is_agent = Q(referral_code__agent__isnull=False)
+        is_rep = Q(referral_code__agent__isnull=True, user__profile__role='representative')
+        is_direct = Q(referral_code__agent__isnull=True) & ~Q(user__profile__role='representative')
+        
+        def revenue(condition=None):
+            return Coalesce(Sum(revenue_expression, filter=condition), zero)
+        
+        totals = bookings.aggregate(
+            total_revenue=revenue(),
+            total_bookings=Count('id'),
+            total_discounts=Coalesce(Sum('referral_discount_amount'), zero),
+            discounted_bookings_count=Count('id', filter=has_discount),
+            total_partial_payments=Coalesce(Sum('partial_paid', filter=has_partial), zero),
+            partial_payments_count=Count('id', filter=has_partial),
+            orphaned_revenue=revenue(Q(excursion__isnull=True)),
+            orphaned_bookings_count=Count('id', filter=Q(excursion__isnull=True)),
+            agent_revenue=revenue(is_agent),
+            agent_bookings=Count('id', filter=is_agent),
+            reps_revenue=revenue(is_rep),
+            reps_bookings=Count('id', filter=is_rep),
+            direct_revenue=revenue(is_direct),
+            direct_bookings=Count('id', filter=is_direct),
+        )
+        total_revenue = totals['total_revenue']
+        total_bookings = totals['total_bookings']
+        
+        def grouped(queryset, *fields, limit=None):
+            rows = queryset.values(*fields).annotate(
+                revenue=revenue(),
+                booking_count=Count('id'),
+            ).order_by('-revenue')
+            return rows[:limit] if limit else rows
+        
+        payment_method_breakdown = [
+            {'payment_method': item['payment_type'] or 'Unknown', 'revenue': item['revenue'], 'bookings': item['booking_count']}
+            for item in grouped(bookings.annotate(payment_type=Case(
                 When(jcc_order_id__isnull=False, jcc_order_id__gt='', then=Value('Card')),
                 default=Value('Cash'),
                 output_field=CharField()
-            )
-        ).values('payment_type').annotate(
-            revenue=Sum(revenue_expression),
-            booking_count=Count('id')
-        ).order_by('-revenue')
-        
-        for item in payment_methods_data:
-            payment_method_breakdown.append({
-                'payment_method': item['payment_type'] or 'Unknown',
-                'revenue': item['revenue'],
-                'bookings': item['booking_count']
-            })
-        
-        payment_methods_total = total_revenue
+            )), 'payment_type')
+        ]
         
-        # Partial payment method breakdown (bookings)
-        partial_method_breakdown = []
-        partial_methods_data = bookings.exclude(
-            Q(partial_paid__isnull=True) | Q(partial_paid=0)
-        ).values(
-            'partial_paid_method'
-        ).annotate(
-            revenue=Sum('partial_paid'),
-            booking_count=Count('id')
-        ).order_by('-revenue')
-        
-        for item in partial_methods_data:
-            partial_method_breakdown.append({
-                'payment_method': item['partial_paid_method'] or 'Unknown',
-                'revenue': item['revenue'],
-                'bookings': item['booking_count']
-            })
+        partial_method_breakdown = [
+            {'payment_method': item['method'] or 'Unknown', 'revenue': item['revenue'], 'bookings': item['booking_count']}
+            for item in bookings.filter(has_partial).annotate(
+                method=Coalesce('partial_paid_method', Value(''))
+            ).values('method').annotate(
+                revenue=Sum('partial_paid'),
+                booking_count=Count('id'),
+            ).order_by('-revenue')
+        ]
         
-        partial_methods_total = total_partial_payments
+        revenue_by_excursion = [
+            {'excursion_id': item['excursion__id'], 'excursion_title': item['excursion__title'], 'revenue': item['revenue'], 'bookings': item['booking_count']}
+            for item in grouped(bookings.filter(excursion__isnull=False), 'excursion__id', 'excursion__title', limit=10)
+        ]
+        revenue_by_provider = [
+            {'provider_id': item['excursion__provider__id'], 'provider_name': item['excursion__provider__name'], 'revenue': item['revenue'], 'bookings': item['booking_count']}
+            for item in grouped(bookings.filter(excursion__provider__isnull=False), 'excursion__provider__id', 'excursion__provider__name', limit=10)
+        ]
+        revenue_by_representative = [
+            {'representative_id': item['user__profile__id'], 'representative_name': item['user__profile__name'], 'revenue': item['revenue'], 'bookings': item['booking_count']}
+            for item in grouped(bookings.filter(user__profile__role='representative'), 'user__profile__id', 'user__profile__name', limit=10)
+        ]
+        revenue_by_agent = [
+            {'agent_id': item['referral_code__agent__id'], 'agent_name': item['referral_code__agent__name'], 'revenue': item['revenue'], 'bookings': item['booking_count']}
+            for item in grouped(bookings.filter(is_agent), 'referral_code__agent__id', 'referral_code__agent__name', limit=10)
+        ]
         
-        # Revenue by excursion (Top 10) - use direct excursion FK so bookings keep attribution if availability is deleted
-        revenue_by_excursion = []
-        excursion_data = bookings.exclude(excursion__isnull=True).values(
-            'excursion__id',
-            'excursion__title'
-        ).annotate(
-            revenue=Sum(revenue_expression),
-            booking_count=Count('id')
-        ).order_by('-revenue')[:10]
-
-        for item in excursion_data:
-            revenue_by_excursion.append({
-                'excursion_id': item['excursion__id'],
-                'excursion_title': item['excursion__title'],
-                'revenue': item['revenue'],
-                'bookings': item['booking_count']
-            })
+        return {
+            'total_revenue': total_revenue,
+            'total_bookings': total_bookings,
+            'average_booking_value': (
+                (total_revenue / total_bookings).quantize(Decimal('0.01'))
+                if total_bookings
+                else Decimal('0')
+            ),
+            'total_discounts': totals['total_discounts'],
+            'discounted_bookings_count': totals['discounted_bookings_count'],
+            'total_partial_payments': totals['total_partial_payments'],
+            'partial_payments_count': totals['partial_payments_count'],
+            'payment_methods_total': total_revenue,
+            'revenue_by_payment_method': payment_method_breakdown,
+            'partial_methods_total': totals['total_partial_payments'],
+            'revenue_by_partial_method': partial_method_breakdown,
+            'revenue_by_excursion': revenue_by_excursion,
+            'revenue_by_provider': revenue_by_provider,
+            'revenue_by_representative': revenue_by_representative,
+            'revenue_by_agent': revenue_by_agent,
+            'revenue_by_referral_channel': [
+                {'channel': 'Agent', 'revenue': totals['agent_revenue'], 'bookings': totals['agent_bookings']},
+                {'channel': 'Reps', 'revenue': totals['reps_revenue'], 'bookings': totals['reps_bookings']},
+                {'channel': 'Direct', 'revenue': totals['direct_revenue'], 'bookings': totals['direct_bookings']},
+            ],
+            'orphaned_bookings_count': totals['orphaned_bookings_count'],
+            'orphaned_revenue': totals['orphaned_revenue'],
+        }
 
-        # Bookings for deleted excursions (excursion IS NULL)
-        orphaned_bookings = bookings.filter(excursion__isnull=True)
-        orphaned_bookings_count = orphaned_bookings.count()
-        orphaned_revenue = orphaned_bookings.aggregate(total=Sum(revenue_expression))['total'] or Decimal('0')
-        
-        # Revenue by provider (via booking.excursion)
-        revenue_by_provider = []
-        provider_data = bookings.exclude(excursion__provider__isnull=True).values(
-            'excursion__provider__id',
-            'excursion__provider__name'
-        ).annotate(
-            revenue=Sum(revenue_expression),
-            booking_count=Count('id')
-        ).order_by('-revenue')[:10]
-        
-        for item in provider_data:
-            revenue_by_provider.append({
-                'provider_id': item['excursion__provider__id'],
-                'provider_name': item['excursion__provider__name'],
-                'revenue': item['revenue'],
-                'bookings': item['booking_count']
-            })
+    @staticmethod
+    def _breakdown(rows, key, name_key, id_label, name_label, limit=None):
+        """Sum revenue/bookings per key (None keys skipped), sorted by revenue descending."""
+        from decimal import Decimal
+        totals = {}
+        for row in rows:
+            key_value = row[key]
+            if key_value is None:
+                continue
+            entry = totals.setdefault(key_value, {id_label: key_value, name_label: row[name_key], 'revenue': Decimal('0'), 'bookings': 0})
+            entry['revenue'] += row['revenue']
+            entry['bookings'] += row['bookings']
+        breakdown = sorted(totals.values(), key=lambda item: item['revenue'], reverse=True)
+        return breakdown[:limit] if limit else breakdown
+
+    @staticmethod
+    def summarize(rows):
+        """Build the revenue dashboard data from fact-shaped rows (see RevenueFactService.live_rows)."""
+        from decimal import Decimal
         
-        # Revenue by representative
-        revenue_by_representative = []
-        representative_data = bookings.exclude(
-            Q(user__isnull=True) | Q(user__profile__isnull=True)
-        ).filter(
-            user__profile__role='representative'
-        ).values(
-            'user__profile__id',
-            'user__profile__name'
-        ).annotate(
-            revenue=Sum(revenue_expression),
-            booking_count=Count('id')
-        ).order_by('-revenue')[:10]
-        
-        for item in representative_data:
-            revenue_by_representative.append({
-                'representative_id': item['user__profile__id'],
-                'representative_name': item['user__profile__name'],
-                'revenue': item['revenue'],
-                'bookings': item['booking_count']
-            })
+        total_revenue = sum((row['revenue'] for row in rows), Decimal('0'))
+        total_bookings = sum(row['bookings'] for row in rows)
+        average_booking_value = (
+            (total_revenue / total_bookings).quantize(Decimal('0.01'))
+            if total_bookings
+            else Decimal('0')
+        )
+        total_discounts = sum((row['discount_total'] for row in rows), Decimal('0'))
+        discounted_bookings_count = sum(row['discounted_bookings'] for row in rows)
+        total_partial_payments = sum((row['partial_total'] for row in rows), Decimal('0'))
+        partial_payments_count = sum(row['partial_bookings'] for row in rows)
+        
+        # Payment method breakdown: Card (has jcc_order_id) vs Cash
+        payment_method_breakdown = [
+            {'payment_method': item['payment_method'] or 'Unknown', 'revenue': item['revenue'], 'bookings': item['bookings']}
+            for item in RevenueAnalyticsService._breakdown(rows, 'payment_type', 'payment_type', 'payment_method', 'name')
+        ]
         
-        # Revenue by agent (Top 10)
-        revenue_by_agent = []
-        agent_data = bookings.filter(
-            referral_code__agent__isnull=False
-        ).values(
-            'referral_code__agent__id',
-            'referral_code__agent__name'
-        ).annotate(
-            revenue=Sum(revenue_expression),
-            booking_count=Count('id')
-        ).order_by('-revenue')[:10]
-        
-        for item in agent_data:
-            revenue_by_agent.append({
-                'agent_id': item['referral_code__agent__id'],
-                'agent_name': item['referral_code__agent__name'],
-                'revenue': item['revenue'],
-                'bookings': item['booking_count']
-            })
+        # Partial payment method breakdown (bookings with a partial payment only)
+        partial_totals = {}
+        for row in rows:
+            if not row['partial_bookings']:
+                continue
+            method = row['partial_method'] or 'Unknown'
+            entry = partial_totals.setdefault(method, {'payment_method': method, 'revenue': Decimal('0'), 'bookings': 0})
+            entry['revenue'] += row['partial_total']
+            entry['bookings'] += row['partial_bookings']
+        partial_method_breakdown = sorted(partial_totals.values(), key=lambda item: item['revenue'], reverse=True)
+        
+        # Revenue by excursion (Top 10) - direct excursion FK, so bookings keep attribution if availability is deleted
+        revenue_by_excursion = RevenueAnalyticsService._breakdown(
+            rows, 'excursion_id', 'excursion_title', 'excursion_id', 'excursion_title', limit=10
+        )
+        
+        # Bookings for deleted excursions (excursion IS NULL)
+        orphaned_rows = [row for row in rows if row['excursion_id'] is None]
+        orphaned_bookings_count = sum(row['bookings'] for row in orphaned_rows)
+        orphaned_revenue = sum((row['revenue'] for row in orphaned_rows), Decimal('0'))
+        
+        revenue_by_provider = RevenueAnalyticsService._breakdown(
+            rows, 'provider_id', 'provider_name', 'provider_id', 'provider_name', limit=10
+        )
+        revenue_by_representative = RevenueAnalyticsService._breakdown(
+            rows, 'representative_id', 'representative_name', 'representative_id', 'representative_name', limit=10
+        )
+        revenue_by_agent = RevenueAnalyticsService._breakdown(
+            rows, 'agent_id', 'agent_name', 'agent_id', 'agent_name', limit=10
+        )
         
         # Revenue by referral channel (Agent, Reps, Direct)
-        agent_bookings = bookings.filter(referral_code__agent__isnull=False)
-        agent_revenue = agent_bookings.aggregate(total=Sum(revenue_expression))['total'] or Decimal('0')
-        agent_bookings_count = agent_bookings.count()
-
-        non_agent_bookings = bookings.filter(referral_code__agent__isnull=True)
-        reps_bookings = non_agent_bookings.filter(user__profile__role='representative')
-        reps_revenue = reps_bookings.aggregate(total=Sum(revenue_expression))['total'] or Decimal('0')
-        reps_bookings_count = reps_bookings.count()
-
-        direct_bookings = non_agent_bookings.exclude(user__profile__role='representative')
-        direct_revenue = direct_bookings.aggregate(total=Sum(revenue_expression))['total'] or Decimal('0')
-        direct_bookings_count = direct_bookings.count()
-
-        revenue_by_referral_channel = [
-            {'channel': 'Agent', 'revenue': agent_revenue, 'bookings': agent_bookings_count},
-            {'channel': 'Reps', 'revenue': reps_revenue, 'bookings': reps_bookings_count},
-            {'channel': 'Direct', 'revenue': direct_revenue, 'bookings': direct_bookings_count},
-        ]
+        channels = {channel: {'channel': channel, 'revenue': Decimal('0'), 'bookings': 0} for channel in ('Agent', 'Reps', 'Direct')}
+        for row in rows:
+            channels[row['channel']]['revenue'] += row['revenue']
+            channels[row['channel']]['bookings'] += row['bookings']
+        revenue_by_referral_channel = list(channels.values())
         
         return {
             'total_revenue': total_revenue,
@@ -1482,9 +3543,9 @@ class RevenueAnalyticsService:
             'discounted_bookings_count': discounted_bookings_count,
             'total_partial_payments': total_partial_payments,
             'partial_payments_count': partial_payments_count,
-            'payment_methods_total': payment_methods_total,
+            'payment_methods_total': total_revenue,
             'revenue_by_payment_method': payment_method_breakdown,
-            'partial_methods_total': partial_methods_total,
+            'partial_methods_total': total_partial_payments,
             'revenue_by_partial_method': partial_method_breakdown,
             'revenue_by_excursion': revenue_by_excursion,
             'revenue_by_provider': revenue_by_provider,
@@ -1496,11 +3557,129 @@ class RevenueAnalyticsService:
         }
 
 
+class DashboardSnapshotService:
+    """
+    Headline numbers for admin_dashboard, computed in a handful of queries and cached.
+    
+    A snapshot older than ADMIN_DASHBOARD_SNAPSHOT_TTL seconds is still served while a
+    django-q task recomputes it; after ADMIN_DASHBOARD_SNAPSHOT_MAX_AGE it has expired from
+    the cache and the next request computes it inline (e.g. when no cluster is running).
+    """
+
+    CACHE_KEY = 'admin_dashboard:snapshot'
+    REFRESH_LOCK_KEY = 'admin_dashboard:snapshot:refreshing'
+    TTL = 60
+    MAX_AGE = 900
+
+    @staticmethod
+    def compute():
+        from django.contrib.auth.models import User
+        from django.db.models import Count, Q, Sum
+
+        excursions = Excursion.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+        )
+        users = User.objects.exclude(is_staff=True).aggregate(
+            reps=Count('id', filter=Q(profile__role='representative')),
+            clients=Count('id', filter=Q(profile__role='client')),
+        )
+        bookings = Booking.objects.aggregate(
+            revenue=Sum('total_price', filter=Q(payment_status='completed')),
+            completed=Count('id', filter=Q(payment_status='completed')),
+        )
+        upcoming_excursions = [
+            {
+                'excursion_title': day.excursion_availability.excursion.title if day.excursion_availability.excursion else '',
+                'date_day': day.date_day,
+                'booked_guests': day.booked_guests,
+                'capacity': day.capacity,
+            }
+            for day in AvailabilityDays.objects.filter(
+                excursion_availability__status='active',
+                date_day__gte=timezone.localdate(),
+            ).select_related('excursion_availability__excursion').order_by('date_day')[:5]
+        ]
+        recent_bookings = []
+        for booking in Booking.objects.select_related(
+            'excursion', 'excursion_availability__excursion'
+        ).order_by('-created_at')[:5]:
+            excursion = booking.get_display_excursion()
+            recent_bookings.append({
+                'id': booking.id,
+                'created_at': booking.created_at,
+                'excursion_title': excursion.title if excursion else '',
+                'guest_name': booking.guest_name,
+                'guest_phone': booking.guest_phone,
+                'payment_status': booking.payment_status,
+                'deleteByUser': booking.deleteByUser,
+                'base_price': booking.get_base_price,
+            })
+
+        return {
+            'computed_at': timezone.now(),
+            'active_excursions_count': excursions['active'],
+            'total_excursions_count': excursions['total'],
+            'reps_count': users['reps'],
+            'clients_count': users['clients'],
+            'total_revenue': bookings['revenue'] or 0,
+            'booking_count': bookings['completed'],
+            'upcoming_excursions': upcoming_excursions,
+            'recent_bookings': recent_bookings,
+        }
+
+    @staticmethod
+    def refresh():
+        """Recompute and store the snapshot (run by the django-q task/schedule)."""
+        from django.conf import settings
+        from django.core.cache import cache
+        snapshot = DashboardSnapshotService.compute()
+        max_age = getattr(settings, 'ADMIN_DASHBOARD_SNAPSHOT_MAX_AGE', DashboardSnapshotService.MAX_AGE)
+        cache.set(DashboardSnapshotService.CACHE_KEY, snapshot, max_age)
+        cache.delete(DashboardSnapshotService.REFRESH_LOCK_KEY)
+        return snapshot
+
+    @staticmethod
+    def get_snapshot():
+        """Cached snapshot; stale ones trigger one background refresh and are served meanwhile."""
+        from django.conf import settings
+        from django.core.cache import cache
+
+        snapshot = cache.get(DashboardSnapshotService.CACHE_KEY)
+        if snapshot is None:
+            return DashboardSnapshotService.refresh()
+
+        ttl = getattr(settings, 'ADMIN_DASHBOARD_SNAPSHOT_TTL', DashboardSnapshotService.TTL)
+        if (timezone.now() - snapshot['computed_at']).total_seconds() > ttl:
+            # cache.add only succeeds for the first request to notice, so one task is queued
+            if cache.add(DashboardSnapshotService.REFRESH_LOCK_KEY, 1, max(ttl, 30)):
+                try:
+                    from django_q.tasks import async_task
+                    async_task('main.tasks.refresh_dashboard_snapshot_task')
+                except Exception as e:
+                    logger.exception("Failed to enqueue dashboard snapshot refresh: %s", e)
+                    cache.delete(DashboardSnapshotService.REFRESH_LOCK_KEY)
+        return snapshot
+
+
 class ExcursionAnalyticsService:
     """Service class for handling excursion analytics operations."""
     
     @staticmethod
     def get_analytics_data(start_date, end_date):
+        """
+        Cached compute_analytics_data (see AnalyticsCacheService). Availability and capacity
+        edits refresh the excursion listings, so the listing generation is part of the key.
+        """
+        return AnalyticsCacheService.get_or_compute(
+            'excursions', AnalyticsCacheService.SERVICE_DATE, start_date, end_date,
+            ExcursionAnalyticsService.compute_analytics_data,
+            extra_generations=[cache_generation(ExcursionListingService.GENERATION_KEY)],
+        )
+    
+    @staticmethod
+    @using_replica()
+    def compute_analytics_data(start_date, end_date):
         """
         Process excursion analytics data for a date range.
         
@@ -1514,8 +3693,7 @@ class ExcursionAnalyticsService:
                 'availabilities': list of availability data with bookings per day
             }
         """
-        from datetime import timedelta
-        from django.db.models import Q
+        from django.db.models import Count
         
         # Generate full list of dates in range (all dates, not just availability days)
         date_range = []
@@ -1524,31 +3702,38 @@ class ExcursionAnalyticsService:
             date_range.append(current_date)
             current_date += timedelta(days=1)
         
-        # Get all AvailabilityDays within the date range
-        availability_days_in_range = AvailabilityDays.objects.filter(
+        # Capacity of every AvailabilityDays row in the range, keyed by (availability, date)
+        capacity_by_day = {}
+        for availability_id, date_day, capacity in AvailabilityDays.objects.filter(
             date_day__gte=start_date,
             date_day__lte=end_date
-        ).select_related('excursion_availability', 'excursion_availability__excursion')
+        ).values_list('excursion_availability_id', 'date_day', 'capacity'):
+            capacity_by_day[(availability_id, date_day)] = capacity
         
         # Get unique availabilities that have days in this range
-        availability_ids = set(
-            av_day.excursion_availability_id for av_day in availability_days_in_range
-        )
+        availability_ids = {availability_id for availability_id, _ in capacity_by_day}
         
         availabilities = ExcursionAvailability.objects.filter(
             id__in=availability_ids
         ).select_related('excursion').prefetch_related(
-            'availability_days',
-            'bookings',
             'pickup_groups'
         ).order_by('excursion__title', 'start_time')
         
+        # Completed bookings per (availability, date) in one grouped query
+        bookings_by_day = {
+            (row['excursion_availability_id'], row['date']): row['bookings']
+            for row in Booking.objects.filter(
+                excursion_availability_id__in=availability_ids,
+                date__gte=start_date,
+                date__lte=end_date,
+                payment_status='completed',
+            ).values('excursion_availability_id', 'date').annotate(bookings=Count('id'))
+        }
+        
         analytics_data = []
         
         for availability in availabilities:
             # Create display name for this availability
-            time_str = availability.start_time.strftime('%H:%M') if availability.start_time else 'No Time'
-            # display_name = f"{availability.pickup_groups.all().first().name} - {time_str}"
             display_name = "("
             for pickup_group in availability.pickup_groups.all():
                 display_name += f"{pickup_group.name}, "
@@ -1556,26 +3741,17 @@ class ExcursionAnalyticsService:
             display_name += ")"
             
             # Build data for each date in the full date range
+            # (None where this availability has no day for the date)
             date_data = {}
             for date in date_range:
-                # Try to get AvailabilityDays for this specific date and availability
-                try:
-                    day_availability = availability.availability_days.get(date_day=date)
-                    capacity = day_availability.capacity
-                    
-                    # Count completed bookings for this date
-                    bookings_count = availability.bookings.filter(
-                        date=date,
-                        payment_status='completed'
-                    ).count()
-                    
-                    date_data[date] = {
-                        'bookings': bookings_count,
-                        'capacity': capacity
-                    }
-                except AvailabilityDays.DoesNotExist:
-                    # This availability doesn't have a day for this date
+                capacity = capacity_by_day.get((availability.id, date))
+                if capacity is None:
                     date_data[date] = None
+                    continue
+                date_data[date] = {
+                    'bookings': bookings_by_day.get((availability.id, date), 0),
+                    'capacity': capacity
+                }
             
             analytics_data.append({
                 'availability_id': availability.id,
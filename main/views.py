@@ -14,6 +14,9 @@ from django.db import transaction
 from django.utils import timezone
 from django.core.serializers.json import DjangoJSONEncoder
 from django.core.paginator import Paginator
+from .pagination import KeysetPaginator
+from .exports import streaming_export_response, EXPORT_CHUNK_SIZE
+from .db_routers import replica_view, read_alias
 from django.template.loader import render_to_string
 from datetime import date, datetime, time, timedelta
 from django.contrib.auth.models import User
@@ -34,13 +37,13 @@ from django.core.exceptions import ValidationError
 import re
 import json
 import logging
-from django.db.models import Q, Sum, Count
-from django.db.models.functions import Lower
+from django.db.models import Q, Sum, Count, Value, DateField, DecimalField
+from django.db.models.functions import Lower, Coalesce
 
 logger = logging.getLogger(__name__)
 from django.apps import apps
-from .cyber_api import get_groups, get_hotels, get_pickup_points, get_excursions, get_excursion_description, get_providers, get_excursion_availabilities, get_reservation
-from .utils import FeedbackService, BookingService, ExcursionService, VoucherService, create_reservation, ExcursionAnalyticsService, RevenueAnalyticsService, JCCPaymentService, EmailService, EmailBuilder, attach_excursion_list_data, excursions_with_active_availability, generate_group_pdf_for_transport
+from .cyber_api import get_excursion_availabilities, get_reservation
+from .utils import AvailabilityDaysService, FeedbackService, BookingService, ExcursionService, VoucherService, create_reservation, ExcursionAnalyticsService, RevenueAnalyticsService, JCCPaymentService, EmailService, EmailBuilder, ExcursionListingService, ExcursionFacetService, ReferralStatsService, DashboardSnapshotService, SyncRunService, generate_group_pdf_for_transport
 
 def is_staff(user):
     return user.is_staff
@@ -75,11 +78,7 @@ def testmodels(request):
 
 @ensure_csrf_cookie
 def homepage(request):
-    excursions = (
-        excursions_with_active_availability()
-        .prefetch_related('tags', 'category', 'availabilities__regions')
-    )
-    excursions = attach_excursion_list_data(excursions)
+    excursions = ExcursionListingService.listed()
     return render(request, 'main/home.html', {
         'excursions': excursions,
     })
@@ -111,6 +110,13 @@ def manage_cookies(request, cookie_name, cookie_value, cookie_action):
         return response
     return None
     
+def _voucher_rate_limited_response():
+    return JsonResponse({
+        'success': False,
+        'message': 'Too many voucher attempts. Please wait a minute and try again.',
+        'rate_limited': True,
+    }, status=429)
+
 def retrive_voucher(request):
     """
     Authenticate and retrieve voucher/reservation.
@@ -146,6 +152,9 @@ def retrive_voucher(request):
                 'message': 'Voucher code is required.'
             })
         
+        if VoucherService.rate_limited(request):
+            return _voucher_rate_limited_response()
+        
         logger.info(f"Processing voucher: {voucher_code}")
         
         # Authenticate voucher using VoucherService
@@ -270,6 +279,9 @@ def check_voucher(request):
                 'message': 'Voucher code is required.'
             })
         
+        if VoucherService.rate_limited(request):
+            return _voucher_rate_limited_response()
+        
         logger.info(f"Checking voucher: {voucher_code}")
         
         # Get reservation from database or API
@@ -331,193 +343,73 @@ def booking_id_page(request):
     return render(request, 'main/accounts/booking_id.html', context)
     
 #  Sync with Cyberlogic API
-def sync_pickup_groups(request):
-    if request.method == 'POST':
-        try:
-            # PickupGroup.objects.all().delete()
-            pickup_groups_cl = get_groups()
-            total_synced = 0
-            for group in pickup_groups_cl:
-                pick_name = group['Name']
-                pick_id = group['Id']
-                pick_code = group['Code']
-                pickup_group, created = PickupGroup.objects.get_or_create(
-                    id=pick_id,
-                    defaults={'name': pick_name, 'code': pick_code}
-                )
-                if created:
-                    print('created pickup group: ' + str(pickup_group))
-                    total_synced += 1
+def _start_sync(request, kind, label):
+    """Queue a background sync and answer right away with the run to poll."""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method.'})
+    try:
+        run = SyncRunService.start(kind, user=request.user)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': f'Error syncing {label}: {str(e)}'})
+    return JsonResponse({
+        'success': True,
+        'message': f'Syncing {label} in the background.',
+        'run_id': run.pk,
+        'status': run.status,
+        'progress_url': reverse('sync_run_status', args=[run.pk]),
+    })
 
-                if total_synced > 0:
-                    message = 'Sync successful! Total pickup groups synced: ' + str(total_synced)
-                else:
-                    message = 'Pickup groups are up to date.'
-            return JsonResponse({'success': True, 'message': message})
-        except Exception as e:
-            return JsonResponse({'success': False, 'message': f'Error syncing pickup groups: {str(e)}'})
-    return JsonResponse({'success': False, 'message': 'Invalid request method.'})
+def sync_pickup_groups(request):
+    return _start_sync(request, 'pickup_groups', 'pickup groups')
 
 def sync_pickup_points(request):
-    if request.method == 'POST':
-        try:
-            total_synced = 0
-            pickup_points_cl = get_pickup_points()
-            for point in pickup_points_cl:
-                pick_name = point['Name']
-                pick_id = point['Id']
-                pick_group_id = point['GroupId']
-                pickup_point, created = PickupPoint.objects.get_or_create(
-                    id=pick_id,
-                    defaults={'name': pick_name, 'pickup_group_id': pick_group_id}
-                )
-                if created:
-                    print('created pickup point: ' + str(pickup_point))
-                    total_synced += 1
-
-                if total_synced > 0:
-                    message = 'Sync successful! Total pickup points synced: ' + str(total_synced)
-                else:
-                    message = 'Pickup points are up to date.'
-            return JsonResponse({'success': True, 'message': message})
-        except Exception as e:
-            return JsonResponse({'success': False, 'message': f'Error syncing pickup points: {str(e)}'})
-    return JsonResponse({'success': False, 'message': 'Invalid request method.'})
+    return _start_sync(request, 'pickup_points', 'pickup points')
 
 def sync_hotels(request):
-    if request.method == 'POST':
-        try:
-            hotels_cl = get_hotels()
-            total_synced = 0
-            for hotel in hotels_cl:
-                hotel_name = hotel['Acc_name']
-                hotel_id = hotel['Acc_id']
-                hotel_address = hotel['Acc_address']
-                hotel_zipcode = hotel['acc_zip_code']
-                hotel_entry, created = Hotel.objects.get_or_create(
-                    id=hotel_id,
-                    defaults={'name': hotel_name, 'address': hotel_address, 'zipcode': hotel_zipcode}
-                )
-                if created:
-                    print('created hotel: ' + str(hotel_entry))
-                    total_synced += 1
-
-                if total_synced > 0:
-                    message = 'Sync successful! Total hotels synced: ' + str(total_synced)
-                else:
-                    message = 'Hotels are up to date.'
-            return JsonResponse({'success': True, 'message': message})
-        except Exception as e:
-            return JsonResponse({'success': False, 'message': f'Error syncing hotels: {str(e)}'})
-    return JsonResponse({'success': False, 'message': 'Invalid request method.'})
+    return _start_sync(request, 'hotels', 'hotels')
 
 def sync_excursions(request):
-    if request.method == 'POST':
-        try:
-            excursions_cl = get_excursions()
-            total_synced = 0
-            for excursion in excursions_cl['Data']:
-                
-                excursion_name = excursion['Name']
-                excursion_id = excursion['Id']
-                excursion_provider = excursion['Organizer_Name']
-                # print('excursion_name: ' + str(excursion_name))
-                # Get the first matching provider (in case there are duplicates)
-                provider_profile = UserProfile.objects.filter(name=excursion_provider, role='provider').first()
-                if not provider_profile:
-                    print(f"Warning: No provider found with name '{excursion_provider}' and role 'provider'")
-                    continue
-                excursion_provider_id = provider_profile.id
-                excursion_description_response = get_excursion_description(excursion_id)
-                excursion_description = excursion_description_response['Overview'][0]['Description']['MainDescription']
-                excursion_intro_image = excursion_description_response['Media']['DefaultImage']['MainUrl']
-                # print('excursion_provider_id: ' + str(excursion_provider_id))
-                # print('excursion description: ' + str(excursion_description))
-                print('excursion intro image: ' + str(excursion_intro_image))
-                                
-                excursion_entry, created = Excursion.objects.get_or_create(
-                    id=excursion_id,
-                    defaults={'title': excursion_name, 'description': excursion_description, 'provider_id': excursion_provider_id, 'intro_image': excursion_intro_image}
-                )
-                if created:
-                    print('created excursion: ' + str(excursion_entry))
-                    total_synced += 1
-
-                if total_synced > 0:
-                    message = 'Sync successful! Total excursions synced: ' + str(total_synced)
-                else:
-                    message = 'Excursions are up to date.'
-            return JsonResponse({'success': True, 'message': message})
-        except Exception as e:
-            return JsonResponse({'success': False, 'message': f'Error syncing excursions: {str(e)}'})
-    return JsonResponse({'success': False, 'message': 'Invalid request method.'})
+    return _start_sync(request, 'excursions', 'excursions')
 
 def sync_providers(request):
-    if request.method == 'POST':
-        try:
-            providers_cl = get_providers()
-            total_synced = 0
-            for provider in providers_cl:
-                provider_name = provider['Name']
-                provider_id = provider['Id']
-                provider_email = provider['Email']
-                provider_phone = provider['Telephone1']
-                provider_address = provider['Address']
-                provider_zipcode = provider['Zip']
-
-                # 1. Get or create the User instance
-                # First try to get existing user by ID, then by username
-                try:
-                    user = User.objects.get(id=provider_id)
-                    user_created = False
-                except User.DoesNotExist:
-                    try:
-                        # Check if user with this username already exists
-                        username = provider_email or f"provider_{provider_id}"
-                        user = User.objects.get(username=username)
-                        user_created = False
-                    except User.DoesNotExist:
-                        # Create new user
-                        user = User.objects.create(
-                            id=provider_id,
-                            username=provider_email or f"provider_{provider_id}",
-                            first_name=provider_name,
-                            email=provider_email or "",
-                        )
-                        user_created = True
+    return _start_sync(request, 'providers', 'providers')
 
-                # 2. Get or create the UserProfile instance
-                profile, profile_created = UserProfile.objects.get_or_create(
-                    user=user,
-                    defaults={
-                        # 'id': provider_id,
-                        'name': provider_name,
-                        'role': 'provider',
-                        'email': provider_email,
-                        'phone': provider_phone,
-                        'address': provider_address,
-                        'zipcode': provider_zipcode
-                    }
-                )
-                if profile_created:
-                    print('created provider: ' + str(profile))
-                    total_synced += 1
-
-                if total_synced > 0:
-                    message = 'Sync successful! Total providers synced: ' + str(total_synced)
-                else:
-                    message = 'Providers are up to date.'
-            return JsonResponse({'success': True, 'message': message})
-        except Exception as e:
-            return JsonResponse({'success': False, 'message': f'Error syncing providers: {str(e)}'})
-    return JsonResponse({'success': False, 'message': 'Invalid request method.'})
+@user_passes_test(is_staff)
+def sync_run_status(request, pk):
+    """
+    Progress of a sync run. HTMX requests get the status partial and poll it until the run
+    finishes (answered with 286, which stops htmx polling); others get JSON.
+    """
+    from .models import SyncRun
+    run = get_object_or_404(SyncRun, pk=pk)
+    if request.headers.get("HX-Request"):
+        response = render(request, 'main/admin/partials/sync_run_status.html', {'run': run})
+        if run.is_finished:
+            response.status_code = 286
+        return response
+    return JsonResponse({
+        'success': run.status != 'failed',
+        'run_id': run.pk,
+        'kind': run.kind,
+        'status': run.status,
+        'finished': run.is_finished,
+        'message': run.message,
+        'error': run.error,
+        'processed': run.processed,
+        'total': run.total,
+        'counts': {
+            'created': run.created_count,
+            'updated': run.updated_count,
+            'unchanged': run.unchanged_count,
+            'removed': run.removed_count,
+        },
+        'duration_seconds': run.duration.total_seconds() if run.duration else None,
+    })
 
 # ----- Excursion Views -----
 @ensure_csrf_cookie
 def excursion_list(request):
 
-    from django.db.models import Q
-
     def _parse_filter_date(value):
         raw_value = (value or '').strip()
         if not raw_value:
@@ -533,11 +425,6 @@ def excursion_list(request):
         # Keep date input empty if invalid, but skip filtering.
         return None, ''
 
-    excursions = excursions_with_active_availability()
-
-    categories = Category.objects.all()
-    tags = Tag.objects.all()
-
     search_query = request.GET.get('search', '')
     category_query = request.GET.get('category', '')
     tag_query = request.GET.get('tag', '')
@@ -546,50 +433,37 @@ def excursion_list(request):
     date_from_query_date, date_from_query = _parse_filter_date(date_from_query_raw)
     date_to_query_date, date_to_query = _parse_filter_date(date_to_query_raw)
 
-    today = timezone.now().date()
-    # Tie days to the same active ExcursionAvailability row (not an inactive/expired one)
-    _active_av = {
-        'availabilities__status': 'active',
-        'availabilities__is_active': True,
-        'availabilities__end_date__gte': today,
-    }
+    # Listed excursions matching the search and date range (dates answered from the
+    # listing day bitmaps); facet counts are taken over this same set
+    excursions = ExcursionFacetService.filtered_listings(
+        search_query, date_from_query_date, date_to_query_date
+    )
+    facet_counts = ExcursionFacetService.get_facet_counts(
+        search_query, date_from_query_date, date_to_query_date
+    )
 
-    # Optional: restrict to excursions with an active AvailabilityDay in the selected range
-    if date_from_query_date and date_to_query_date:
-        excursions = excursions.filter(
-            **_active_av,
-            availabilities__availability_days__date_day__gte=date_from_query_date,
-            availabilities__availability_days__date_day__lte=date_to_query_date,
-            availabilities__availability_days__status='active',
-        )
-    elif date_from_query_date:
-        excursions = excursions.filter(
-            **_active_av,
-            availabilities__availability_days__date_day__gte=date_from_query_date,
-            availabilities__availability_days__status='active',
-        )
-    elif date_to_query_date:
-        excursions = excursions.filter(
-            **_active_av,
-            availabilities__availability_days__date_day__lte=date_to_query_date,
-            availabilities__availability_days__status='active',
-        )
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.facet_count = facet_counts['category'].get(category.id, 0)
+    tags = list(Tag.objects.all())
+    for tag in tags:
+        tag.facet_count = facet_counts['tag'].get(tag.id, 0)
 
-    if search_query:
-        excursions = excursions.filter(Q(title__icontains=search_query) | Q(description__icontains=search_query))
+    # Single-valued M2M lookups: at most one join row per excursion, so no distinct() needed
     if category_query:
-        excursions = excursions.filter(category__id=category_query)
+        excursions = excursions.filter(excursion__category__id=category_query)
     if tag_query:
-        excursions = excursions.filter(tags__id=tag_query)
-    
-    # Apply distinct at the end to remove duplicates from availability joins
-    excursions = excursions.distinct().prefetch_related('tags', 'category', 'availabilities__regions')
-    excursions = attach_excursion_list_data(excursions)
+        excursions = excursions.filter(excursion__tags__id=tag_query)
 
     # If this is an HTMX request, return only the partial content
+    # (plus out-of-band filter options carrying the updated counts)
     if request.headers.get("HX-Request"):
-        return render(request, "main/excursions/partials/_excursion_list_content.html", {
+        return render(request, "main/excursions/partials/_excursion_list_htmx.html", {
             'excursions': excursions,
+            'categories': categories,
+            'tags': tags,
+            'category_query': category_query,
+            'tag_query': tag_query,
         })
 
     return render(request, 'main/excursions/excursion_list.html', {
@@ -625,21 +499,6 @@ def excursion_detail(request, pk):
             request, excursion, feedbacks, user_has_feedback
         )
 
-    # Process availability data organized by region
-    availability_dates_by_region, pickup_points_by_region, region_availability_map = ExcursionService.get_availability_data(
-        excursion_availabilities
-    )
-    region_map = ExcursionService.get_region_map(availability_dates_by_region)
-    
-    # Get only regions that are in the availabilities (not all regions)
-    regions = Region.objects.filter(id__in=availability_dates_by_region.keys())
-    
-    # Get user's default pickup point (from voucher/reservation or bookings)
-    user_pickup_point_id, user_region_id = _get_user_default_pickup_point(
-        request, excursion_availabilities, pickup_points_by_region
-    )
-
-
     # Handle feedback submission
     if request.method == 'POST' and 'feedback_submit' in request.POST:
         return _handle_feedback_submission(request, excursion, user_has_feedback, pk)
@@ -659,9 +518,26 @@ def excursion_detail(request, pk):
             return _handle_ajax_booking_submission(request, submission_availability)
         
 
-    # Calculate remaining seats and prepare context
-    remaining_seats = excursion_availability.max_guests - excursion_availability.booked_guests if excursion_availability else 0
     feedback_form = _get_feedback_form(request.user, user_has_feedback, excursion)
+    return _render_excursion_with_availability(
+        request, excursion, feedbacks, user_has_feedback, feedback_form,
+        excursion_availabilities, excursion_availability
+    )
+
+
+def _render_excursion_with_availability(request, excursion, feedbacks, user_has_feedback, feedback_form,
+                                        excursion_availabilities, excursion_availability):
+    """Render excursion detail page from the cached availability snapshot."""
+    # Availability data organized by region (cached; remaining seats are live)
+    snapshot = ExcursionService.get_availability_snapshot(excursion.pk)
+    
+    # Get user's default pickup point (from voucher/reservation or bookings)
+    user_pickup_point_id, user_region_id = _get_user_default_pickup_point(
+        request, snapshot['pickup_points_by_region']
+    )
+
+    # Calculate remaining seats and prepare context
+    remaining_seats = excursion_availability.max_guests - excursion_availability.booked_guests
     booking_form = BookingForm(user=request.user)
 
     return render(request, 'main/excursions/excursion_detail.html', {
@@ -671,13 +547,14 @@ def excursion_detail(request, pk):
         'excursion_availabilities': excursion_availabilities,
         'excursion_availability': excursion_availability,
         'booking_form': booking_form,
-        'availability_dates_by_region': availability_dates_by_region,
-        'pickup_points_by_region': pickup_points_by_region,
-        'region_availability_map': region_availability_map,
+        'availability_dates_by_region': snapshot['availability_dates_by_region'],
+        'pickup_points_by_region': snapshot['pickup_points_by_region'],
+        'region_availability_map': snapshot['region_availability_map'],
         'user_has_feedback': user_has_feedback,
-        'region_map': region_map,
+        'region_map': snapshot['region_map'],
         'remaining_seats': remaining_seats,
-        'regions': regions,
+        # Only regions that are in the availabilities (not all regions)
+        'regions': snapshot['regions'],
         'user_pickup_point_id': user_pickup_point_id,
         'user_region_id': user_region_id,
     })
@@ -711,14 +588,13 @@ def _get_feedback_form(user, user_has_feedback, excursion):
     return None
 
 
-def _get_user_default_pickup_point(request, excursion_availabilities, pickup_points_by_region):
+def _get_user_default_pickup_point(request, pickup_points_by_region):
     """
     Get user's default pickup point from voucher/reservation or recent bookings.
     Check if it's available in the current excursion's availabilities.
     
     Args:
         request: HTTP request object
-        excursion_availabilities: QuerySet of ExcursionAvailability objects
         pickup_points_by_region: Dict mapping region IDs to pickup points
     
     Returns:
@@ -759,20 +635,11 @@ def _get_user_default_pickup_point(request, excursion_availabilities, pickup_poi
         if latest_booking and latest_booking.pickup_point:
             user_pickup_point_id = latest_booking.pickup_point.id
     
-    # If we have a pickup point, check if it's available in this excursion
+    # If we have a pickup point, find which region offers it for this excursion
     if user_pickup_point_id:
-        try:
-            pickup_point = PickupPoint.objects.get(id=user_pickup_point_id)
-            
-            # Check if this pickup point is in any of the excursion's availabilities
-            for availability in excursion_availabilities:
-                if pickup_point in availability.pickup_points.all():
-                    # Find which region contains this pickup point for this excursion
-                    for region_id, points in pickup_points_by_region.items():
-                        if any(p['id'] == user_pickup_point_id for p in points):
-                            return user_pickup_point_id, region_id
-        except PickupPoint.DoesNotExist:
-            pass
+        for region_id, points in pickup_points_by_region.items():
+            if any(p['id'] == user_pickup_point_id for p in points):
+                return user_pickup_point_id, region_id
     
     return None, None
 
@@ -816,34 +683,10 @@ def _handle_feedback_submission(request, excursion, user_has_feedback, pk):
             feedback_form=feedback_form
         )
 
-    availability_dates_by_region, pickup_points_by_region, region_availability_map = ExcursionService.get_availability_data(
-        excursion_availabilities
-    )
-    region_map = ExcursionService.get_region_map(availability_dates_by_region)
-    regions = Region.objects.filter(id__in=availability_dates_by_region.keys())
-    user_pickup_point_id, user_region_id = _get_user_default_pickup_point(
-        request, excursion_availabilities, pickup_points_by_region
+    return _render_excursion_with_availability(
+        request, excursion, feedbacks, user_has_feedback, feedback_form,
+        excursion_availabilities, excursion_availability
     )
-    remaining_seats = excursion_availability.max_guests - excursion_availability.booked_guests
-    booking_form = BookingForm(user=request.user)
-
-    return render(request, 'main/excursions/excursion_detail.html', {
-        'excursion': excursion,
-        'feedbacks': feedbacks,
-        'feedback_form': feedback_form,
-        'excursion_availabilities': excursion_availabilities,
-        'excursion_availability': excursion_availability,
-        'booking_form': booking_form,
-        'availability_dates_by_region': availability_dates_by_region,
-        'pickup_points_by_region': pickup_points_by_region,
-        'region_availability_map': region_availability_map,
-        'user_has_feedback': user_has_feedback,
-        'region_map': region_map,
-        'remaining_seats': remaining_seats,
-        'regions': regions,
-        'user_pickup_point_id': user_pickup_point_id,
-        'user_region_id': user_region_id,
-    })
 
 
 def _handle_ajax_booking_submission(request, excursion_availability):
@@ -1397,6 +1240,8 @@ def booking_delete(request, pk):
                 
                 if booking.payment_status == 'completed':
                     BookingService.decrement_booked_guests_for_booking(booking)
+                else:
+                    BookingService.release_hold_for_booking(booking)
                 if request.user.is_staff:
                     booking.deleteByUser = False
                     booking.delete()
@@ -1576,6 +1421,23 @@ def send_admin_payment_notification(booking, request, status, order_status=None)
         return False
 
 
+def _count_paid_seats(request, booking):
+    """
+    Count the seats of a booking that just became paid. When the day had no room left the
+    payment stands, but the admins are notified to resolve it and staff see a warning.
+    """
+    if BookingService.increment_booked_guests_for_booking(booking):
+        return True
+    BookingService.notify_unclaimed_seats(booking)
+    if request.user.is_authenticated and request.user.is_staff:
+        messages.warning(
+            request,
+            f'Booking #{booking.pk} is paid but the day is full, so its seats were not counted. '
+            'Please move it to another date or refund it.'
+        )
+    return False
+
+
 # @login_required
 def booking_detail(request, pk):
     
@@ -1613,7 +1475,7 @@ def booking_detail(request, pk):
             booking.payment_status = 'completed'
             booking.save()
             if old_status != 'completed':
-                BookingService.increment_booked_guests_for_booking(booking)
+                _count_paid_seats(request, booking)
             # Send booking confirmation email to customer
             send_booking_confirmation_email(booking, request)
             
@@ -1649,7 +1511,7 @@ def booking_detail(request, pk):
                 booking.payment_status = 'completed'
                 booking.save()
                 if old_status != 'completed':
-                    BookingService.increment_booked_guests_for_booking(booking)
+                    _count_paid_seats(request, booking)
                 messages.success(request, 'Booking completed.')
 
                 # Preserve token in redirect if present
@@ -1673,6 +1535,8 @@ def booking_detail(request, pk):
                 booking_id = booking.id
                 if booking.payment_status == 'completed':
                     BookingService.decrement_booked_guests_for_booking(booking)
+                else:
+                    BookingService.release_hold_for_booking(booking)
                 booking.payment_status = 'cancelled'
                 booking.save()
 
@@ -1734,6 +1598,8 @@ def booking_detail(request, pk):
             elif action_type == 'delete_booking':
                 if booking.payment_status == 'completed':
                     BookingService.decrement_booked_guests_for_booking(booking)
+                else:
+                    BookingService.release_hold_for_booking(booking)
                 booking.delete()
                 messages.success(request, 'Booking deleted.')
                 return JsonResponse({
@@ -2000,7 +1866,7 @@ def payment_initiate(request, booking_pk):
                 booking.payment_status = 'completed'
                 booking.save(update_fields=['payment_status'])
                 if old_status != 'completed':
-                    BookingService.increment_booked_guests_for_booking(booking)
+                    _count_paid_seats(request, booking)
                 messages.success(request, 'Payment was already completed. Your booking is confirmed.')
                 redirect_url = reverse('booking_detail', kwargs={'pk': booking_pk})
                 if token:
@@ -2014,6 +1880,14 @@ def payment_initiate(request, booking_pk):
             # If we can't check the status, proceed with creating a new order
             logger.warning(f"Could not check status of existing JCC order for booking #{booking_pk}: {str(e)}. Creating new order.")
     
+    # Keep the seats reserved while the customer is on the JCC payment page
+    if not BookingService.ensure_hold(booking):
+        messages.error(request, 'Sorry, there are no longer enough seats available for this date.')
+        redirect_url = reverse('checkout', kwargs={'booking_pk': booking_pk})
+        if token:
+            redirect_url += f'?token={token}'
+        return redirect(redirect_url)
+    
     try:
         # Build return URLs (success and failure)
         # Using request.build_absolute_uri to ensure full URLs
@@ -2128,7 +2002,7 @@ def payment_success(request, booking_pk=None):
             booking.payment_status = 'completed'
             booking.save(update_fields=['payment_status'])
             if old_status != 'completed':
-                BookingService.increment_booked_guests_for_booking(booking)
+                _count_paid_seats(request, booking)
             # Send booking confirmation email to customer
             send_booking_confirmation_email(booking, request)
             # Send admin notification
@@ -2739,13 +2613,19 @@ def profile(request, pk):
         total=Sum('total_price')
     )['total'] or 0
 
-    # Get referral codes if profile is an agent (annotate total revenue from completed bookings)
+    # Get referral codes if profile is an agent, with booking totals from ReferralCodeStats
     referral_codes = None
+    referral_totals = None
     if profile.role == 'agent':
         from .models import ReferralCode
-        referral_codes = ReferralCode.objects.filter(agent=profile).annotate(
-            total_revenue=Sum('bookings__total_price', filter=Q(bookings__payment_status='completed'))
-        ).order_by('-created_at')
+        referral_codes = list(ReferralCode.objects.filter(agent=profile).annotate(
+            bookings_count=Coalesce('stats__bookings_count', 0),
+            total_revenue=Coalesce('stats__completed_revenue', Value(0, output_field=DecimalField(max_digits=12, decimal_places=2))),
+        ).order_by('-created_at'))
+        referral_totals = {
+            'bookings': sum(code.bookings_count for code in referral_codes),
+            'revenue': sum(code.total_revenue for code in referral_codes),
+        }
     
     return render(request, 'main/accounts/profile.html', {
         'bookings': bookings,
@@ -2753,6 +2633,7 @@ def profile(request, pk):
         'user_profile': profile,
         'reservations': reservations,
         'referral_codes': referral_codes,
+        'referral_totals': referral_totals,
     })    
 
 @user_passes_test(is_staff)
@@ -2908,46 +2789,23 @@ def profile_edit(request, pk):
 # @login_required
 @user_passes_test(is_staff)
 def admin_dashboard(request, pk):
-    # Get admin stats
-    active_excursions_count = Excursion.objects.filter(status='active').count()
-    total_excursions_count = Excursion.objects.all().count()
-    reps_count = User.objects.filter(profile__role='representative').exclude(is_staff=True).count()
-    clients_count = User.objects.filter(profile__role='client').exclude(is_staff=True).count()
-    user = User.objects.get(profile__id=pk)
-    user_profile = UserProfile.objects.get(user=user)
-
-    upcoming_excursions = AvailabilityDays.objects.filter(excursion_availability__status='active', date_day__gte=timezone.now()).order_by('date_day')[:5]
-
-    total_revenue = Booking.objects.filter(payment_status='completed').aggregate(
-        total=Sum('total_price')
-    )['total'] or 0
-    
-    # Recent bookings
-    recent_bookings = Booking.objects.all().order_by('-created_at')[:5]
+    user_profile = get_object_or_404(UserProfile.objects.select_related('user'), pk=pk)
 
-    # pickup_groups = get_groups()
-    # hotels = get_hotels()
-    # print(hotels)
-    # for hotel in hotels:
-    #     print(f'  - {hotel}')
+    # Admin stats come from a short-lived snapshot refreshed in the background
+    snapshot = DashboardSnapshotService.get_snapshot()
     
-    context = {
-        'active_excursions_count': active_excursions_count,
-        'reps_count': reps_count,
-        'clients_count': clients_count,
-        'total_revenue': total_revenue,
-        'recent_bookings': recent_bookings,
-        'booking_count': Booking.objects.filter(payment_status='completed').count(),
+    context = dict(snapshot)
+    context.update({
         'user_profile': user_profile,
-        'total_excursions_count': total_excursions_count,
-        'upcoming_excursions': upcoming_excursions,
-    }
+        'snapshot_computed_at': snapshot['computed_at'],
+    })
     
     return render(request, 'main/admin/dashboard.html', context)
 
 # ----- Group Views -----
 # Only admins can manage groups
 @user_passes_test(is_staff)
+@replica_view
 def group_list(request):
     groups = Group.objects.select_related('excursion').prefetch_related('bookings').all().order_by('-date')
 
@@ -2960,10 +2818,9 @@ def group_list(request):
             Q(description__icontains=search_query)
         )
 
-    # Pagination
-    paginator = Paginator(groups, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination; undated groups sort last
+    groups = groups.annotate(sort_date=Coalesce('date', Value(date.min, output_field=DateField())))
+    page_obj = KeysetPaginator(groups, 15, ordering=('-sort_date', '-id')).get_page_from_request(request)
 
     return render(request, 'main/groups/group_list.html', {
         'groups': page_obj.object_list,
@@ -3550,9 +3407,8 @@ def group_export_pdf(request, pk):
 
 
 @user_passes_test(is_staff)
+@replica_view
 def group_export_csv(request, pk):
-    import csv
-    from io import StringIO
     from .utils import TransportGroupService
     
     group = get_object_or_404(Group.objects.prefetch_related(
@@ -3575,88 +3431,83 @@ def group_export_csv(request, pk):
         bookings, pickup_times
     )
     
-    # Create CSV content
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Header information
-    writer.writerow(['TRANSPORT GROUP MANIFEST'])
-    writer.writerow([])
-    writer.writerow(['Excursion:', group.excursion.title])
-    writer.writerow(['Group:', group.name])
-    writer.writerow(['Date:', group.date.strftime('%A, %B %d, %Y')])
-    writer.writerow(['Total Guests:', group.total_guests])
-    writer.writerow(['Total Bookings:', sum(len(b['bookings']) for b in manifest_blocks)])
-    writer.writerow([])
-    writer.writerow([])
-    
-    # Column headers
-    headers = ['#', 'Pickup Group', 'Pickup Point', 'Pickup Time', 'Guest Name', 'Phone', 'Hotel/Location', 'Adults', 'Children', 'Infants', 'Total']
-    writer.writerow(headers)
-    
-    # Data rows
-    row_number = 1
-    for block in manifest_blocks:
-        pickup_group_name = block['pickup_group_name']
-        pickup_point_name = block['pickup_point_name']
-        pickup_time_str = block['pickup_time'].strftime('%H:%M') if block['pickup_time'] else 'Not Set'
+    def rows():
+        # Header information
+        yield ['TRANSPORT GROUP MANIFEST']
+        yield []
+        yield ['Excursion:', group.excursion.title]
+        yield ['Group:', group.name]
+        yield ['Date:', group.date.strftime('%A, %B %d, %Y')]
+        yield ['Total Guests:', group.total_guests]
+        yield ['Total Bookings:', sum(len(b['bookings']) for b in manifest_blocks)]
+        yield []
+        yield []
+
+        # Column headers
+        headers = ['#', 'Pickup Group', 'Pickup Point', 'Pickup Time', 'Guest Name', 'Phone', 'Hotel/Location', 'Adults', 'Children', 'Infants', 'Total']
+        yield headers
+
+        # Data rows
+        row_number = 1
+        for block in manifest_blocks:
+            pickup_group_name = block['pickup_group_name']
+            pickup_point_name = block['pickup_point_name']
+            pickup_time_str = block['pickup_time'].strftime('%H:%M') if block['pickup_time'] else 'Not Set'
         
-        for booking in block['bookings']:
-            phone = ''
-            if booking.voucher_id and booking.voucher_id.client_phone:
-                phone = booking.voucher_id.client_phone
+            for booking in block['bookings']:
+                phone = ''
+                if booking.voucher_id and booking.voucher_id.client_phone:
+                    phone = booking.voucher_id.client_phone
             
-            hotel = ''
-            if booking.voucher_id and booking.voucher_id.hotel:
-                hotel = booking.voucher_id.hotel.name
+                hotel = ''
+                if booking.voucher_id and booking.voucher_id.hotel:
+                    hotel = booking.voucher_id.hotel.name
             
-            adults = booking.total_adults or 0
-            kids = booking.total_kids or 0
-            infants = booking.total_infants or 0
-            total = adults + kids + infants
+                adults = booking.total_adults or 0
+                kids = booking.total_kids or 0
+                infants = booking.total_infants or 0
+                total = adults + kids + infants
             
-            writer.writerow([
-                row_number,
-                pickup_group_name,
-                pickup_point_name,
-                pickup_time_str,
-                booking.guest_name,
-                phone,
-                hotel,
-                adults,
-                kids,
-                infants,
-                total
-            ])
-            row_number += 1
+                yield [
+                    row_number,
+                    pickup_group_name,
+                    pickup_point_name,
+                    pickup_time_str,
+                    booking.guest_name,
+                    phone,
+                    hotel,
+                    adults,
+                    kids,
+                    infants,
+                    total
+                ]
+                row_number += 1
         
-        writer.writerow([
-            '',
-            '',
-            f'SUBTOTAL - {pickup_point_name}',
-            '',
-            f'{len(block["bookings"])} booking(s)',
-            '',
-            '',
-            block['subtotal']['adults'],
-            block['subtotal']['kids'],
-            block['subtotal']['infants'],
-            block['subtotal']['total']
-        ])
-        writer.writerow([])
-    
-    # Grand total
-    writer.writerow([])
-    writer.writerow(['', '', 'GRAND TOTAL', f'{bookings.count()} bookings', '', '', '', '', '', group.total_guests])
-    
-    # Create response
-    filename = f'transport_group_{group.name}_{group.date}.csv'
-    response = HttpResponse(output.getvalue(), content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            yield [
+                '',
+                '',
+                f'SUBTOTAL - {pickup_point_name}',
+                '',
+                f'{len(block["bookings"])} booking(s)',
+                '',
+                '',
+                block['subtotal']['adults'],
+                block['subtotal']['kids'],
+                block['subtotal']['infants'],
+                block['subtotal']['total']
+            ]
+            yield []
+
+        # Grand total
+        yield []
+        yield ['', '', 'GRAND TOTAL', f'{bookings.count()} bookings', '', '', '', '', '', group.total_guests]
     
-    return response
+    # Stream the rows through the shared CSV writer
+    filename = f'transport_group_{group.name}_{group.date}'
+    return streaming_export_response(rows(), filename, 'csv')
 
 @user_passes_test(is_staff)
+@replica_view
 def buses_list(request):
     buses = Bus.objects.all().order_by('capacity')
 
@@ -3806,6 +3657,7 @@ def manage_categories_tags(request):
 
 # ----- Providers and Representatives Views -----
 @user_passes_test(is_staff)
+@replica_view
 def providers_list(request):
     providers = UserProfile.objects.filter(role='provider').order_by('name')
     # regions = Region.objects.all()
@@ -3906,6 +3758,7 @@ def manage_providers(request):
     })
 
 @user_passes_test(is_staff)
+@replica_view
 def reps_list(request):
     reps = UserProfile.objects.filter(role='representative')
         # Handle search
@@ -3998,6 +3851,7 @@ def manage_reps(request):
     })
 
 @user_passes_test(is_staff)
+@replica_view
 def clients_list(request):
     clients = UserProfile.objects.filter(role='client').order_by('name')    
     # Handle search
@@ -4009,9 +3863,8 @@ def clients_list(request):
             Q(phone__icontains=search_query)
         )
     
-    paginator = Paginator(clients, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    clients = clients.annotate(sort_name=Coalesce('name', Value('')))
+    page_obj = KeysetPaginator(clients, 15, ordering=('sort_name', 'id')).get_page_from_request(request)
 
     return render(request, 'main/admin/clients.html', {
         'clients': page_obj.object_list,
@@ -4100,9 +3953,8 @@ def manage_clients(request):
                 messages.success(request, f'{count} client(s) deleted successfully.')
             return redirect('clients_list')
         
-    paginator = Paginator(clients, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    clients = clients.annotate(sort_name=Coalesce('name', Value('')))
+    page_obj = KeysetPaginator(clients, 15, ordering=('sort_name', 'id')).get_page_from_request(request)
 
     return render(request, 'main/admin/clients.html', {
         'clients': page_obj.object_list,
@@ -4111,6 +3963,7 @@ def manage_clients(request):
     })
 
 @user_passes_test(is_staff)
+@replica_view
 def agents_list(request):
     """List all agents with their latest active referral code"""
     agents = UserProfile.objects.filter(role='agent').order_by('name')
@@ -4124,9 +3977,10 @@ def agents_list(request):
             Q(phone__icontains=search_query)
         )
     
-    paginator = Paginator(agents, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    agents = ReferralStatsService.annotate_agents(
+        agents.select_related('user').annotate(sort_name=Coalesce('name', Value('')))
+    )
+    page_obj = KeysetPaginator(agents, 15, ordering=('sort_name', 'id')).get_page_from_request(request)
     
     return render(request, 'main/admin/agents_list.html', {
         'agents': page_obj.object_list,
@@ -4224,6 +4078,7 @@ def manage_agents(request):
     return redirect('agents_list')
     
 @user_passes_test(is_staff)
+@replica_view
 def guides_list(request):
     guides = UserProfile.objects.filter(role='guide')
 
@@ -4296,8 +4151,9 @@ def manage_guides(request):
 
 # ----- Availability Views -----
 @user_passes_test(is_staff)
+@replica_view
 def availability_list(request):
-    availabilities = ExcursionAvailability.objects.all().order_by('status', 'excursion__title')
+    availabilities = ExcursionAvailability.objects.select_related('excursion').prefetch_related('regions')
     excursions = Excursion.objects.all().order_by('title')
 
         # Handle search
@@ -4307,19 +4163,20 @@ def availability_list(request):
             Q(excursion__title__icontains=search_query)
         )
 
-    paginator = Paginator(availabilities, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = KeysetPaginator(
+        availabilities, 15, ordering=('status', 'excursion__title', 'id')
+    ).get_page_from_request(request)
 
     return render(request, 'main/availabilities/availabilities_list.html', {
-        'availabilities': availabilities,
+        'availabilities': page_obj.object_list,
         'excursions': excursions,
         'page_obj': page_obj,
     })
 
 @user_passes_test(is_staff)
+@replica_view
 def admin_reservations(request):
-    reservations = Reservation.objects.all().order_by('check_in')
+    reservations = Reservation.objects.all()
 
     client_users = User.objects.filter(username__icontains='client_')
     updated_clients = UserProfile.objects.filter(role='client', user__in=client_users)
@@ -4337,12 +4194,10 @@ def admin_reservations(request):
                 Q(voucher_id__icontains=search_query)
             )
 
-        paginator = Paginator(reservations, 15)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        page_obj = KeysetPaginator(reservations, 15, ordering=('check_in', 'id')).get_page_from_request(request)
 
         return render(request, 'main/admin/admin_reservations.html', {
-            'reservations': reservations,
+            'reservations': page_obj.object_list,
             'page_obj': page_obj,
             'updated_clients': updated_clients,
         })   
@@ -4353,17 +4208,8 @@ def admin_reservations(request):
         messages.error(request, f'Error fetching reservations: {str(e)}')
         return redirect('admin_reservations')
 
-@user_passes_test(is_staff)
-def bookings_list(request):
-
-    search_query = request.GET.get('search', '')
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-
-    bookings = Booking.objects.all().select_related(
-        'user', 'excursion_availability', 'excursion', 'pickup_point', 'voucher_id'
-    ).order_by('-id')
-
+def _filter_bookings_list(bookings, search_query, date_from, date_to):
+    """Search/date filters shared by bookings_list and bookings_export."""
     # Apply search filter if search query is provided
     if search_query:
         bookings = bookings.filter(
@@ -4378,10 +4224,24 @@ def bookings_list(request):
         bookings = bookings.filter(created_at__date__gte=date_from)
     if date_to:
         bookings = bookings.filter(created_at__date__lte=date_to)
+    return bookings
 
-    paginator = Paginator(bookings, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+@user_passes_test(is_staff)
+@replica_view
+def bookings_list(request):
+
+    search_query = request.GET.get('search', '')
+    date_from = request.GET.get('date_from', '')
+    date_to = request.GET.get('date_to', '')
+
+    bookings = _filter_bookings_list(
+        Booking.objects.all().select_related(
+            'user', 'excursion_availability', 'excursion', 'pickup_point', 'voucher_id'
+        ),
+        search_query, date_from, date_to,
+    )
+
+    page_obj = KeysetPaginator(bookings, 15, ordering=('-id',)).get_page_from_request(request)
 
     return render(request, 'main/bookings/bookings_list.html', {
         'bookings': page_obj.object_list,
@@ -4390,6 +4250,51 @@ def bookings_list(request):
         'date_to': date_to,
         'page_obj': page_obj,
     })
+@user_passes_test(is_staff)
+def bookings_export(request):
+    """Stream every booking matching the bookings_list filters as CSV (default) or XLSX."""
+    bookings = _filter_bookings_list(
+        Booking.objects.select_related(
+            'user', 'excursion', 'excursion_availability', 'pickup_point', 'voucher_id', 'referral_code',
+        # The rows are read while the response streams, after replica_view would have exited
+        ).order_by('-id').using(read_alias()),
+        request.GET.get('search', ''),
+        request.GET.get('date_from', ''),
+        request.GET.get('date_to', ''),
+    )
+
+    def rows():
+        yield [
+            'Order ID', 'Created', 'Excursion Date', 'Guest Name', 'Guest Email', 'Guest Phone', 'Excursion',
+            'Pickup Point', 'Voucher', 'Adults', 'Children', 'Infants', 'Total Price', 'Partial Paid',
+            'Partial Paid Method', 'Referral Code', 'Discount', 'Payment Status', 'Card Order ID',
+        ]
+        for booking in bookings.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                booking.id,
+                booking.created_at,
+                booking.date,
+                booking.guest_name,
+                booking.guest_email,
+                booking.guest_phone,
+                booking.excursion.title if booking.excursion else '',
+                booking.pickup_point.name if booking.pickup_point else '',
+                booking.voucher_id.voucher_id if booking.voucher_id else '',
+                booking.total_adults,
+                booking.total_kids,
+                booking.total_infants,
+                booking.total_price,
+                booking.partial_paid,
+                booking.partial_paid_method,
+                booking.referral_code.code if booking.referral_code else '',
+                booking.referral_discount_amount,
+                booking.payment_status,
+                booking.jcc_order_id,
+            ]
+
+    filename = f'bookings_{timezone.localdate():%Y%m%d}'
+    return streaming_export_response(rows(), filename, request.GET.get('format', 'csv'), sheet_name='Bookings')
+
 # ?? CONFIRM IF NEEDED
 def filter_bookings(request):
     status = request.GET.get('status')
@@ -4635,32 +4540,18 @@ def availability_form(request, pk=None):
                         raise ValueError("Excursion ID is required")
                     availability.excursion = get_object_or_404(Excursion, pk=excursion_pk)
                 
-                # Save to get an ID before setting M2M relationships
-                availability.save()
-                
-                # Set M2M relationships
-                availability.weekdays.set(selected_weekday_ids)
-                availability.pickup_points.set(pickup_point_ids)
-                availability.regions.set(region_ids)
-                
-                # Regenerate AvailabilityDays entries
-                AvailabilityDays.objects.filter(excursion_availability=availability).delete()
-                
-                # Get the selected weekdays and create days
-                selected_weekdays = availability.weekdays.all()
-                weekday_mapping = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4, 'SAT': 5, 'SUN': 6}
-                weekday_numbers = [weekday_mapping[w.code] for w in selected_weekdays if w.code in weekday_mapping]
-                
-                # Create AvailabilityDays for each matching day in date range
-                current_date = availability.start_date
-                while current_date <= availability.end_date:
-                    if current_date.weekday() in weekday_numbers:
-                        AvailabilityDays.objects.create(
-                            excursion_availability=availability,
-                            date_day=current_date,
-                            capacity=availability.max_guests
-                        )
-                    current_date += timedelta(days=1)
+                # One transaction, so an edit refused by sync_days leaves the availability unchanged
+                with transaction.atomic():
+                    # Save to get an ID before setting M2M relationships
+                    availability.save()
+                    
+                    # Set M2M relationships
+                    availability.weekdays.set(selected_weekday_ids)
+                    availability.pickup_points.set(pickup_point_ids)
+                    availability.regions.set(region_ids)
+                    
+                    # Diff AvailabilityDays against the new calendar (keeps booking counts)
+                    AvailabilityDaysService.sync_days(availability)
 
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     return JsonResponse({
@@ -4673,12 +4564,13 @@ def availability_form(request, pk=None):
                 return redirect('availability_detail', pk=availability.pk)
 
             except Exception as e:
+                error = ' '.join(e.messages) if isinstance(e, ValidationError) else str(e)
                 if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     return JsonResponse({
                         'success': False,
-                        'message': str(e)
+                        'message': error
                     })
-                messages.error(request, f'Error {"updating" if pk else "creating"} availability: {str(e)}')
+                messages.error(request, f'Error {"updating" if pk else "creating"} availability: {error}')
         else:
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 # Format form errors for display
@@ -4727,6 +4619,7 @@ def availability_delete(request, pk):
         return redirect('availability_list')
     
 @user_passes_test(is_staff)
+@replica_view
 def pickup_points_list(request):
     pickup_points = PickupPoint.objects.all().select_related('pickup_group').order_by('pickup_group__name', 'priority', 'name')
     pickup_groups = PickupGroup.objects.all().order_by('name')
@@ -4852,6 +4745,7 @@ def manage_pickup_points(request):
     return redirect('pickup_points_list')
 
 @user_passes_test(is_staff)
+@replica_view
 def staff_list(request):
     staff = UserProfile.objects.filter(role='admin') 
         # Handle search
@@ -4965,6 +4859,7 @@ def manage_staff(request):
     })
 
 @user_passes_test(is_staff)
+@replica_view
 def admin_excursions(request):
     excursions = Excursion.objects.all().order_by('status', 'title')
 
@@ -4986,6 +4881,7 @@ def admin_excursions(request):
     })
 
 @user_passes_test(is_staff)
+@replica_view
 def excursion_analytics(request):
     """Display excursion analytics with bookings and capacity per date."""
     from .forms import ExcursionAnalyticsForm
@@ -5006,6 +4902,37 @@ def excursion_analytics(request):
     })
 
 @user_passes_test(is_staff)
+@replica_view
+def occupancy_heatmap(request):
+    """Booked/capacity per excursion and day, read from the ExcursionOccupancy matrix."""
+    from .forms import ExcursionAnalyticsForm
+    from .utils import OccupancyService
+    
+    if request.GET:
+        form = ExcursionAnalyticsForm(request.GET)
+    else:
+        # Default to the next three months
+        today = timezone.localdate()
+        form = ExcursionAnalyticsForm({'start_date': today, 'end_date': today + timedelta(days=89)})
+    
+    heatmap = None
+    excursion_id = request.GET.get('excursion') or None
+    if form.is_valid():
+        heatmap = OccupancyService.get_heatmap(
+            form.cleaned_data['start_date'],
+            form.cleaned_data['end_date'],
+            excursion_id=int(excursion_id) if excursion_id and excursion_id.isdigit() else None,
+        )
+    
+    return render(request, 'main/admin/occupancy_heatmap.html', {
+        'form': form,
+        'heatmap': heatmap,
+        'excursions': Excursion.objects.filter(occupancy__isnull=False).distinct().order_by('title').values('id', 'title'),
+        'selected_excursion': excursion_id,
+    })
+
+@user_passes_test(is_staff)
+@replica_view
 def revenue_dashboard(request):
     """Display comprehensive revenue analytics dashboard."""
     from .forms import ExcursionAnalyticsForm  # Reuse the same date range form
@@ -5026,6 +4953,105 @@ def revenue_dashboard(request):
     })
 
 @user_passes_test(is_staff)
+def revenue_export(request):
+    """Stream the completed bookings behind the revenue dashboard, one line per booking."""
+    from .forms import ExcursionAnalyticsForm
+    from django.db.models import Case, When, F
+    from django.db.models.fields import CharField
+    
+    form = ExcursionAnalyticsForm(request.GET or None)
+    if not form.is_valid():
+        messages.error(request, 'Select a valid date range to export.')
+        return redirect('revenue_dashboard')
+    start_date = form.cleaned_data['start_date']
+    end_date = form.cleaned_data['end_date']
+    
+    bookings = Booking.objects.filter(
+        payment_status='completed',
+        **RevenueAnalyticsService.created_between(start_date, end_date),
+    ).annotate(
+        excursion_title=F('excursion__title'),
+        provider_name=F('excursion__provider__name'),
+        agent_name=F('referral_code__agent__name'),
+        user_role=F('user__profile__role'),
+        user_name=F('user__profile__name'),
+        payment_type=Case(
+            When(jcc_order_id__isnull=False, jcc_order_id__gt='', then=Value('Card')),
+            default=Value('Cash'),
+            output_field=CharField()
+        ),
+    ).values_list(
+        'id', 'created_at', 'date', 'excursion_title', 'provider_name', 'referral_code__agent_id', 'agent_name',
+        'user_role', 'user_name', 'payment_type', 'total_price', 'partial_paid', 'partial_paid_method', 'referral_discount_amount',
+    ).order_by('created_at', 'id').using(read_alias())
+    
+    def rows():
+        yield [
+            'Order ID', 'Created', 'Excursion Date', 'Excursion', 'Provider', 'Channel', 'Agent', 'Representative',
+            'Payment Type', 'Total Price', 'Partial Paid', 'Partial Paid Method', 'Discount', 'Revenue',
+        ]
+        for (booking_id, created_at, booking_date, excursion_title, provider_name, agent_id, agent_name, user_role,
+             user_name, payment_type, total_price, partial_paid, partial_paid_method, discount) in bookings.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            if agent_id is not None:
+                channel = 'Agent'
+            elif user_role == 'representative':
+                channel = 'Reps'
+            else:
+                channel = 'Direct'
+            yield [
+                booking_id, created_at, booking_date, excursion_title, provider_name, channel, agent_name,
+                user_name if user_role == 'representative' else '',
+                payment_type, total_price, partial_paid, partial_paid_method, discount,
+                (total_price or 0) + (partial_paid or 0),
+            ]
+    
+    filename = f'revenue_{start_date:%Y%m%d}_{end_date:%Y%m%d}'
+    return streaming_export_response(rows(), filename, request.GET.get('format', 'csv'), sheet_name='Revenue')
+
+@user_passes_test(is_staff)
+@replica_view
+def revenue_series(request):
+    """
+    Revenue/booking-count time series for the dashboard charts, loaded after the page.
+    JSON by default; HTMX requests get the rendered chart partial.
+    """
+    from .forms import ExcursionAnalyticsForm
+    
+    form = ExcursionAnalyticsForm(request.GET or None)
+    granularity = request.GET.get('granularity', 'day')
+    if not form.is_valid() or granularity not in RevenueAnalyticsService.SERIES_GRANULARITIES:
+        return JsonResponse({'success': False, 'errors': form.errors or {'granularity': ['Invalid granularity.']}}, status=400)
+    
+    series = RevenueAnalyticsService.get_revenue_series(
+        form.cleaned_data['start_date'],
+        form.cleaned_data['end_date'],
+        granularity,
+    )
+    
+    if request.headers.get("HX-Request"):
+        total_revenue = sum(point['revenue'] for point in series)
+        return render(request, 'main/admin/partials/daily_revenue_chart.html', {
+            'data': {
+                'daily_revenue': series,
+                'average_revenue': total_revenue / len(series) if series else 0,
+            },
+            'granularity': granularity,
+            'start_date': form.cleaned_data['start_date'],
+            'end_date': form.cleaned_data['end_date'],
+            'series_granularities': RevenueAnalyticsService.SERIES_GRANULARITIES,
+        })
+    
+    return JsonResponse({
+        'success': True,
+        'granularity': granularity,
+        'series': [
+            {'date': point['date'].isoformat(), 'revenue': str(point['revenue']), 'bookings': point['bookings']}
+            for point in series
+        ],
+    })
+
+@user_passes_test(is_staff)
+@replica_view
 def hotel_list(request):
     hotels = Hotel.objects.all()
     pickup_groups = PickupGroup.objects.all()
@@ -5186,6 +5212,7 @@ def manage_regions(request):
     })
                      
 @user_passes_test(is_staff)
+@replica_view
 def pickup_groups_list(request):
     pickup_groups = PickupGroup.objects.all().order_by('name')
     regions = Region.objects.all()